@@ -0,0 +1,83 @@
+"""
+Rolling autocorrelation: running-sum engine vs autocorr_manual per window.
+
+Synthetic sensor readings of --units engines, plus one constant unit, one
+near-constant unit (tiny noise on a large level) and a few NaN dropouts, go
+through rolling_autocorr_lags and through autocorr_manual on every window of
+every unit. Constant windows and windows with a NaN must be NaN, everything
+else must match within --tol and stay in [-1, 1]. Exits non-zero on a mismatch.
+
+    python -m benchmarks.bench_autocorr --units 20
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from models.anomaly.pipeline.feature_autocorr import autocorr_manual, rolling_autocorr_lags
+from utils.synthetic import synthetic_cmapss
+
+
+def per_window(values, groups, lags, window) -> np.ndarray:
+    """autocorr_manual on every full window of every unit, NaN elsewhere"""
+    out = np.full((len(values), values.shape[1], len(lags)), np.nan)
+    for unit in np.unique(groups):
+        rows = np.flatnonzero(groups == unit)
+        for end in rows[window - 1:]:
+            block = values[end - window + 1:end + 1]
+            for c in range(values.shape[1]):
+                for j, k in enumerate(lags):
+                    out[end, c, j] = autocorr_manual(block[:, c], k)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--tol", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    raw = synthetic_cmapss(n_units=args.units)
+    groups = raw.iloc[:, 0].to_numpy()
+    values = raw.iloc[:, [6, 7, 11]].to_numpy(dtype=np.float64)
+    rng = np.random.default_rng(0)
+    cycles = 60
+    constant = np.tile(values[0], (cycles, 1))
+    near_constant = values[0] + 1e-4 * rng.normal(size=(cycles, values.shape[1]))
+    values = np.concatenate([values, constant, near_constant])
+    groups = np.concatenate([groups, np.full(cycles, groups.max() + 1), np.full(cycles, groups.max() + 2)])
+    values[rng.choice(len(values) - 2 * cycles, 5, replace=False), 1] = np.nan
+    lags = (0, 1, 3, 5)
+    print(f"rows: {len(values):,}  units: {args.units} + constant + near-constant  lags: {lags}")
+
+    t0 = time.perf_counter()
+    fast = rolling_autocorr_lags(values, lags, args.window, groups=groups)
+    t_fast = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    ref = per_window(values, groups, lags, args.window)
+    t_ref = time.perf_counter() - t0
+
+    constant_rows = groups == groups.max() - 1
+    near_rows = groups == groups.max()
+    nan_mismatch = int(np.sum(np.isnan(fast) != np.isnan(ref)))
+    error = np.abs(np.where(np.isnan(ref), 0.0, ref) - np.where(np.isnan(fast), 0.0, fast))
+    in_range = bool(np.all(np.abs(fast[~np.isnan(fast)]) <= 1.0))
+    constant_nan = bool(np.all(np.isnan(fast[constant_rows])))
+    near_finite = bool(np.all(np.isfinite(fast[near_rows][args.window - 1:, :, 0])))
+
+    print(f"running sums             : {t_fast * 1000:8.1f} ms")
+    print(f"autocorr_manual / window : {t_ref * 1000:8.1f} ms")
+    print(f"max abs. difference      : {error.max():.2e}  (near-constant unit {error[near_rows].max():.2e})")
+    print(f"NaN pattern mismatches   : {nan_mismatch}")
+    print(f"constant unit all NaN    : {constant_nan}")
+    print(f"near-constant finite     : {near_finite}")
+    print(f"all values in [-1, 1]    : {in_range}")
+    ok = nan_mismatch == 0 and error.max() < args.tol and in_range and constant_nan and near_finite
+    print("parity OK" if ok else "parity FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+torch.compile for FSENetLSTM training: step throughput eager vs compiled, and
+the eager fallback when compilation fails.
+
+The fallback is forced with a compiler backend that raises, as a box without a
+C++ toolchain does; compile_for_training must hand back the eager model and
+training steps must then go through. Exits non-zero if they do not.
+
+    python -m benchmarks.bench_compile --batch 64 --steps 20
+"""
+import argparse
+import sys
+import time
+
+import torch
+import torch.nn as nn
+
+from models.anomaly.network import FSENetLSTM
+from models.anomaly.train import compile_for_training
+
+
+def failing_backend(gm, example_inputs):
+    raise RuntimeError("no C++ toolchain (forced)")
+
+
+def steps_per_second(step_model, model, x, y, steps) -> float:
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+    loss_fn = nn.MSELoss()
+    model.train()
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        optimizer.zero_grad(set_to_none=True)
+        loss = loss_fn(step_model(x), y)
+        loss.backward()
+        optimizer.step()
+    if not torch.isfinite(loss):
+        raise RuntimeError(f"loss is {float(loss)}")
+    return steps / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=13)
+    parser.add_argument("--H", type=int, default=23)
+    parser.add_argument("--bins", type=int, default=5, help="F+1 frequency bins")
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--skip-compiled", action="store_true", help="only check the fallback")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    config = {'channels': args.channels, 'H': args.H, 'bins': args.bins}
+    x = torch.randn(args.batch, args.channels, args.H, args.bins)
+    y = torch.rand(args.batch) * 100
+
+    # forced failure: the eager model comes back and trains
+    model = FSENetLSTM(**config)
+    step_model = compile_for_training(model, x[:2], backend=failing_backend)
+    fallback_ok = step_model is model
+    try:
+        eager = steps_per_second(step_model, model, x, y, args.steps)
+    except Exception as e:
+        print(f"training after the fallback failed: {e}")
+        fallback_ok, eager = False, float('nan')
+    print(f"fallback to eager        : {'OK' if fallback_ok else 'FAILED'}  ({eager:.1f} steps/s)")
+
+    if not args.skip_compiled:
+        model = FSENetLSTM(**config)
+        t0 = time.perf_counter()
+        step_model = compile_for_training(model, x[:2])
+        t_compile = time.perf_counter() - t0
+        if step_model is model:
+            print(f"compiled                 : unavailable here, eager after {t_compile:.1f} s")
+        else:
+            steps_per_second(step_model, model, x, y, 2)  # the full batch shape compiles too
+            compiled = steps_per_second(step_model, model, x, y, args.steps)
+            print(f"compiled                 : {compiled:.1f} steps/s  ({compiled / eager:.2f}x, compile {t_compile:.1f} s)")
+
+    sys.exit(0 if fallback_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Feature loading benchmark: data.csv parsed with read_csv (old dashboard
+startup) vs the memory-mapped columnar feature store.
+
+    python -m benchmarks.bench_feature_store --units 709
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import models.data as preprocessing
+from models.feature_store import FeatureStore, write_feature_store, load_feature_frame
+from utils.synthetic import synthetic_cmapss
+
+
+def timed(fn, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=709, help="FD001-FD004 together have 709 units")
+    args = parser.parse_args()
+
+    data = preprocessing.process_data(synthetic_cmapss(n_units=args.units))
+    slope_cols = [f"{col}_lowess_slope" for col in data.columns if '_rms' in col]
+    data[slope_cols] = np.random.default_rng(0).normal(size=(len(data), len(slope_cols)))  # stand-in, slopes are slow
+    print(f"rows: {len(data):,}  columns: {data.shape[1]}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, store_path = os.path.join(tmp, "data.csv"), os.path.join(tmp, "data_store")
+        data.to_csv(csv_path, index=False)
+        write_feature_store(data, store_path)
+        print(f"on disk: csv {os.path.getsize(csv_path) / 2**20:.1f} MiB, store "
+              f"{sum(e.stat().st_size for e in os.scandir(store_path)) / 2**20:.1f} MiB")
+
+        t_csv, _ = timed(lambda: load_feature_frame(csv_path))
+        t_store, _ = timed(lambda: load_feature_frame(store_path))
+        t_touch, _ = timed(lambda: load_feature_frame(store_path).to_numpy().sum())
+        store = FeatureStore(store_path)
+        unit = int(store.units[len(store.units) // 2])
+        t_unit, _ = timed(lambda: FeatureStore(store_path).unit(unit))
+        t_cols, _ = timed(lambda: FeatureStore(store_path).read(columns=['time', 'sensor_6_rolling_rms']))
+
+        print(f"read_csv full frame        : {t_csv * 1e3:8.2f} ms")
+        print(f"store open full frame      : {t_store * 1e3:8.2f} ms  ({t_csv / t_store:.0f}x)")
+        print(f"store full frame + touch   : {t_touch * 1e3:8.2f} ms  ({t_csv / t_touch:.0f}x)")
+        print(f"store single unit          : {t_unit * 1e3:8.2f} ms")
+        print(f"store 2-column subset      : {t_cols * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
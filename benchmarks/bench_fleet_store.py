@@ -0,0 +1,106 @@
+"""
+Fleet time-series memory and window lookups: pandas frame vs FleetStore.
+
+A synthetic fleet of --units engines goes through process_data +
+add_rolling_slope, so the columns are in the order the dashboard loads them
+(RUL between the rms and the slope columns). It is held as the float64 pandas
+frame the dashboard used to keep (plus the contiguous copy its workers made)
+and as a FleetStore (float32 columns, per-unit offset/length index). Reported:
+bytes, the cost of cutting a unit's window, whether the worker matrix and the
+windows handed to freq_matrix are views, and bulk append throughput when the
+same rows arrive 10 cycles at a time. Exits non-zero if a view is a copy.
+
+    python -m benchmarks.bench_fleet_store --units 1000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import torch
+
+import models.data as preprocessing
+from models.anomaly.pipeline.feature_freq_domain import freq_matrix
+from models.fleet_store import FleetStore
+from models.predictive_model import NON_FEATURE_COLS
+from utils.synthetic import synthetic_cmapss
+
+
+def per_call_us(fn, calls) -> float:
+    t0 = time.perf_counter()
+    for args in calls:
+        fn(*args)
+    return (time.perf_counter() - t0) / len(calls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=1000)
+    parser.add_argument("--window", type=int, default=30)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    raw = synthetic_cmapss(n_units=args.units)
+    data = preprocessing.add_rolling_slope(preprocessing.process_data(raw, window=10), frac=0.5)
+    feature_cols = [col for col in data.columns if col not in NON_FEATURE_COLS]
+    frame = data.astype({col: np.float64 for col in feature_cols})
+    print(f"rows: {len(frame):,}  units: {args.units}  columns: {frame.shape[1]}")
+
+    t0 = time.perf_counter()
+    store = FleetStore.from_frame(frame)
+    t_build = time.perf_counter() - t0
+
+    frame_bytes = int(frame.memory_usage(deep=True).sum())
+    worker_bytes = len(frame) * len(feature_cols) * 8  # np.ascontiguousarray(data[feature_cols]) in the workers
+    print(f"pandas frame             : {frame_bytes / 2**20:8.1f} MiB  (+{worker_bytes / 2**20:.1f} MiB worker copy)")
+    matrix_view = np.shares_memory(store.matrix(feature_cols), store.values)
+    print(f"FleetStore               : {store.nbytes / 2**20:8.1f} MiB  (built in {t_build:.2f} s)")
+    print(f"worker matrix is a view  : {matrix_view}")
+    print(f"ratio                    : {store.nbytes / (frame_bytes + worker_bytes):8.2f}")
+
+    # random (unit, stop) windows
+    rng = np.random.default_rng(0)
+    lengths = frame.groupby('number').size()
+    picks = rng.choice(lengths.index.to_numpy(), args.lookups)
+    stops = [int(rng.integers(args.window, lengths[u] + 1)) for u in picks]
+    calls = list(zip(picks.tolist(), stops))
+    starts = dict(zip(store.unit_ids, store.offsets[:store.n_units].tolist()))
+
+    t_mask = per_call_us(lambda u, stop: frame[frame['number'] == u].iloc[stop - args.window:stop][feature_cols].to_numpy().T,
+                         calls[:200])
+    t_iloc = per_call_us(lambda u, stop: frame.iloc[starts[u] + stop - args.window:starts[u] + stop][feature_cols].to_numpy().T,
+                         calls)
+    t_store = per_call_us(lambda u, stop: store.window(u, stop, args.window, feature_cols), calls)
+    print(f"window, boolean mask     : {t_mask:8.1f} us")
+    print(f"window, .iloc by offset  : {t_iloc:8.1f} us")
+    print(f"window, FleetStore       : {t_store:8.1f} us")
+
+    u, stop = calls[0]
+    window = store.window(u, stop, args.window, feature_cols)
+    x = torch.from_numpy(window)
+    spectra = freq_matrix(x, args.window, 8)
+    window_view = np.shares_memory(window, store.values) and x.data_ptr() == window.ctypes.data
+    print(f"freq_matrix input view   : {window_view}  (output {tuple(spectra.shape)})")
+
+    # the same rows arriving 10 cycles at a time across the fleet
+    live = FleetStore(store.columns)
+    units = frame['number'].to_numpy()
+    cycles = frame['time'].to_numpy()
+    values = frame[store.columns].to_numpy(dtype=np.float32)
+    t0 = time.perf_counter()
+    for start in range(1, int(cycles.max()) + 1, 10):
+        rows = (cycles >= start) & (cycles < start + 10)
+        live.append(units[rows], values[rows])
+    t_append = time.perf_counter() - t0
+    grown = live.nbytes
+    t0 = time.perf_counter()
+    live.compact()
+    t_compact = time.perf_counter() - t0
+    print(f"bulk append, 10 cycles   : {len(frame) / t_append:12,.0f} rows/s  ({grown / 2**20:.1f} MiB before compact,"
+          f" compact {t_compact:.2f} s)")
+    print(f"appended == from_frame   : {np.array_equal(live.to_frame().to_numpy(), store.to_frame().to_numpy())}")
+    sys.exit(0 if matrix_view and window_view else 1)
+
+
+if __name__ == "__main__":
+    main()
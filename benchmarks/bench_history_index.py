@@ -0,0 +1,103 @@
+"""
+Long-range plotting: multi-resolution history vs decimating the raw series.
+
+A series of --points values is built the way the dashboard does it (one
+extend per tick of --batch points), then views of different widths are
+queried as a zoom/pan frame would. For each view the time and the number of
+points drawn are compared with minmax_decimate over the raw slice, and the
+returned extremes are checked against the raw min/max of the range. A series
+with maxlen is built too and must keep only the newest points, with their extremes.
+
+    python -m benchmarks.bench_history_index --points 2000000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from ui.series_buffer import MultiResolutionSeries
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    # the previous dashboard path: min and max of every bucket of the raw slice, per frame
+    n = len(y)
+    if n <= max_points or max_points < 4:
+        return x, y
+    size = int(np.ceil(n / (max_points // 2)))
+    n_full = (n // size) * size
+    blocks = y[:n_full].reshape(-1, size)
+    offsets = np.arange(0, n_full, size)
+    parts = [offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1)]
+    if n_full < n:
+        tail = y[n_full:]
+        parts.append([n_full + tail.argmin(), n_full + tail.argmax()])
+    idx = np.unique(np.concatenate(parts))
+    return x[idx], y[idx]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=2_000_000)
+    parser.add_argument("--batch", type=int, default=16, help="points per extend (one dashboard tick)")
+    parser.add_argument("--max-points", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    x = np.arange(args.points, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=args.points)) + 5 * (rng.random(args.points) < 1e-5)  # drift with rare spikes
+
+    series = MultiResolutionSeries()
+    t0 = time.perf_counter()
+    for start in range(0, args.points, args.batch):
+        series.extend(x[start:start + args.batch], y[start:start + args.batch])
+    t_build = time.perf_counter() - t0
+    level_bytes = sum(sum(getattr(level, name).nbytes for name in ('min', 'max', 'sum', 'count', 'imin', 'imax'))
+                      for level in series.levels)
+    print(f"points: {args.points:,}  levels: {len(series.levels)}  build: {t_build / args.points * 1e6:.2f} us per point"
+          f"  (levels {level_bytes / 2**20:.1f} MiB, raw {2 * args.points * 8 / 2**20:.1f} MiB)")
+
+    ok = True
+    print(f"{'view (steps)':>14} {'decimate ms':>12} {'points':>8} {'levels ms':>10} {'points':>8} {'level':>6}")
+    for width in (1_000, 100_000, args.points // 10, args.points):
+        x1 = args.points - 1
+        x0 = max(0, x1 - width + 1)
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeats):
+            dx, dy = minmax_decimate(x[x0:x1 + 1], y[x0:x1 + 1], args.max_points)
+        t_decimate = (time.perf_counter() - t0) / args.repeats
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeats):
+            qx, qy = series.query(x0, x1, args.max_points)
+        t_query = (time.perf_counter() - t0) / args.repeats
+
+        level = series.level_for(x1 - x0 + 1, args.max_points)
+        extremes = np.isclose(qy.max(), y[x0:x1 + 1].max()) and np.isclose(qy.min(), y[x0:x1 + 1].min())
+        ok &= bool(extremes) and bool(np.all(np.diff(qx) >= 0))
+        print(f"{width:>14,} {t_decimate * 1000:12.2f} {len(dx):8,} {t_query * 1000:10.3f} {len(qx):8,} {level:6}")
+
+    # bounded history: only the newest maxlen points (at least 3/4 of them) are kept
+    maxlen = args.points // 4
+    bounded = MultiResolutionSeries(maxlen=maxlen)
+    t0 = time.perf_counter()
+    for start in range(0, args.points, args.batch):
+        bounded.extend(x[start:start + args.batch], y[start:start + args.batch])
+    t_bounded = time.perf_counter() - t0
+    kept = len(bounded)
+    qx, qy = bounded.query(None, None, args.max_points)
+    newest = y[args.points - kept:]
+    bounded_ok = maxlen * 3 // 4 <= kept <= maxlen and bool(np.array_equal(bounded.x, x[args.points - kept:])) \
+        and np.isclose(qy.max(), newest.max()) and np.isclose(qy.min(), newest.min())
+    ok &= bool(bounded_ok)
+    print(f"maxlen {maxlen:,}: {kept:,} points kept, build {t_bounded / args.points * 1e6:.2f} us per point"
+          f"  ({'OK' if bounded_ok else 'WRONG'})")
+
+    print("extremes kept" if ok else "extremes MISSING")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Incremental scaling and RUL labels: parity with a full refit and cost per batch.
+
+A synthetic fleet arrives `--batch-cycles` cycles at a time (all units together,
+as on the floor). After every batch the refit path rescales and relabels all
+rows seen so far (StandardScaler.fit_transform + groupby max), the incremental
+path only folds the new rows into an IncrementalScaler and a RULLabeler. At the
+end both are compared on the full history; --regimes adds FD002-like operating
+conditions and scales per regime. Exits non-zero on a mismatch.
+
+    python -m benchmarks.bench_incremental_scaling --units 100 --regimes 6
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from models.anomaly.pipeline.normalizer import IncrementalScaler, RULLabeler, operating_regime
+from utils.synthetic import synthetic_cmapss
+
+ALTITUDES = np.array([0.0, 10.0, 20.0, 25.0, 35.0, 42.0])  # setting 1 of the FD002/FD004 conditions
+
+
+def fleet(units: int, regimes: int, seed: int = 0) -> pd.DataFrame:
+    raw = synthetic_cmapss(n_units=units, seed=seed)
+    frame = pd.DataFrame({'number': raw.iloc[:, 0], 'time': raw.iloc[:, 1]})
+    values = raw.iloc[:, 5:26].to_numpy(dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    regime = rng.integers(0, regimes, len(frame))
+    frame['ops-set-1'] = ALTITUDES[regime] + rng.normal(0, 0.003, len(frame))
+    # every condition moves the sensor levels
+    values = values * (1 + 0.05 * regime[:, None]) + 3.0 * regime[:, None]
+    for i in range(values.shape[1]):
+        frame[f"sensor_{i}"] = values[:, i]
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=100)
+    parser.add_argument("--regimes", type=int, default=1, choices=range(1, 7))
+    parser.add_argument("--batch-cycles", type=int, default=10)
+    parser.add_argument("--tol", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    data = fleet(args.units, args.regimes)
+    cols = [col for col in data.columns if col.startswith('sensor_')]
+    by_regime = args.regimes > 1
+    starts = np.arange(1, data['time'].max() + 1, args.batch_cycles)
+    print(f"rows: {len(data):,}  units: {args.units}  regimes: {args.regimes}  batches: {len(starts)}")
+
+    scaler, labeler = IncrementalScaler(cols), RULLabeler()
+    t_refit = t_incremental = 0.0
+    seen = []
+    for start in starts:
+        batch = data[(data['time'] >= start) & (data['time'] < start + args.batch_cycles)]
+        keys = operating_regime(batch['ops-set-1']) if by_regime else None
+
+        t0 = time.perf_counter()
+        scaled = scaler.partial_fit_transform(batch[cols], keys=keys)
+        rul, shifts = labeler.update(batch['number'], batch['time'])
+        t_incremental += time.perf_counter() - t0
+
+        # what a full recomputation on every batch costs
+        seen.append(batch)
+        t0 = time.perf_counter()
+        history = pd.concat(seen)
+        if by_regime:
+            regime = operating_regime(history['ops-set-1'])
+            for key in np.unique(regime):
+                rows = regime == key
+                history.loc[rows, cols] = StandardScaler().fit_transform(history.loc[rows, cols])
+        else:
+            history[cols] = StandardScaler().fit_transform(history[cols])
+        history['RUL'] = history.groupby('number')['time'].transform('max') - history['time']
+        t_refit += time.perf_counter() - t0
+
+    # the final state against a full fit of everything
+    keys = operating_regime(data['ops-set-1']) if by_regime else None
+    expected = history.sort_index()
+    scale_error = float(np.max(np.abs(scaler.transform(data[cols], keys=keys).to_numpy() - expected[cols].to_numpy())))
+    labels_ok = bool(np.array_equal(labeler.rul(data['number'], data['time']), expected['RUL'].to_numpy()))
+
+    print(f"refit every batch        : {t_refit:8.3f} s  ({t_refit / len(starts) * 1000:.1f} ms per batch, last one {len(history):,} rows)")
+    print(f"incremental              : {t_incremental:8.3f} s  ({t_incremental / len(starts) * 1000:.1f} ms per batch)")
+    print(f"regimes seen             : {len(scaler.keys)}")
+    print(f"max abs. scale diff.     : {scale_error:.2e}")
+    print(f"labels equal             : {labels_ok}")
+    ok = labels_ok and scale_error < args.tol
+    print("parity OK" if ok else "parity FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+LOWESS slope benchmark: per-unit, per-column statsmodels lowess through
+groupby().apply (old add_rolling_slope) vs the vectorized feature_lowess fit,
+plus the per-cycle cost of the causal streaming slope.
+
+lowess_smooth is also checked against statsmodels on a few units with the
+--delta interpolation (default 2 cycles) and with NaN readings (rolling warm-up
+rows and a dropout), which must come back as NaN exactly where statsmodels'
+missing='drop' puts them. Exits non-zero on a mismatch.
+
+    python -m benchmarks.bench_lowess --units 100
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from statsmodels.nonparametric.smoothers_lowess import lowess
+
+from models.anomaly.pipeline.feature_lowess import grouped_lowess_slope, lowess_smooth, StreamingLowessSlope
+from utils.synthetic import synthetic_cmapss
+
+
+def legacy_slopes(data: pd.DataFrame, cols: list) -> np.ndarray:
+    # the original apply_lowess_slope, one statsmodels call per unit per column
+    def apply(group):
+        out = {}
+        for col in cols:
+            smoothed = lowess(endog=group[col], exog=group['time'], frac=0.5, return_sorted=False)
+            out[col] = np.gradient(smoothed)
+        return pd.DataFrame(out, index=group.index)
+    return data.groupby('number', group_keys=False)[['time'] + cols].apply(apply)[cols].to_numpy()
+
+
+def parity(data: pd.DataFrame, cols: list, frac: float, delta: float) -> float:
+    """max abs. difference to statsmodels' lowess over a few units, inf if the NaN rows differ"""
+    worst = 0.0
+    for _, group in list(data.groupby('number'))[:5]:
+        x = group['time'].to_numpy(dtype=np.float64)
+        y = group[cols].to_numpy()
+        y_nan = group[cols].rolling(10).mean().to_numpy(copy=True)
+        y_nan[len(y) // 2, 0] = np.nan
+        for values, d in ((y, delta), (y_nan, 0.0), (y_nan, delta)):
+            ours = lowess_smooth(values, x, frac=frac, delta=d)
+            for c in range(len(cols)):
+                ref = lowess(values[:, c], x, frac=frac, delta=d, return_sorted=False)
+                if not np.array_equal(np.isnan(ref), np.isnan(ours[:, c])):
+                    return np.inf
+                worst = max(worst, float(np.nanmax(np.abs(ref - ours[:, c]))))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=100)
+    parser.add_argument("--frac", type=float, default=0.5)
+    parser.add_argument("--delta", type=float, default=2.0, help="delta of the parity check, also timed if > 0")
+    parser.add_argument("--tol", type=float, default=1e-8)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    raw = synthetic_cmapss(n_units=args.units)
+    cols = [f"s{i}" for i in range(13)]
+    data = pd.DataFrame(raw.iloc[:, [0, 1]].to_numpy(), columns=['number', 'time'])
+    data[cols] = raw.iloc[:, 6:19].to_numpy()
+    print(f"rows: {len(data):,}  units: {args.units}  columns: {len(cols)}  frac: {args.frac}")
+
+    values, groups, x = data[cols].to_numpy(), data['number'].to_numpy(), data['time'].to_numpy()
+
+    t0 = time.perf_counter()
+    fast = grouped_lowess_slope(values, groups, x=x, frac=args.frac)
+    t_fast = time.perf_counter() - t0
+    print(f"vectorized lowess slope   : {t_fast:8.2f} s")
+
+    if args.delta > 0:
+        t0 = time.perf_counter()
+        grouped_lowess_slope(values, groups, x=x, frac=args.frac, delta=args.delta)
+        print(f"  with delta={args.delta:<13g}: {time.perf_counter() - t0:8.2f} s")
+
+    stream = StreamingLowessSlope(n_features=len(cols), window=30)
+    t0 = time.perf_counter()
+    for row in values[:5000]:
+        stream.update(row)
+    per_cycle = (time.perf_counter() - t0) / min(len(values), 5000)
+    print(f"streaming slope per cycle : {per_cycle * 1e6:8.1f} us")
+
+    error = parity(data, cols, args.frac, args.delta)
+    print(f"statsmodels parity        : {error:.2e}  (delta={args.delta:g} and NaN rows)")
+
+    if not args.skip_legacy:
+        t0 = time.perf_counter()
+        ref = legacy_slopes(data, cols)
+        t_legacy = time.perf_counter() - t0
+        print(f"statsmodels groupby.apply : {t_legacy:8.2f} s  ({t_legacy / t_fast:.1f}x slower)")
+        print(f"max abs. difference       : {np.max(np.abs(ref - fast)):.2e}")
+
+    ok = error < args.tol
+    print("parity OK" if ok else "parity FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+CPU throughput of the anomaly network front end (FSENet -> LSTM) in windows
+per second: per-channel Python loop (original forward passes, with the
+results/result fix) vs the channel- and batch-folded forward passes.
+
+    python -m benchmarks.bench_network --channels 13
+"""
+import argparse
+import time
+
+import torch
+
+from models.anomaly.network import FSENet, LSTM
+
+
+def legacy_forward(fsenet: FSENet, lstm: LSTM, x: torch.Tensor) -> torch.Tensor:
+    # one conv + one LSTM call per window and per channel
+    out = []
+    for window in x:
+        per_channel = []
+        for freq in window:
+            H, F1 = freq.shape
+            conv = fsenet.conv(freq.view(H, 1, F1)).permute(1, 0, 2)
+            v = torch.tanh(conv * conv.mean(dim=(1, 2)).view(-1, 1, 1))
+            seq = v.permute(1, 0, 2).reshape(H, -1).unsqueeze(1)
+            _, (hn, _) = lstm.lstm(seq)
+            per_channel.append(hn[-1][0])
+        out.append(torch.stack(per_channel))
+    return torch.stack(out)
+
+
+def batched_forward(fsenet: FSENet, lstm: LSTM, x: torch.Tensor) -> torch.Tensor:
+    v, _, _ = fsenet(x)
+    return lstm(v)
+
+
+def throughput(fn, x, repeats):
+    fn(x)  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn(x)
+    return repeats * x.shape[0] / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=13)
+    parser.add_argument("--H", type=int, default=33)
+    parser.add_argument("--bins", type=int, default=17, help="F+1 frequency bins")
+    parser.add_argument("--conv-channels", type=int, default=16)
+    parser.add_argument("--kernel", type=int, default=3)
+    parser.add_argument("--hidden", type=int, default=64)
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    W = args.bins - args.kernel + 1
+    fsenet = FSENet(out_channels=args.conv_channels, kernel_size=args.kernel).eval()
+    lstm = LSTM(input_size=args.conv_channels * W, hidden_size=args.hidden).eval()
+
+    with torch.inference_mode():
+        x = torch.randn(4, args.channels, args.H, args.bins)
+        diff = (legacy_forward(fsenet, lstm, x) - batched_forward(fsenet, lstm, x)).abs().max().item()
+        print(f"C={args.channels} H={args.H} F+1={args.bins} C'={args.conv_channels} hidden={args.hidden}"
+              f"  threads={torch.get_num_threads()}  max abs. diff={diff:.1e}")
+        print(f"{'B':>5} {'loop win/s':>12} {'batched win/s':>14} {'speedup':>8}")
+
+        B = 1
+        while B <= args.max_batch:
+            x = torch.randn(B, args.channels, args.H, args.bins)
+            repeats = max(1, 256 // B)
+            loop = throughput(lambda t: legacy_forward(fsenet, lstm, t), x, max(1, repeats // 8))
+            fast = throughput(lambda t: batched_forward(fsenet, lstm, t), x, repeats)
+            print(f"{B:>5} {loop:>12.1f} {fast:>14.1f} {fast / loop:>7.1f}x")
+            B *= 2
+
+
+if __name__ == "__main__":
+    main()
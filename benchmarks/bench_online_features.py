@@ -0,0 +1,117 @@
+"""
+Online feature extraction: parity with the batch functions and cost per cycle.
+
+Rows of a synthetic fleet, plus a unit whose readings never change, one with a
+stuck sensor and one with NaN readings (the stats must recover once a NaN has
+left the window), are fed one cycle at a time, interleaved across units as
+they would arrive on the floor. Every emitted feature is compared with the batch
+path on the full series. Exits 1 when any feature differs by more than --tol or
+is NaN on one path only, so it can gate changes to either path.
+
+    python -m benchmarks.bench_online_features --units 20
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import torch
+
+from models.anomaly.pipeline.feature_autocorr import rolling_autocorr_lags
+from models.anomaly.pipeline.feature_freq_domain import freq_matrix
+from models.anomaly.pipeline.feature_lowess import causal_lowess_slope
+from models.anomaly.pipeline.feature_online import OnlineFeatureExtractor
+from models.anomaly.pipeline.feature_rolling import ROLLING_STATS, rolling_stats, unit_starts
+from utils.synthetic import synthetic_cmapss
+
+
+def batch_features(values, groups, window, lags, slope_window) -> np.ndarray:
+    """the batch functions' output in OnlineFeatureExtractor.feature_names order"""
+    stats = rolling_stats(values, window, groups=groups, stats=ROLLING_STATS)
+    parts = [stats[stat] for stat in ROLLING_STATS]
+    acf = rolling_autocorr_lags(values, lags, window, groups=groups)       # [rows, cols, lags]
+    parts.append(acf.reshape(len(values), -1))
+
+    # the causal slope starts at each unit's first full rms window
+    slope = np.full_like(values, np.nan)
+    valid = np.arange(len(values)) - unit_starts(groups) >= window - 1
+    slope[valid] = causal_lowess_slope(stats["rms"][valid], slope_window, groups=groups[valid])
+    parts.append(slope)
+    return np.concatenate(parts, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--slope-window", type=int, default=30)
+    parser.add_argument("--freq", type=int, nargs=2, default=(32, 8), metavar=("N", "T"))
+    parser.add_argument("--tol", type=float, default=1e-8)
+    args = parser.parse_args()
+
+    raw = synthetic_cmapss(n_units=args.units)
+    groups = raw.iloc[:, 0].to_numpy()
+    values = raw.iloc[:, 5:26].to_numpy(dtype=np.float64)
+    # flat windows: a unit that never changes, and one with a stuck first sensor
+    cycles = 60
+    flat = np.tile(values[0], (cycles, 1))
+    stuck = values[groups == groups[0]][:cycles].copy()
+    stuck[:, 0] = stuck[0, 0]
+    # dropouts: one reading of every sensor, a run of one sensor, one in the warm-up
+    gaps = values[groups == groups[0]][:cycles].copy()
+    gaps[20] = np.nan
+    gaps[35:38, 1] = np.nan
+    gaps[3, 2] = np.nan
+    values = np.concatenate([values, flat, stuck, gaps])
+    groups = np.concatenate([groups] + [np.full(cycles, groups.max() + i) for i in (1, 2, 3)])
+    time_col = np.concatenate([raw.iloc[:, 1].to_numpy()] + [np.arange(1, cycles + 1)] * 3)
+    cols = [f"sensor_{i}" for i in range(values.shape[1])]
+    lags = (1, 2, 5)
+    print(f"rows: {len(values):,}  units: {args.units} + flat + stuck sensor + NaN readings  columns: {len(cols)}")
+
+    t0 = time.perf_counter()
+    expected = batch_features(values, groups, args.window, lags, args.slope_window)
+    t_batch = time.perf_counter() - t0
+
+    extractor = OnlineFeatureExtractor(cols, window=args.window, stats=ROLLING_STATS, autocorr_lags=lags,
+                                       slope_window=args.slope_window, freq=tuple(args.freq))
+    # cycle by cycle across the fleet: unit 1 cycle 1, unit 2 cycle 1, ...
+    order = np.lexsort((groups, time_col))
+    online = np.empty_like(expected)
+    spectrum_error = 0.0
+    N, T = args.freq
+    starts = {unit: np.flatnonzero(groups == unit)[0] for unit in np.unique(groups)}
+    t0 = time.perf_counter()
+    for row in order:
+        online[row] = extractor.update(groups[row], values[row])
+    t_online = time.perf_counter() - t0
+
+    # spectra: the newest frame of every unit against freq_matrix on the history so far
+    for unit, start in starts.items():
+        stop = start + int(np.sum(groups == unit))
+        frame = extractor.spectrum(unit)
+        if frame is not None:
+            ref = freq_matrix(torch.tensor(values[start:stop].T), N, T)[:, -1].numpy()
+            diff = np.abs(ref - frame) / (1 + np.abs(ref))
+            diff = np.where(np.isnan(ref) & np.isnan(frame), 0.0, np.where(np.isnan(diff), np.inf, diff))
+            spectrum_error = max(spectrum_error, float(np.max(diff)))
+
+    both_nan = np.isnan(expected) & np.isnan(online)
+    nan_mismatch = int(np.sum(np.isnan(expected) != np.isnan(online)))
+    error = np.abs(expected - online) / (1 + np.abs(expected))
+    error = np.where(both_nan, 0.0, np.where(np.isnan(error), np.inf, error))
+    max_error = float(np.max(error))
+    worst = extractor.feature_names[int(np.argmax(np.max(error, axis=0)))]
+
+    print(f"batch, whole series      : {t_batch:8.3f} s")
+    print(f"online, all cycles       : {t_online:8.3f} s  ({t_online / len(values) * 1e6:.1f} us per cycle)")
+    print(f"features per cycle       : {len(extractor.feature_names)}")
+    print(f"max rel. difference      : {max_error:.2e}  ({worst}; NaN pattern mismatches: {nan_mismatch})")
+    print(f"max rel. spectrum diff.  : {spectrum_error:.2e}")
+    ok = nan_mismatch == 0 and max_error < args.tol and spectrum_error < args.tol
+    print("parity OK" if ok else f"parity FAILED (tolerance {args.tol:g})")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Headless end-to-end replay: load -> features -> RUL prediction, as the dashboard runs it.
+
+CMAPSS-format files (or a synthetic fleet of --units engines written in the
+same format) are loaded with the YAML config, processed by process_data +
+add_rolling_slope, held in a FleetStore and replayed through the dashboard's
+FleetWorker (all units in lockstep, one batched predict per cycle) or
+InferenceWorker (--mode unit, one row per cycle). A consumer thread drains the
+results and keeps the plot history, as update_data does, without Tk.
+
+--rate replays at that many cycles per second (0: as fast as possible). The
+report has the stage timings and memory, throughput, and p50/p90/p99 latency of
+every cycle from its scheduled start to its prediction. Without the trained
+model (or with --synthetic-model) a small model is fitted on the replayed data.
+--max-p99-ms turns the run into a regression check.
+
+    python -m benchmarks.bench_replay --units 500
+    python -m benchmarks.bench_replay --units 2000 --rate 10 --duration 30 --max-p99-ms 50
+    python -m benchmarks.bench_replay --files Data/CMAPSSData/train_FD001.txt --mode unit --rate 100
+    python -m benchmarks.bench_replay --units 200 --model-url http://127.0.0.1:8765
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import models.data as preprocessing
+from models.anomaly.data_loader import load_config, load_data
+from models.fleet_store import FleetStore
+from models.predictive_model import DEFAULT_MODEL_PATH, NON_FEATURE_COLS, make_model
+from ui.inference_worker import FleetWorker, InferenceWorker
+from ui.series_buffer import MultiResolutionSeries
+from utils.instrumentation import RECORDER, LatencyWindow, stage
+from utils.synthetic import synthetic_cmapss
+
+
+class TimedModel:
+    """records start and end of every predict call of the wrapped model"""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = []  # (start, end, rows)
+
+    def predict(self, X):
+        start = time.perf_counter()
+        out = self.model.predict(X)
+        self.calls.append((start, time.perf_counter(), len(X)))
+        return out
+
+
+def load_sources(files: list, units: int, seed: int) -> list:
+    """raw frames through load_data, synthetic units written in the CMAPSS text layout first"""
+    config = load_config(preprocessing.cmapss_config_path)
+    frames = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if not files:
+            path = os.path.join(tmp, "train_SYNTH.txt")
+            synthetic_cmapss(n_units=units, seed=seed).to_csv(path, sep=" ", header=False, index=False)
+            files = [path]
+        for path in files:
+            config['data']['input_path'] = path
+            with stage("load", path=os.path.basename(path)) as record:
+                frames.append(load_data(config))
+                record['rows'] = len(frames[-1])
+    return frames
+
+
+def build_model(data, feature_cols: list, args):
+    if args.model_url:
+        from models.scoring_server import ScoringClient
+        return ScoringClient(args.model_url), "scoring server"
+    if not args.synthetic_model and os.path.exists(args.model):
+        import joblib
+        with stage("load model"):
+            model = joblib.load(args.model)
+        missing = set(map(str, getattr(model, 'feature_names_in_', []))) - set(feature_cols)
+        if not missing:
+            return model, args.model
+        print(f"{args.model} expects columns the replayed data lacks ({sorted(missing)[:3]} ...), using a synthetic model")
+    # small and quick: enough to put a realistic tree ensemble in the loop
+    with stage("fit synthetic model", rows=len(data)):
+        model = make_model('hgb', max_iter=50, max_depth=6)
+        model.fit(data[feature_cols], data['RUL'])
+    return model, "synthetic hgb (50 trees)"
+
+
+def replay(store: FleetStore, feature_cols: list, model, mode: str, rate: float, duration: float | None) -> dict:
+    """run the dashboard worker over the store and consume its results like update_data"""
+    results = queue.Queue()  # unbounded: every cycle is measured, none is dropped
+    tick = 1.0 / rate if rate > 0 else 0.0
+    timed = TimedModel(model)
+    worker_cls = FleetWorker if mode == 'fleet' else InferenceWorker
+    worker = worker_cls(timed, store, feature_cols, results, tick_seconds=tick)
+
+    history = MultiResolutionSeries()
+    consume = LatencyWindow(size=1_000_000)
+    consumed = [0]
+    done = threading.Event()
+
+    def consumer():
+        step = 0
+        while not (done.is_set() and results.empty()):
+            try:
+                batch = [results.get(timeout=0.05)]
+            except queue.Empty:
+                continue
+            with consume.time():
+                while True:
+                    try:
+                        batch.append(results.get_nowait())
+                    except queue.Empty:
+                        break
+                rul = [np.min(r.rul) for r in batch]
+                history.extend(np.arange(step, step + len(batch)), rul)
+                history.query(max(0, step - 10_000), step + len(batch), 2000)
+                step += len(batch)
+            consumed[0] = step
+
+    reader = threading.Thread(target=consumer, daemon=True)
+    reader.start()
+    start = time.perf_counter()
+    worker.start()
+    worker.join(timeout=duration)
+    if worker.is_alive():
+        worker.stop()
+        worker.join()
+    wall = time.perf_counter() - start
+    done.set()
+    reader.join()
+
+    calls = np.array(timed.calls).reshape(-1, 3)
+    scheduled = start + np.arange(len(calls)) * tick
+    # from the moment the cycle was due (or, flat out, from the end of the previous one) to its prediction
+    due = scheduled if tick > 0 else np.concatenate([[start], calls[:-1, 1]])
+    latency = (calls[:, 1] - due) * 1000
+    predict = (calls[:, 1] - calls[:, 0]) * 1000
+    ps = (50, 90, 99)
+    return {
+        'mode': mode,
+        'target_rate': rate,
+        'cycles': int(len(calls)),
+        'rows_scored': int(calls[:, 2].sum()),
+        'wall_s': wall,
+        'cycles_per_s': len(calls) / wall,
+        'rows_per_s': float(calls[:, 2].sum()) / wall,
+        'latency_ms': dict(zip(map(str, ps), np.percentile(latency, ps).tolist())) if len(calls) else {},
+        'predict_ms': dict(zip(map(str, ps), np.percentile(predict, ps).tolist())) if len(calls) else {},
+        'consume_ms': {str(p): v for p, v in consume.percentiles(ps).items()},
+        'consumed': consumed[0],
+        'dropped': worker.dropped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", nargs="*", default=[], help="raw CMAPSS files (default: a synthetic fleet)")
+    parser.add_argument("--units", type=int, default=200, help="synthetic fleet size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=("fleet", "unit"), default="fleet")
+    parser.add_argument("--rate", type=float, default=0.0, help="cycles per second, 0: as fast as possible")
+    parser.add_argument("--duration", type=float, default=None, help="stop the replay after this many seconds")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="trained joblib model, if present")
+    parser.add_argument("--synthetic-model", action="store_true", help="fit a small model even if --model exists")
+    parser.add_argument("--model-url", default=None, help="score through a running scoring server instead")
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="exit non-zero if the p99 cycle latency is higher")
+    args = parser.parse_args()
+
+    frames = load_sources(args.files, args.units, args.seed)
+    parts = []
+    for raw in frames:
+        # the dashboard's data, computed the way models/data.py writes the feature store
+        with stage("process_data", rows=len(raw)):
+            data = preprocessing.process_data(raw, window=10)
+        with stage("add_rolling_slope", rows=len(data)):
+            parts.append(preprocessing.add_rolling_slope(data, frac=0.5))
+    offset = 0
+    for part in parts:
+        # units of several files stay apart (the loader downcasts the ids, widen them first)
+        part['number'] = part['number'].astype(np.int64) + offset
+        offset = int(part['number'].max())
+    data = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+    feature_cols = [col for col in data.columns if col not in NON_FEATURE_COLS]
+    with stage("fleet store", rows=len(data)):
+        store = FleetStore.from_frame(data)
+
+    model, model_name = build_model(data, feature_cols, args)
+    with stage("replay") as record:
+        report = replay(store, feature_cols, model, args.mode, args.rate, args.duration)
+        record['rows'] = report['rows_scored']
+    stages = {r['stage']: r for r in RECORDER.records}
+    report.update({
+        'units': store.n_units,
+        'rows': len(store),
+        'model': model_name,
+        'store_mb': store.nbytes / 2**20,
+        'peak_rss_mb': stages['replay']['peak_rss_mb'],
+        'stages_s': {name: r['wall_s'] for name, r in stages.items()},
+    })
+
+    print(RECORDER.summary())
+    print()
+    rate = "as fast as possible" if args.rate <= 0 else f"target {args.rate:g} cycles/s"
+    print(f"replay ({report['mode']}, {rate}): {report['units']} units, {report['rows']:,} rows, model: {model_name}")
+    print(f"cycles                   : {report['cycles']:,} in {report['wall_s']:.2f} s  ({report['cycles_per_s']:,.1f} cycles/s)")
+    print(f"rows scored              : {report['rows_scored']:,}  ({report['rows_per_s']:,.0f} rows/s, {report['dropped']} dropped)")
+    for name in ('latency_ms', 'predict_ms', 'consume_ms'):
+        values = "  ".join(f"p{p} {v:8.2f}" for p, v in report[name].items())
+        print(f"{name.replace('_ms', '') + ' ms':<25}: {values}")
+    print(f"memory                   : store {report['store_mb']:.1f} MiB, peak RSS {report['peak_rss_mb']:.0f} MiB")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    p99 = report['latency_ms'].get('99')
+    if args.max_p99_ms is not None and (p99 is None or p99 > args.max_p99_ms):
+        print(f"p99 latency {p99:.2f} ms over the {args.max_p99_ms:g} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
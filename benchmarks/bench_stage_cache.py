@@ -0,0 +1,87 @@
+"""
+Stage cache: cold vs warm runs of the models/data.py preprocessing stages.
+
+A synthetic fleet of --units engines goes through process_data and
+add_rolling_slope with a StageCache in a temporary directory, then again with a
+fresh StageCache on the same directory (a second process run). The warm run must
+hit every stage, give the same frames and leave the scaler in the state the cold
+run did.
+
+A cached frame extended in place by apply_and_name must not keep the key it was
+cached under: a stage run on it afterwards has to see the new column. Exits
+non-zero if any check fails.
+
+    python -m benchmarks.bench_stage_cache --units 100
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import models.data as preprocessing
+from models.anomaly.pipeline.apply_utils import apply_and_name
+from models.anomaly.pipeline.feature_stats import rolling_rms
+from models.anomaly.pipeline.normalizer import IncrementalScaler
+from models.stage_cache import StageCache
+from utils.synthetic import synthetic_cmapss
+
+
+def n_columns(df: pd.DataFrame) -> int:
+    return df.shape[1]
+
+
+def pipeline(cache: StageCache, raw: pd.DataFrame):
+    scaler = IncrementalScaler()
+    t0 = time.perf_counter()
+    data = cache.run(preprocessing.process_data, raw, window=10, scaler=scaler)
+    data = cache.run(preprocessing.add_rolling_slope, data, frac=0.5)
+    return data, scaler, time.perf_counter() - t0
+
+
+def same_state(a, b) -> bool:
+    return all(np.array_equal(np.asarray(v), np.asarray(vars(b)[k])) for k, v in vars(a).items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=100)
+    args = parser.parse_args()
+
+    raw = synthetic_cmapss(n_units=args.units)
+    print(f"rows: {len(raw):,}  units: {args.units}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cold_cache = StageCache(tmp)
+        cold, cold_scaler, t_cold = pipeline(cold_cache, raw)
+        warm_cache = StageCache(tmp)
+        warm, warm_scaler, t_warm = pipeline(warm_cache, raw)
+        all_hits = all(s['misses'] == 0 for s in warm_cache.stats.values())
+        same_frames = cold.equals(warm)
+        scaler_restored = same_state(cold_scaler, warm_scaler)
+
+        # a cached result extended in place, then fed to another stage
+        data = warm_cache.run(preprocessing.process_data, raw, window=10)
+        before = warm_cache.run(n_columns, data)
+        apply_and_name(data, data.columns[2], rolling_rms, 'extra', cache=warm_cache, window=5)
+        after = warm_cache.run(n_columns, data)
+        in_place_ok = before == data.shape[1] - 1 and after == data.shape[1]
+
+        print(warm_cache.report())
+        print()
+        print(f"cold run                 : {t_cold:8.2f} s")
+        print(f"warm run                 : {t_warm:8.2f} s  ({t_cold / t_warm:.0f}x)")
+        print(f"warm run all hits        : {all_hits}")
+        print(f"same frames              : {same_frames}")
+        print(f"scaler state restored    : {scaler_restored}")
+        print(f"in-place column seen     : {in_place_ok}  ({before} -> {after} columns, frame has {data.shape[1]})")
+
+    ok = all_hits and same_frames and scaler_restored and in_place_ok
+    print("cache OK" if ok else "cache FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Startup cost: what importing the entry points pulls in and how long it takes.
+
+Every module is imported in a fresh interpreter with `-X importtime`; the
+report lists the total, the slowest top-level imports and which of the heavy
+dependencies (torch, statsmodels, seaborn, ...) got loaded on the way. Exits
+non-zero if a module in --light imports one of them.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --modules ui.dashboard --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("torch", "statsmodels", "seaborn", "sklearn", "matplotlib", "pandas", "joblib", "pyarrow")
+
+
+def import_profile(module: str) -> tuple[float, list]:
+    """wall seconds of `python -X importtime -c 'import module'` and its (self us, cumulative us, depth, name) rows"""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=REPO, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # 0 for the imported module itself
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return wall, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+",
+                        default=["main", "ui.dashboard", "models.scoring_server", "models.data", "models.anomaly.pipeline.runner"])
+    parser.add_argument("--light", nargs="*", default=["main", "ui.dashboard"],
+                        help="modules that must not import any of the heavy dependencies")
+    parser.add_argument("--repeats", type=int, default=3, help="fresh interpreters per module (median is reported)")
+    parser.add_argument("--top", type=int, default=8, help="slowest top-level imports to list")
+    args = parser.parse_args()
+
+    baseline = np.median([import_profile("sys")[0] for _ in range(args.repeats)])
+    print(f"bare interpreter: {baseline * 1000:.0f} ms\n")
+    failed = []
+    for module in args.modules:
+        runs = [import_profile(module) for _ in range(args.repeats)]
+        wall = np.median([w for w, _ in runs])
+        rows = runs[-1][1]
+        total = next((cum for _, cum, depth, name in rows if name == module and depth == 0), 0)
+        # its direct imports, and the parent packages imported before it (depth 0)
+        top = sorted((r for r in rows if r[2] <= 1 and r[3] != module), key=lambda r: -r[1])[:args.top]
+        loaded = sorted({name.split(".")[0] for _, _, _, name in rows} & set(HEAVY))
+
+        print(f"{module}: import {total / 1000:.0f} ms, process {wall * 1000:.0f} ms")
+        for self_us, cumulative_us, depth, name in top:
+            print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+        print(f"    heavy: {', '.join(loaded) or '-'}\n")
+        if module in args.light and loaded:
+            failed.append(module)
+
+    if failed:
+        print(f"heavy imports in {', '.join(failed)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
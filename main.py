@@ -1,8 +1,31 @@
-from ui.dashboard import PredictiveMaintenanceDashboard
+import argparse
+import logging
 
 def main():
-    app = PredictiveMaintenanceDashboard()
+    parser = argparse.ArgumentParser(description="Predictive maintenance dashboard")
+    parser.add_argument("--fleet", action="store_true", help="monitor all units at once with one batched prediction per tick")
+    parser.add_argument("--latency", action="store_true", help="show per-tick and predict latency percentiles on the dashboard")
+    parser.add_argument("--blocking-load", action="store_true", help="load data and model before the window opens (old behaviour)")
+    parser.add_argument("--serve", action="store_true", help="run the headless scoring server instead of the dashboard")
+    parser.add_argument("--model-url", default=None, help="dashboard: score through a running server, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--model-socket", default=None, help="dashboard: score through a server on this Unix socket")
+    from models.scoring_server import add_server_args, serve
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    if args.serve:
+        logging.basicConfig(level=logging.INFO)
+        serve(args.model, host=args.host, port=args.port, unix_socket=args.socket, mmap=args.mmap, max_wait_ms=args.max_wait_ms)
+        return
+
+    from ui.dashboard import PredictiveMaintenanceDashboard
+    model = None
+    if args.model_url or args.model_socket:
+        from models.scoring_server import ScoringClient
+        model = ScoringClient(args.model_url, unix_socket=args.model_socket)
+    app = PredictiveMaintenanceDashboard(fleet=args.fleet, model=model, show_latency=args.latency,
+                                         background_load=not args.blocking_load)
     app.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,7 +1,9 @@
 import pandas as pd
+import numpy as np
 import logging
 import yaml
 import os
+from typing import Iterator
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -12,7 +14,10 @@ def load_config(config_path: str = "configs/default_config.yaml") -> dict:
     return config
 
 def get_column_names(config: dict) -> list | None:
-    """load columns names from a YAML files"""
+    """load columns names from the config (inline `column_names`) or a YAML files"""
+    inline = config['data'].get('column_names')
+    if inline:
+        return list(inline)
     col_file = config['data'].get('column_names_path')
     if col_file and os.path.exists(col_file):
         with open(col_file) as f:
@@ -31,35 +36,113 @@ def save_column_names(columns: list, path: str):
         yaml.dump({'columns_names': columns}, f)
     logging.info(f"Saved inferred column names to: {path}")
 
-def load_data(config: dict) -> pd.DataFrame:
-    """Main data loader function based on YAML config"""
+def get_drop_cols(config: dict) -> list:
+    """positional columns to skip at parse time; a string names a list in models/config.py"""
+    drop_cols = config['data'].get('drop_cols') or []
+    if isinstance(drop_cols, str):
+        from models import config as project_config
+        drop_cols = getattr(project_config, drop_cols)
+    return list(drop_cols)
+
+def get_dtypes(names: list, config: dict) -> dict | None:
+    """map every kept column to its dtype from `dtypes` (`default` covers the rest)"""
+    dtypes = dict(config['data'].get('dtypes') or {})
+    if not dtypes:
+        return None
+    default = dtypes.pop('default', None)
+    return {name: dtypes.get(name, default) for name in names if dtypes.get(name, default)}
+
+def _read_kwargs(config: dict) -> dict:
+    """read_csv arguments shared by load_data and load_data_chunks"""
     data_config = config['data']
     path = data_config['input_path']
     has_header = data_config.get('has_header', True)
-    col_path = data_config.get('column_names_path')
-    save_cols = data_config.get('save_inferred_columns', False)
-
-    col_names = get_column_names(config) if not has_header else None
+    sep = data_config.get('sep', ',')
 
     if not os.path.exists(path):
         logging.error(f"File not found: {path}")
         raise FileNotFoundError(path)
 
-    df = pd.read_csv(path, header=None if not has_header else 'infer')
+    kwargs = {'sep': sep, 'header': 'infer' if has_header else None}
+    drop_cols = get_drop_cols(config)
 
-    # handle header-less case
-    if not has_header:
-        if col_names:
-            if len(col_names) != df.shape[1]:
-                raise ValueError(f"Expected {len(col_names)} columns, got {df.shape[1]}")
-            df.columns = col_names
+    if has_header:
+        names = list(pd.read_csv(path, sep=sep, nrows=0).columns)
+        kept = [name for i, name in enumerate(names) if i not in drop_cols]
+    else:
+        width = pd.read_csv(path, sep=sep, header=None, nrows=1).shape[1]
+        keep_idx = [i for i in range(width) if i not in drop_cols]
+        col_names = get_column_names(config)
+        if col_names and len(col_names) == width:
+            names = col_names
+        elif col_names and len(col_names) == len(keep_idx):
+            # names given for the kept columns only
+            names = [f"col_{i}" for i in range(width)]
+            for i, name in zip(keep_idx, col_names):
+                names[i] = name
+        elif col_names:
+            raise ValueError(f"Expected {width} (or {len(keep_idx)} kept) columns, got {len(col_names)} names")
         else:
             # inferr col names
-            inferred_cols = [f"col_{i}" for i in range(df.shape[1])]
-            df.columns = inferred_cols
-            if save_cols and col_path:
-                save_column_names(inferred_cols, col_path) 
-    
+            names = [f"col_{i}" for i in range(width)]
+            col_path = data_config.get('column_names_path')
+            if data_config.get('save_inferred_columns', False) and col_path:
+                save_column_names([names[i] for i in keep_idx], col_path)
+        kept = [names[i] for i in keep_idx]
+        kwargs['names'] = names
+
+    if drop_cols:
+        kwargs['usecols'] = kept
+    kwargs['dtype'] = get_dtypes(kept, config)
+    return kwargs
+
+def load_data(config: dict) -> pd.DataFrame:
+    """Main data loader function based on YAML config"""
+    path = config['data']['input_path']
+    df = pd.read_csv(path, **_read_kwargs(config))
+
     logging.info(f"Data loaded successfully. Shape: {df.shape}")
     
     return df
+
+def _split_units(chunks: Iterator[pd.DataFrame], unit_col: str) -> Iterator[pd.DataFrame]:
+    """regroup row chunks so that every yielded frame holds exactly one (contiguous) unit"""
+    pending = None
+    for chunk in chunks:
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+        units = chunk[unit_col].to_numpy()
+        bounds = np.concatenate([[0], np.flatnonzero(units[1:] != units[:-1]) + 1, [len(chunk)]])
+        # the last unit may continue in the next chunk
+        for start, stop in zip(bounds[:-2], bounds[1:-1]):
+            yield chunk.iloc[start:stop].reset_index(drop=True)
+        pending = chunk.iloc[bounds[-2]:]
+    if pending is not None and len(pending):
+        yield pending.reset_index(drop=True)
+
+def load_data_chunks(config: dict, chunk_size: int | None = None, stream_by: str | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Streaming version of load_data: yields the file piece by piece.
+
+    stream_by='rows' yields fixed-size chunks of `chunk_size` rows, stream_by='unit'
+    yields one whole unit (`unit_col`) at a time. Column dtypes and the dropped
+    columns come from the config and are applied while parsing, so only the
+    current chunk is ever held in memory.
+    """
+    data_config = config['data']
+    chunk_size = chunk_size or data_config.get('chunk_size', 100_000)
+    stream_by = stream_by or data_config.get('stream_by', 'rows')
+    if stream_by not in ('rows', 'unit'):
+        raise ValueError(f"stream_by must be 'rows' or 'unit', got {stream_by!r}")
+
+    path = data_config['input_path']
+    chunks = pd.read_csv(path, chunksize=chunk_size, **_read_kwargs(config))
+
+    if stream_by == 'unit':
+        chunks = _split_units(chunks, data_config.get('unit_col', 'number'))
+
+    n_rows = 0
+    for chunk in chunks:
+        n_rows += len(chunk)
+        yield chunk
+    logging.info(f"Streamed {n_rows} rows from {path}")
@@ -0,0 +1,149 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+
+from models.anomaly.train import DEFAULT_CACHE, DEFAULT_DATA, DEFAULT_OUTPUT, FreqFrameDataset, load_checkpoint, \
+    precompute_frames, split_units
+from models.feature_store import is_feature_store, load_feature_frame
+
+# CPU deployment of a trained FSENetLSTM checkpoint.
+#
+# export() applies dynamic int8 quantization to the nn.LSTM and nn.Linear layers
+# (weights stored as int8, activations quantized on the fly, the conv stays fp32),
+# traces the model to TorchScript and freezes it. load_inference_model() loads the
+# result without the Python model code and predict() scores under inference_mode.
+#
+#   python -m models.anomaly.export --output models/anomaly/fsenet_lstm_int8.ts --report
+#   python -m models.anomaly.export --no-quantize --output models/anomaly/fsenet_lstm_fp32.ts
+
+DEFAULT_EXPORT = os.path.join(os.path.dirname(DEFAULT_OUTPUT), "fsenet_lstm_int8.ts")
+
+
+def quantize(model: nn.Module) -> nn.Module:
+    """dynamic int8 quantization of the LSTM and Linear layers"""
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+
+def to_torchscript(model: nn.Module, example: torch.Tensor) -> torch.jit.ScriptModule:
+    model.eval()
+    with torch.inference_mode():
+        return torch.jit.freeze(torch.jit.trace(model, example))
+
+
+def example_input(model: nn.Module, batch: int = 1) -> torch.Tensor:
+    return torch.zeros(batch, model.channels, model.H, model.bins)
+
+
+def export(checkpoint: str = DEFAULT_OUTPUT, output: str = DEFAULT_EXPORT, quantized: bool = True) -> str:
+    """Write the (quantized) traced model of a train.py checkpoint to `output`."""
+    model = load_checkpoint(checkpoint)
+    example = example_input(model)
+    if quantized:
+        model = quantize(model)
+    to_torchscript(model, example).save(output)
+    return output
+
+
+def load_inference_model(path: str) -> torch.jit.ScriptModule:
+    model = torch.jit.load(path, map_location='cpu')
+    return model.eval()
+
+
+def predict(model, frames) -> np.ndarray:
+    """RUL of a batch of [C, H, F+1] frames"""
+    frames = torch.as_tensor(np.asarray(frames, dtype=np.float32))
+    with torch.inference_mode():
+        return model(frames).numpy()
+
+
+def _latency_ms(model, x: torch.Tensor, repeats: int) -> float:
+    with torch.inference_mode():
+        model(x)  # warm-up (and the first-call optimisation of TorchScript)
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            model(x)
+            times.append(time.perf_counter() - t0)
+    return float(np.median(times)) * 1000
+
+
+def _size_mb(model) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.pt")
+        if isinstance(model, torch.jit.ScriptModule):
+            model.save(path)
+        else:
+            torch.save(model.state_dict(), path)
+        return os.path.getsize(path) / 2**20
+
+
+def accuracy_latency_report(checkpoint: str = DEFAULT_OUTPUT, data_path: str = DEFAULT_DATA,
+                            cache_dir: str = DEFAULT_CACHE, batch_size: int = 256, repeats: int = 20,
+                            seed: int = 0, val_fraction: float = 0.2) -> dict:
+    """
+    RMSE on the held-out units of train.py (same split) and median latency at batch 1
+    and `batch_size` for eager fp32, TorchScript fp32 and TorchScript int8.
+    """
+    info = torch.load(checkpoint, map_location='cpu')
+    model = load_checkpoint(checkpoint)
+    data = load_feature_frame(data_path) if is_feature_store(data_path) else pd.read_csv(data_path)
+    frames_path = precompute_frames(data[info['feature_cols']].to_numpy(), data['number'].to_numpy(),
+                                    data['RUL'].to_numpy(), info['N'], info['T'], cache_dir=cache_dir)
+    dataset = FreqFrameDataset(frames_path)
+    _, val_idx = split_units(dataset.units, val_fraction, seed=seed)
+    frames = torch.from_numpy(np.array(dataset.frames[np.sort(val_idx)]))
+    targets = dataset.targets[np.sort(val_idx)]
+
+    example = example_input(model)
+    variants = {
+        'eager fp32': model,
+        'torchscript fp32': to_torchscript(model, example),
+        'torchscript int8': to_torchscript(quantize(load_checkpoint(checkpoint)), example),
+    }
+    reference = predict(model, frames)
+    report = {}
+    for name, variant in variants.items():
+        out = np.concatenate([predict(variant, frames[i:i + batch_size]) for i in range(0, len(frames), batch_size)])
+        report[name] = {
+            'rmse': float(np.sqrt(np.mean((out - targets) ** 2))),
+            'max_abs_diff_vs_fp32': float(np.max(np.abs(out - reference))),
+            'latency_ms_batch1': _latency_ms(variant, frames[:1], repeats),
+            f'latency_ms_batch{batch_size}': _latency_ms(variant, frames[:batch_size], repeats),
+            'size_mb': _size_mb(variant),
+        }
+    report['windows'] = int(len(frames))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a trained FSENetLSTM for CPU inference")
+    parser.add_argument("--checkpoint", default=DEFAULT_OUTPUT)
+    parser.add_argument("--output", default=DEFAULT_EXPORT)
+    parser.add_argument("--no-quantize", action="store_true", help="export the fp32 model")
+    parser.add_argument("--report", action="store_true", help="compare fp32 and int8 on the held-out units")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="feature store the checkpoint was trained on")
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    print(f"exported {export(args.checkpoint, args.output, quantized=not args.no_quantize)}")
+    if args.report:
+        report = accuracy_latency_report(args.checkpoint, args.data)
+        windows = report.pop('windows')
+        print(f"held-out windows: {windows}")
+        for name, r in report.items():
+            latency = "  ".join(f"{k.replace('latency_ms_', '')} {v:7.2f} ms" for k, v in r.items() if k.startswith('latency'))
+            print(f"{name:<17} rmse {r['rmse']:7.2f}  max diff {r['max_abs_diff_vs_fp32']:6.3f}  {latency}  {r['size_mb']:5.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from torch import Tensor
 from typing import List
-from anomaly.pipeline import feature_freq_domain
+from models.anomaly.pipeline import feature_freq_domain
 
 """
     FSENet: Feature Squeeze-and-Excitation Network for Frequency Matrix Attention
@@ -13,7 +14,8 @@ from anomaly.pipeline import feature_freq_domain
     both local convolution over the frequency domain and global channel-wise excitation.
 
     Input Shape:
-        - Tensor of shape (C, H, F+1)
+        - Tensor of shape (B, C, H, F+1), or (C, H, F+1) for a single window
+            B  : Batch of windows (e.g., one per engine in the fleet)
             C  : Number of input channels (e.g., features, sensors)
             H  : Number of sub-time-windows (rows of the frequency matrix)
             F+1: Number of frequency bins (e.g., from FFT of windowed signals)
@@ -55,8 +57,9 @@ from anomaly.pipeline import feature_freq_domain
                 V_c(h, w) = tanh(z_c × U_c(h, w))
 
     Output:
-        - Tensor of shape (H, W, C') — attention-enhanced frequency representation,
-          ready to be passed into downstream modules (e.g., LSTM, MLP).
+        - Tensor of shape (B, C, C', H, W) — attention-enhanced frequency representation,
+          ready to be passed into downstream modules (e.g., LSTM, MLP) — plus H and W.
+          All B×C channels run through the convolution as one batch.
 
     Advantages:
         - Captures both local frequency structure and global channel dependencies.
@@ -64,10 +67,10 @@ from anomaly.pipeline import feature_freq_domain
         - Adaptable for multivariate time series or single-channel frequency maps.
 
     Example:
-        >>> fsenet = FSENet(in_channels=1, conv_out_channels=32, reduction=16)
-        >>> x = torch.randn(1, 64, 33)  # [C=1, H=64, F+1=33]
-        >>> out = fsenet(x)
-        >>> print(out.shape)  # [64, W, 32]
+        >>> fsenet = FSENet(out_channels=32, kernel_size=3)
+        >>> x = torch.randn(8, 1, 64, 33)  # [B=8, C=1, H=64, F+1=33]
+        >>> out, H, W = fsenet(x)
+        >>> print(out.shape)  # [8, 1, 32, 64, 31]
 
     References:
         - F-SENet-LSTM: "A Hybrid Deep Learning Model Based on Squeeze-and-Excitation Networks and LSTM for Time Series Classification"
@@ -82,42 +85,34 @@ class FSENet(nn.Module):
     # Can normalize the frequecy matric before feed to convolution layer [Tip/ToBeNoted]
     
     def forward(self, x: Tensor):
-        # x: shape [C, H, F+1]
-        C = x.shape[0]
-        H = x.shape[1]
-        F = x.shape[2] - 1
-        
-        result = []
+        # x: shape [B, C, H, F+1] (or [C, H, F+1])
+        unbatched = x.dim() == 3
+        if unbatched:
+            x = x.unsqueeze(0)
+        B, C, H, F1 = x.shape
 
-        for i in range(C):
-            # extracting one channels frequency matrix [H, F+1]
-            freq_matrix = x[i]
-            
-            # Reshape for Conv1d [H, 1, F+1]
-            freq_matrix = freq_matrix.view(H, 1, F+1)
+        # fold every row of every channel of every window into the conv batch: [B*C*H, 1, F+1]
+        freq_matrix = x.reshape(B * C * H, 1, F1)
 
-            # Conv1d operated on dim=2,  across frequency
-            freq_conv = self.conv(freq_matrix) # shape -> [H, C', W]
-            
-            # Permute th [C', H, W]
-            freq_conv = freq_conv.permute(1, 0, 2)
-            
-            # Global average pooling over spatial dims (H, W) per out channel
-            weights = freq_conv.mean(dim=(1, 2)) # shape: [C']
-            
-            # Reshape for broadcastig: [C', 1, 1]
-            weights = weights.view(-1, 1, 1)
-            
-            # element wise (Hadamard) multiplication
-            reweighted = freq_conv * weights
-            
-            # Apply non-linearity
-            V_hw = torch.tanh(reweighted) # shape: [C', H, W]
+        # Conv1d operated on dim=2,  across frequency
+        freq_conv = self.conv(freq_matrix) # shape -> [B*C*H, C', W]
+        W = freq_conv.shape[-1]
 
-            results.append(V_hw)
-        
-        # stack over original channels -> shape: [C, C', H, W]
-        return torch.stack(results, dim=0), V_hw.shape[1], V_hw.shape[3]
+        # unfold and permute to [B, C, C', H, W]
+        freq_conv = freq_conv.view(B, C, H, self.out_channels, W).permute(0, 1, 3, 2, 4)
+
+        # Global average pooling over spatial dims (H, W) per out channel -> [B, C, C', 1, 1]
+        weights = freq_conv.mean(dim=(3, 4), keepdim=True)
+
+        # element wise (Hadamard) multiplication
+        reweighted = freq_conv * weights
+
+        # Apply non-linearity
+        V_hw = torch.tanh(reweighted) # shape: [B, C, C', H, W]
+
+        if unbatched:
+            V_hw = V_hw.squeeze(0) # shape: [C, C', H, W]
+        return V_hw, H, W
 
 # Good Ol simple LSTM model 
 """
@@ -136,32 +131,22 @@ class LSTM(nn.Module):
         self.lstm = nn.LSTM(input_size=input_size, hidden_size=hidden_size, batch_first=False) 
         
 
-    def forward(self, x):
-        # input x: [C, C', H, W]
-        C = x.shape[0]
-        C_conv_channels = x.shape[1]
-        H = x.shape[2]
-        W = x.shape[3]
-        
-        results = []
+    def forward(self, x: Tensor):
+        # input x: [B, C, C', H, W] (or [C, C', H, W])
+        unbatched = x.dim() == 4
+        if unbatched:
+            x = x.unsqueeze(0)
+        B, C, C_conv_channels, H, W = x.shape
 
-        for i in range(C):
-            # extract the single segment required
-            x_segment= x[i] # shape: [C', H, W]
-            
-            x_segment = x_segment.permute(1, 0, 2) # shape: [H, C', W]
-            
-            # input for LSTM
-            x_segment = x_segment.reshape(H, -1).unsqueeze(1) # shape: [H, 1, C'*W]
-            
-            # LSTM expects [seq_len, batch_size, input_size]
-            output, (hn, cn) = self.lstm(x_segment)
+        # every (window, channel) pair is one sequence over H: [H, B*C, C'*W]
+        x_seq = x.permute(3, 0, 1, 2, 4).reshape(H, B * C, C_conv_channels * W)
 
-            # collect final hidden state for last layer
-            results.append(hn[-1]) # shape: [hidden_size]
+        # LSTM expects [seq_len, batch_size, input_size]
+        output, (hn, cn) = self.lstm(x_seq)
 
-        # stack all outputs: shape: [C, hidden_size]
-        return torch.stack(results, dim=0)
+        # final hidden state of the last layer, per window and channel: [B, C, hidden_size]
+        result = hn[-1].view(B, C, -1)
+        return result.squeeze(0) if unbatched else result
 
 class DNN(nn.Module):
     def __init__(self, input_size: int, hidden_sizes: list[int], output_size: int):
@@ -181,5 +166,32 @@ class DNN(nn.Module):
         self.model = nn.Sequential(*layers)
 
     def forward(self, x):
-        return self.model(x) # x shape: [C, input_size]
+        return self.model(x) # x shape: [B, C, input_size] or [C, input_size]
 
+
+class FSENetLSTM(nn.Module):
+    """
+    F-SENet -> LSTM -> DNN regressor on frequency matrix windows.
+
+    Input is [B, C, H, F+1] (one freq_matrix window per sample, see
+    feature_freq_domain.freq_matrix), output is one value per window: [B].
+
+    Example:
+        >>> model = FSENetLSTM(channels=14, H=23, bins=5)
+        >>> rul = model(torch.randn(8, 14, 23, 5))   # [8]
+    """
+    def __init__(self, channels: int, H: int, bins: int, conv_channels: int = 16, kernel_size: int = 3,
+                 hidden_size: int = 64, dnn_hidden: tuple = (128, 64), output_scale: float = 1.0):
+        super().__init__()
+        # the DNN regresses RUL / output_scale (~[0, 1]), forward returns RUL in cycles
+        self.register_buffer('output_scale', torch.tensor(float(output_scale)))
+        W = bins - kernel_size + 1
+        self.channels, self.H, self.bins = channels, H, bins  # input frame shape
+        self.fsenet = FSENet(out_channels=conv_channels, kernel_size=kernel_size)
+        self.lstm = LSTM(input_size=conv_channels * W, hidden_size=hidden_size)
+        self.dnn = DNN(input_size=channels * hidden_size, hidden_sizes=list(dnn_hidden), output_size=1)
+
+    def forward(self, x: Tensor) -> Tensor:
+        V, H, W = self.fsenet(x)         # [B, C, C', H, W]
+        h = self.lstm(V)                 # [B, C, hidden]
+        return self.dnn(h.flatten(1)).squeeze(-1) * self.output_scale
@@ -1,7 +1,16 @@
 import pandas as pd
 
+def feature_name(col: str, suffix: str) -> str:
+    return f"{col}_{suffix}"
+
 # unified interface
-def apply_and_name(df: pd.DataFrame, col: str, func, suffix: str, **kwargs):
-    new_col = f"{col}_{suffix}"
-    df[new_col] = func(df[col], **kwargs)
+def apply_and_name(df: pd.DataFrame, col: str, func, suffix: str, cache=None, **kwargs):
+    """adds func(df[col], **kwargs) as `{col}_{suffix}`; with a StageCache the new column is reused when col and kwargs are unchanged"""
+    new_col = feature_name(col, suffix)
+    if cache is not None:
+        df[new_col] = cache.run(func, df[col], **kwargs)
+        # df may itself be a cached result: its remembered key no longer matches its columns
+        cache.forget(df)
+    else:
+        df[new_col] = func(df[col], **kwargs)
     return df
\ No newline at end of file
@@ -1,3 +1,4 @@
+import json
 import pandas as pd
 import numpy as np
 import os
@@ -13,13 +14,223 @@ processing_steps = [
 for func, suffix, params in processing_steps:
     for col in target_cols:
         df = apply_and_name(df, col, func, suffix, **params)
+
+runner.run_configured_pipeline reads such steps from the `features` section of
+the YAML config and runs them as a parallel DAG.
 """
 
+# ---- column profile
+class ColumnProfile:
+    """
+    count / null fraction / mean / variance / min / max of every column, built in one
+    pass over chunks.
+
+    Per-chunk statistics are merged with Chan's parallel update of (n, mean, M2), so
+    a file streamed through load_data_chunks is profiled without ever being held in
+    memory, and profiles of separate files or workers can be merged. Non-numeric
+    columns only get counts and nulls.
+
+    Example:
+        >>> profile = ColumnProfile.from_chunks(load_data_chunks(config))
+        >>> profile.save("profile_FD002.json")
+        >>> drop = select_drop_cols(profile)
+    """
+
+    def __init__(self, columns: list | None = None):
+        self.columns = list(columns) if columns is not None else None
+        if self.columns is not None:
+            self._init_state(len(self.columns))
+
+    def _init_state(self, n_cols: int):
+        self.rows = 0
+        self.nulls = np.zeros(n_cols, dtype=np.int64)
+        self.count = np.zeros(n_cols, dtype=np.int64)   # non-null numeric values
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.min = np.full(n_cols, np.inf)
+        self.max = np.full(n_cols, -np.inf)
+        self.numeric = np.ones(n_cols, dtype=bool)
+
+    def update(self, chunk: pd.DataFrame) -> "ColumnProfile":
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self._init_state(len(self.columns))
+        elif len(chunk.columns) != len(self.columns):
+            raise ValueError(f"chunk has {len(chunk.columns)} columns, profile has {len(self.columns)}")
+
+        numeric = np.array([pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+                            for dtype in chunk.dtypes])
+        self.numeric &= numeric
+        self.rows += len(chunk)
+        self.nulls += chunk.isna().to_numpy().sum(axis=0)
+
+        idx = np.flatnonzero(numeric)
+        if len(idx) == 0 or len(chunk) == 0:
+            return self
+        values = chunk.iloc[:, idx].to_numpy(dtype=np.float64)
+        n_b = np.sum(~np.isnan(values), axis=0)
+        has = n_b > 0
+        with np.errstate(invalid="ignore"):
+            mean_b = np.where(has, np.nanmean(np.where(has, values, 0.0), axis=0), 0.0)
+            m2_b = np.where(has, np.nansum((values - mean_b) ** 2, axis=0), 0.0)
+            min_b = np.where(has, np.nanmin(np.where(has, values, np.inf), axis=0), np.inf)
+            max_b = np.where(has, np.nanmax(np.where(has, values, -np.inf), axis=0), -np.inf)
+        self._merge(idx, n_b, mean_b, m2_b, min_b, max_b)
+        return self
+
+    def _merge(self, idx, n_b, mean_b, m2_b, min_b, max_b):
+        # Chan et al.: combine (n, mean, M2) of two disjoint samples
+        n_a = self.count[idx]
+        n = n_a + n_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean_b - self.mean[idx]
+            self.mean[idx] = np.where(n > 0, self.mean[idx] + delta * n_b / np.maximum(n, 1), 0.0)
+            self.m2[idx] = self.m2[idx] + m2_b + delta ** 2 * n_a * n_b / np.maximum(n, 1)
+        self.count[idx] = n
+        self.min[idx] = np.minimum(self.min[idx], min_b)
+        self.max[idx] = np.maximum(self.max[idx], max_b)
+
+    def merge(self, other: "ColumnProfile") -> "ColumnProfile":
+        """fold the profile of another part of the same data into this one"""
+        if self.columns is None:
+            self.columns = list(other.columns)
+            self._init_state(len(self.columns))
+        if list(other.columns) != list(self.columns):
+            raise ValueError("profiles have different columns")
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.numeric &= other.numeric
+        self._merge(np.arange(len(self.columns)), other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks) -> "ColumnProfile":
+        profile = cls()
+        for chunk in chunks:
+            profile.update(chunk)
+        return profile
+
+    def to_frame(self) -> pd.DataFrame:
+        """one row per column: position, numeric, count, null_fraction, mean, var, std, min, max"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)  # ddof=1 like DataFrame.std
+        frame = pd.DataFrame({
+            'position': np.arange(len(self.columns)),
+            'numeric': self.numeric,
+            'count': self.count,
+            'null_fraction': self.nulls / max(self.rows, 1),
+            'mean': np.where(self.count > 0, self.mean, np.nan),
+            'var': var,
+            'std': np.sqrt(var),
+            'min': np.where(self.count > 0, self.min, np.nan),
+            'max': np.where(self.count > 0, self.max, np.nan),
+        }, index=pd.Index(self.columns, name='column'))
+        numeric_stats = ['mean', 'var', 'std', 'min', 'max']
+        frame.loc[~frame['numeric'], numeric_stats] = np.nan
+        return frame
+
+    def save(self, path: str):
+        state = {'columns': self.columns, 'rows': int(self.rows)}
+        for name in ('nulls', 'count', 'mean', 'm2', 'min', 'max', 'numeric'):
+            state[name] = getattr(self, name).tolist()
+        with open(path, 'w') as f:
+            json.dump(state, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "ColumnProfile":
+        with open(path) as f:
+            state = json.load(f)
+        profile = cls(state['columns'])
+        profile.rows = state['rows']
+        for name, dtype in (('nulls', np.int64), ('count', np.int64), ('mean', np.float64), ('m2', np.float64),
+                            ('min', np.float64), ('max', np.float64), ('numeric', bool)):
+            setattr(profile, name, np.asarray(state[name], dtype=dtype))
+        return profile
+
+
+def profile_frame(df: pd.DataFrame, chunk_size: int = 100_000) -> ColumnProfile:
+    """ColumnProfile of an in-memory frame, chunk by chunk"""
+    return ColumnProfile.from_chunks(df.iloc[start:start + chunk_size] for start in range(0, max(len(df), 1), chunk_size))
+
+
+# ---- decisions from a profile
+def select_drop_cols(profile: ColumnProfile, rel_std_threshold: float = 1e-4, std_threshold: float | None = None,
+                     max_null_fraction: float = 0.5, keep=()) -> list:
+    """
+    Columns to drop: (near) constant numeric columns and mostly-empty columns.
+
+    A numeric column is near constant when std / |mean| < rel_std_threshold (or
+    std < std_threshold if given); the relative test does not depend on the unit
+    of each sensor. Non-numeric columns are only dropped for nulls. `keep` is never
+    dropped (e.g. ['number', 'time']).
+    """
+    stats = profile.to_frame()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rel_std = stats['std'] / stats['mean'].abs()
+    constant = stats['numeric'] & ((stats['std'].fillna(0.0) == 0) | (rel_std < rel_std_threshold))
+    if std_threshold is not None:
+        constant |= stats['numeric'] & (stats['std'] < std_threshold)
+    empty = stats['null_fraction'] > max_null_fraction
+    drop = stats.index[(constant | empty) & ~stats.index.isin(list(keep))]
+    return list(drop)
+
+
+def fill_values(profile: ColumnProfile, strategy: str = 'mean') -> dict:
+    """per-column fill values for DataFrame.fillna ('mean', 'min' or 'max' of the numeric columns)"""
+    if strategy not in ('mean', 'min', 'max'):
+        raise ValueError(f"Unknown fill strategy '{strategy}'")
+    stats = profile.to_frame()
+    values = stats.loc[stats['numeric'] & (stats['null_fraction'] > 0), strategy]
+    return values.dropna().to_dict()
+
+
 # cleaning data
-def drop_low_std_cols(df: pd.DataFrame, std_threshold=1e2) -> pd.DataFrame:
-    stds = df.std()
-    to_drop = stds[stds < std_threshold].index
-    return df.drop(columns=to_drop)
+def drop_low_std_cols(df: pd.DataFrame, std_threshold=1e2, profile: ColumnProfile | None = None) -> pd.DataFrame:
+    """drop numeric columns with std < std_threshold; non-numeric columns are kept"""
+    profile = profile or profile_frame(df)
+    stats = profile.to_frame()
+    to_drop = stats['position'][stats['numeric'] & (stats['std'] < std_threshold)]
+    return df.drop(columns=df.columns[to_drop.to_numpy()])
+
+def fill_missing(df: pd.DataFrame, method='ffill', profile: ColumnProfile | None = None) -> pd.DataFrame:
+    """method 'ffill'/'bfill', or 'mean'/'min'/'max' from the column profile"""
+    if method == 'ffill':
+        return df.ffill()
+    if method == 'bfill':
+        return df.bfill()
+    return df.fillna(fill_values(profile or profile_frame(df), strategy=method))
+
+
+def profile_dataset(config: dict, profile_path: str | None = None, **select_kwargs) -> tuple[ColumnProfile, list]:
+    """
+    Profile the file of a loader config in one streaming pass and pick its drop
+    columns. Returns the profile and the positions of the columns to drop, in the
+    form of the DROP_COLS lists in models/config.py.
+    """
+    from models.anomaly.data_loader import load_data_chunks
+    # every raw column, positional names for files without a header
+    config = {**config, 'data': {**config['data'], 'drop_cols': [], 'dtypes': {}, 'column_names': None,
+                                 'column_names_path': None, 'save_inferred_columns': False}}
+    profile = ColumnProfile.from_chunks(load_data_chunks(config, stream_by='rows'))
+    if profile_path:
+        profile.save(profile_path)
+    drop = select_drop_cols(profile, **select_kwargs)
+    return profile, [profile.columns.index(col) for col in drop]
+
+
+if __name__ == "__main__":
+    import argparse
+    from models.anomaly.data_loader import load_config
+
+    parser = argparse.ArgumentParser(description="Profile a raw data file and suggest the columns to drop")
+    parser.add_argument("path")
+    parser.add_argument("--config", default=os.path.join(os.path.dirname(os.path.dirname(__file__)), "configs", "cmapss_config.yaml"))
+    parser.add_argument("--profile", default=None, help="save the column profile (json) here")
+    parser.add_argument("--rel-std", type=float, default=1e-4)
+    args = parser.parse_args()
 
-def fill_missing(df: pd.DataFrame, method='ffill') -> pd.DataFrame:
-    return df.fillna(method=method)
\ No newline at end of file
+    config = load_config(args.config)
+    config['data']['input_path'] = args.path
+    profile, drop = profile_dataset(config, profile_path=args.profile, rel_std_threshold=args.rel_std, keep=['col_0', 'col_1'])
+    print(profile.to_frame().to_string(float_format=lambda v: f"{v:.6g}"))
+    print(f"drop_cols: {sorted(drop)}")
\ No newline at end of file
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from models.anomaly.pipeline.feature_rolling import unit_starts
 
 # ----technique 2 [auto correlation features]
 def autocorr_manual(series: pd.Series, lag: int) -> float:
@@ -23,17 +24,113 @@ def autocorr_manual(series: pd.Series, lag: int) -> float:
         The autocorrelation coefficient at the specified lag.
         Returns NaN if the lag is greater than or equal to the length of the series or if variance is zero.
     """
-    if lag > len(series):
+    if lag >= len(series):
         return np.nan
-    x = series.values
+    x = np.asarray(series, dtype=np.float64)
     mean = np.mean(x)
-    numerator = np.sum((x[:-lag] - mean)*(x[lag:] - mean))
+    numerator = np.sum((x[:len(x) - lag] - mean)*(x[lag:] - mean))
     denominator =  np.sum((x - mean)**2)
-    return numerator/denominator if denominator != 0 else np.nan
+    # a constant series leaves only the rounding of its mean in the deviations
+    flat = len(x) * (4 * np.finfo(np.float64).eps * np.max(np.abs(x))) ** 2
+    return numerator/denominator if denominator > flat else np.nan
 
 def autocorr_lib(series: pd.Series, lag: int) -> float:
     return series.autocorr(lag=lag)
 
+def rolling_autocorr_lags(values: np.ndarray, lags, window: int, groups: np.ndarray | None = None) -> np.ndarray:
+    """
+    Rolling `autocorr_manual` for several lags at once, without a Python call per window.
+
+    Every window statistic comes from running (cumulative) sums of x, x**2 and the
+    lagged products x[t] * x[t+k], so the cost is O(rows * cols * lags) whatever the window.
+
+    Parameters:
+    ----------
+    values : np.ndarray
+        [rows] or [rows, cols] time series, rows contiguous per unit.
+    lags : iterable of int
+        Lags to compute (0 gives 1.0 wherever the window has variance).
+    window : int
+        Number of trailing rows in each window.
+    groups : np.ndarray, optional
+        Unit id of every row. Windows never span two units.
+
+    Returns:
+    -------
+    np.ndarray
+        [rows, lags] (or [rows, cols, lags]) autocorrelations in [-1, 1]. Rows
+        without a full window, windows containing a NaN, lags >= window and
+        zero-variance windows are NaN. A window counts as zero-variance when its
+        sum of squared deviations is within the rounding of the running sums.
+    """
+    lags = [int(k) for k in np.atleast_1d(lags)]
+    x = np.asarray(values, dtype=np.float64)
+    squeeze = x.ndim == 1
+    if squeeze:
+        x = x[:, None]
+    n, cols = x.shape
+    out = np.full((n, cols, len(lags)), np.nan)
+    if n == 0:
+        return out[:, 0] if squeeze else out
+
+    # running sums restart with every unit, so their rounding only depends on the
+    # unit's own readings (a flat unit after a noisy one still resolves its variance)
+    starts = np.flatnonzero(np.diff(unit_starts(groups), prepend=-1)) if groups is not None else np.zeros(1, dtype=np.int64)
+    for start, stop in zip(starts, np.append(starts[1:], n)):
+        _unit_autocorr(x[start:stop], lags, window, out[start:stop])
+    return out[:, 0] if squeeze else out
+
+def _unit_autocorr(x: np.ndarray, lags: list, window: int, out: np.ndarray):
+    # rolling_autocorr_lags of one unit's [rows, cols] readings, written into out [rows, cols, lags]
+    n, cols = x.shape
+    if n < window:
+        return
+
+    # the window mean is subtracted anyway, so shifting by the mean changes nothing
+    # but keeps the running sums small; NaNs are zeroed and counted, so one only
+    # spoils the windows that contain it (as autocorr_manual per window)
+    missing = np.isnan(x)
+    with np.errstate(invalid="ignore"):
+        shift = np.nan_to_num(np.nanmean(x, axis=0))
+    x = np.where(missing, 0.0, x - shift)
+
+    def csum(a):
+        c = np.zeros((a.shape[0] + 1, cols))
+        np.cumsum(a, axis=0, out=c[1:])
+        return c
+
+    i = np.arange(window - 1, n)             # rows with a full window
+    s = i - window + 1                       # first row of each window
+
+    cs, cs2 = csum(x), csum(x * x)
+    total = cs[i + 1] - cs[s]
+    mean = total / window
+    denom = (cs2[i + 1] - cs2[s]) - total * mean
+    # below this the difference of the running sums is rounding, not variance
+    flat = 16 * np.finfo(np.float64).eps * cs2[i + 1]
+    cm = csum(missing.astype(np.float64))
+    has_nan = (cm[i + 1] - cm[s]) > 0        # [windows, cols]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for j, k in enumerate(lags):
+            if k < 0 or k >= window:
+                continue
+            cp = csum(x[:n - k] * x[k:]) if k else cs2
+            lagged = cp[i - k + 1] - cp[s]   # products x[t] * x[t+k] with t, t+k inside the window
+            head = cs[i - k + 1] - cs[s]
+            tail = cs[i + 1] - cs[s + k]
+            numer = lagged - mean * (head + tail) + (window - k) * mean * mean
+            acf = np.where(denom > flat, np.clip(numer / denom, -1.0, 1.0), np.nan)
+            acf[has_nan] = np.nan
+            out[window - 1:, :, j] = acf
+
 def rolling_autocorr(series: pd.Series, lag: int, window: int) -> pd.Series:
     """applies rolling autocorr accross a dataframe's column"""
-    return series.rolling(window=window).apply(lambda x: autocorr_manual(x, lag), raw=False)
\ No newline at end of file
+    return pd.Series(rolling_autocorr_lags(series.to_numpy(), [lag], window)[:, 0], index=series.index)
+
+def add_rolling_autocorr(df: pd.DataFrame, cols: list, lags, window: int, group_col: str | None = "number") -> pd.DataFrame:
+    """appends `{col}_autocorr_lag{k}` for every column and lag with a single concat"""
+    groups = df[group_col].to_numpy() if group_col is not None else None
+    block = rolling_autocorr_lags(df[cols].to_numpy(), lags, window, groups=groups)  # [rows, cols, lags]
+    names = [f"{col}_autocorr_lag{k}" for col in cols for k in np.atleast_1d(lags)]
+    return pd.concat([df, pd.DataFrame(block.reshape(len(df), -1), index=df.index, columns=names)], axis=1)
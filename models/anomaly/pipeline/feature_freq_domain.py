@@ -2,46 +2,48 @@ import numpy as np
 import torch
 from torch import Tensor
 
-def freq_matrix(x: Tensor, N: int, T: int) -> Tensor:
+def freq_matrix(x: Tensor, N: int, T: int, chunk_size: int | None = None, magnitude: bool = True) -> Tensor:
     """
     Parameters:
-    - x: Tensor of shape [L], the raw time series
+    - x: Tensor of shape [L] (one sensor) or [C, L] (C sensors), the raw time series
     - N: int, window size for first stack
     - T: int, window size for second stack (row-wise window)
+    - chunk_size: int, optional, number of first-stack windows transformed per FFT call.
+      None transforms all M windows at once; smaller values cap peak memory.
+    - magnitude: bool, return |FFT| (real, ready for FSENet's conv) instead of the complex spectrum
 
     Returns:
-    - Tensor of shape [M, H, F] where:
+    - Tensor of shape [M, H, F+1] (or [C, M, H, F+1] for [C, L] input) where:
       M = L - N + 1
       H = N - T + 1
-      F = T // 2 (for real FFT)
+      F = T // 2 (real FFT gives F+1 bins)
     """
 
     # [x1, x2, x3, x4, .. xL]
-    assert x.dim() == 1
-    L = len(x) 
+    assert x.dim() in (1, 2)
+    single = x.dim() == 1
+    if single:
+        x = x.unsqueeze(0)
+    if not x.is_floating_point():
+        x = x.float()
+
+    L = x.shape[-1]
     M = L - N + 1
     H = N - T + 1
     F = T//2
-
-    # first stack
-    time_series_dataset = x.unfold(dimension=0, size=N, step=1)
-    
-    freq_matrices = []
-
-    for i in range(M):
-        window = time_series_dataset[i]
-
-        ts_matrix = window.unfold(dimension=0, size=T, step=1)
-
-        ts_matrix = ts_matrix.to(torch.complex64)
-
-        fft_matrix = torch.fft.fft(ts_matrix, dim=1)
-
-        fft_matrix = fft_matrix[: , :F]
-
-        freq_matrices.append(freq_matrix)
-
-    return torch.stack(freq_matrices, dim=0)
-
-
-
+    assert M > 0 and H > 0, "series shorter than the window sizes"
+
+    # first stack [C, M, N], then second stack [C, M, H, T]: both are strided views, no copy
+    windows = x.unfold(dimension=-1, size=N, step=1).unfold(dimension=-1, size=T, step=1)
+
+    if chunk_size is None or chunk_size >= M:
+        spectrum = torch.fft.rfft(windows, dim=-1)
+        out = spectrum.abs() if magnitude else spectrum
+    else:
+        out_dtype = x.dtype if magnitude else (torch.complex128 if x.dtype == torch.float64 else torch.complex64)
+        out = torch.empty((x.shape[0], M, H, F + 1), dtype=out_dtype, device=x.device)
+        for start in range(0, M, chunk_size):
+            spectrum = torch.fft.rfft(windows[:, start:start + chunk_size], dim=-1)
+            out[:, start:start + chunk_size] = spectrum.abs() if magnitude else spectrum
+
+    return out[0] if single else out
@@ -0,0 +1,274 @@
+import numpy as np
+
+# Vectorized LOWESS smoothing and slope features.
+# Every column of a unit is fitted in one pass: the tricube neighbourhood of each
+# point is shared by all columns, so it is computed once and the local weighted
+# linear regressions are evaluated as batched dot products over a [cols, points, k] block.
+
+_MAX_BLOCK = 4_000_000  # elements per [cols, points, k] block, caps peak memory
+
+
+def _as_2d(values) -> tuple[np.ndarray, bool]:
+    y = np.asarray(values, dtype=np.float64)
+    if y.ndim == 1:
+        return y[:, None], True
+    return y, False
+
+
+def _neighbourhoods(x: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Left index and radius of the k nearest neighbours of every point of sorted `x`.
+
+    The k nearest points always form a contiguous run of the sorted array, so the
+    left edge is found with a vectorized binary search for all points at once.
+    """
+    n = len(x)
+    i = np.arange(n)
+    lo = np.clip(i - k + 1, 0, n - k)
+    hi = np.clip(i, 0, n - k)
+    while np.any(lo < hi):
+        mid = (lo + hi) // 2
+        right = np.where(mid + k < n, x[np.minimum(mid + k, n - 1)], np.inf)
+        # moving the window further right no longer brings points closer
+        ok = x - x[mid] <= right - x
+        hi = np.where(ok, mid, hi)
+        lo = np.where(ok, lo, mid + 1)
+    radius = np.maximum(x - x[lo], x[lo + k - 1] - x)
+    return lo, radius
+
+
+def _tricube(d: np.ndarray, radius: np.ndarray) -> np.ndarray:
+    u = np.divide(np.abs(d), radius[:, None], out=np.zeros_like(d), where=radius[:, None] > 0)
+    w = np.clip(1 - u ** 3, 0, None) ** 3
+    # same cut-offs as statsmodels' lowess
+    w[u >= 0.999] = 0.0
+    w[u <= 0.001] = 1.0
+    return w
+
+
+def _blocks(x, left, radius, rows, k, cols):
+    """Neighbourhood indices, tricube weights and regression design per block of fitted rows."""
+    step = max(1, _MAX_BLOCK // (k * cols))
+    offsets = np.arange(k)
+    for start in range(0, len(rows), step):
+        r = rows[start:start + step]
+        idx = left[r][:, None] + offsets          # [m, k]
+        d = x[idx] - x[r][:, None]                # distance to the fitted point
+        design = np.stack([np.ones_like(d), d, d * d], axis=-1)   # [m, k, 3]
+        yield slice(start, start + len(r)), left[r], _tricube(d, radius[r]), design
+
+
+def _local_fit(y_t, robust_w_t, blocks, n_rows, k) -> np.ndarray:
+    """Weighted local linear fit of every column ([cols, n] `y_t`) evaluated at each block's rows."""
+    out = np.empty((n_rows, y_t.shape[0]))
+    # neighbourhoods are contiguous, so gather whole k-windows instead of single elements
+    y_win = np.lib.stride_tricks.sliding_window_view(y_t, k, axis=1)
+    rw_win = None if robust_w_t is None else np.lib.stride_tricks.sliding_window_view(robust_w_t, k, axis=1)
+    for rows, lefts, tw, design in blocks:
+        w = tw if rw_win is None else tw * rw_win[:, lefts]   # [m, k] or [cols, m, k]
+        yw = w * y_win[:, lefts]                               # [cols, m, k]
+
+        # weighted moments as batched dot products over the k axis
+        s0, s1, s2 = np.moveaxis((w[..., None, :] @ design)[..., 0, :], -1, 0)
+        sy, sdy = np.moveaxis((yw[:, :, None, :] @ design[..., :2])[:, :, 0], -1, 0)
+
+        # intercept of the local line centred on the fitted point
+        den = s0 * s2 - s1 * s1
+        with np.errstate(invalid="ignore", divide="ignore"):
+            line = (s2 * sy - s1 * sdy) / den
+            level = sy / s0
+        flat = ~(np.abs(den) > 1e-12 * np.abs(s0 * s2))
+        out[rows] = np.where(flat, level, line).T
+    return out
+
+
+def _delta_anchors(x: np.ndarray, delta: float) -> np.ndarray:
+    # statsmodels' rule: after each fit, jump to the farthest point within `delta`
+    # (always at least one step forward); points tied with a fitted x share its fit
+    n = len(x)
+    anchors = [0]
+    while True:
+        tied = int(np.searchsorted(x, x[anchors[-1]], side="right")) - 1
+        if tied >= n - 1:
+            break
+        outside = min(int(np.searchsorted(x, x[anchors[-1]] + delta, side="right")), n - 1)
+        anchors.append(max(outside - 1, tied + 1))
+    return np.asarray(anchors)
+
+
+def _smooth(y: np.ndarray, x: np.ndarray, frac: float, it: int, delta: float) -> np.ndarray:
+    """`lowess_smooth` of a finite [n, cols] block."""
+    n = y.shape[0]
+    if n < 2:
+        return y.copy()
+
+    k = min(max(int(frac * n + 1e-10), 2), n)
+    left, radius = _neighbourhoods(x, k)
+    rows = _delta_anchors(x, delta) if delta > 0 else np.arange(n)
+    # column-major copy so the k axis is contiguous in every gathered block
+    y_t = np.ascontiguousarray(y.T)
+    robust_w_t = None  # all ones on the first pass
+
+    # neighbourhoods do not change between robustifying iterations;
+    # keep them when they fit in one block, otherwise rebuild them per pass
+    single = len(rows) * k * y.shape[1] <= _MAX_BLOCK
+    cached = list(_blocks(x, left, radius, rows, k, y.shape[1])) if single else None
+
+    for iteration in range(it + 1):
+        blocks = cached if single else _blocks(x, left, radius, rows, k, y.shape[1])
+        fitted = _local_fit(y_t, robust_w_t, blocks, len(rows), k)
+        if len(rows) < n:
+            fitted = np.column_stack([np.interp(x, x[rows], fitted[:, c]) for c in range(y.shape[1])])
+        if iteration == it:
+            break
+        # bisquare robustness weights from the residuals
+        resid = np.abs(y - fitted)
+        scale = 6.0 * np.median(resid, axis=0)
+        u = np.divide(resid, scale, out=np.zeros_like(resid), where=scale > 0)
+        robust_w_t = np.ascontiguousarray((np.clip(1 - u ** 2, 0, None) ** 2).T)
+    return fitted
+
+
+def lowess_smooth(values, x=None, frac: float = 0.5, it: int = 3, delta: float = 0.0) -> np.ndarray:
+    """
+    LOWESS smoothing of every column of `values` in one pass.
+
+    Rows with a NaN (or inf) in a column, or in `x`, are left out of that column's
+    fit and come back as NaN, like statsmodels' lowess with missing='drop'.
+
+    Parameters:
+    ----------
+    values : array-like
+        [n] or [n, cols] observations, rows ordered by `x`.
+    x : array-like, optional
+        Sorted positions of the rows (e.g. cycle number). Defaults to 0..n-1.
+    frac : float
+        Fraction of points used for each local regression, as in statsmodels.
+    it : int
+        Number of robustifying (bisquare) iterations, as in statsmodels.
+    delta : float
+        Only fit points at least `delta` apart in x and linearly interpolate the
+        rest. 0 fits every point.
+
+    Returns:
+    -------
+    np.ndarray
+        Smoothed values with the shape of `values`.
+    """
+    y, squeeze = _as_2d(values)
+    x = np.arange(y.shape[0], dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    valid = np.isfinite(y) & np.isfinite(x)[:, None]
+    if valid.all():
+        fitted = _smooth(y, x, frac, it, delta)
+    else:
+        fitted = np.full_like(y, np.nan)
+        # columns with the same missing rows (e.g. rolling warm-up) are still fitted together
+        patterns, column_pattern = np.unique(valid.T, axis=0, return_inverse=True)
+        for p, rows in enumerate(patterns):
+            cols = np.flatnonzero(column_pattern.ravel() == p)
+            if rows.any():
+                fitted[np.ix_(rows, cols)] = _smooth(y[np.ix_(rows, cols)], x[rows], frac, it, delta)
+    return fitted[:, 0] if squeeze else fitted
+
+
+def lowess_slope(values, x=None, frac: float = 0.5, it: int = 3, delta: float = 0.0) -> np.ndarray:
+    """Gradient (per row) of the LOWESS-smoothed `values`, one column per input column."""
+    return np.gradient(lowess_smooth(values, x=x, frac=frac, it=it, delta=delta), axis=0)
+
+
+def grouped_lowess_slope(values, groups, x=None, frac: float = 0.5, it: int = 3, delta: float = 0.0) -> np.ndarray:
+    """
+    `lowess_slope` applied unit by unit; `groups` holds the unit id of every row.
+
+    Rows must be contiguous per unit. Units shorter than 2 rows get a slope of 0.
+    """
+    y, squeeze = _as_2d(values)
+    groups = np.asarray(groups)
+    x = np.arange(len(y), dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    out = np.zeros_like(y)
+
+    bounds = np.concatenate([[0], np.flatnonzero(groups[1:] != groups[:-1]) + 1, [len(y)]])
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        if stop - start >= 2:
+            out[start:stop] = lowess_slope(y[start:stop], x=x[start:stop], frac=frac, it=it, delta=delta)
+    return out[:, 0] if squeeze else out
+
+
+# ---- causal (streaming) variant
+
+def causal_slope_weights(window: int) -> np.ndarray:
+    """
+    FIR coefficients of the tricube-weighted local linear slope at the newest point.
+
+    With evenly spaced cycles and a trailing window the regression design never
+    changes, so the slope reduces to a dot product of these weights with the last
+    `window` values (oldest first).
+    """
+    if window < 2:
+        raise ValueError("window must be at least 2")
+    d = np.arange(-(window - 1), 1, dtype=np.float64)      # distance to the newest cycle
+    w = np.clip(1 - (np.abs(d) / window) ** 3, 0, None) ** 3
+    xm = np.sum(w * d) / np.sum(w)
+    return w * (d - xm) / np.sum(w * (d - xm) ** 2)
+
+
+def causal_lowess_slope(values, window: int, groups=None) -> np.ndarray:
+    """
+    Batch version of `StreamingLowessSlope`: the causal slope at every row.
+
+    Rows before a unit has `window` cycles use the cycles seen so far
+    (NaN for a unit's first cycle), exactly like the streaming updates.
+    """
+    y, squeeze = _as_2d(values)
+    n = y.shape[0]
+    groups = np.zeros(n) if groups is None else np.asarray(groups)
+    out = np.full_like(y, np.nan)
+
+    bounds = np.concatenate([[0], np.flatnonzero(groups[1:] != groups[:-1]) + 1, [n]])
+    full = causal_slope_weights(window) if n >= window else None
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        unit = y[start:stop]
+        # warm-up rows: shorter windows
+        for t in range(1, min(window - 1, len(unit))):
+            out[start + t] = causal_slope_weights(t + 1) @ unit[:t + 1]
+        if len(unit) >= window:
+            views = np.lib.stride_tricks.sliding_window_view(unit, window, axis=0)  # [m, cols, window]
+            out[start + window - 1:stop] = views @ full
+    return out[:, 0] if squeeze else out
+
+
+class StreamingLowessSlope:
+    """
+    Causal LOWESS slope that is updated as each new cycle arrives.
+
+    Keeps a ring buffer of the last `window` cycles for every column and returns
+    the tricube-weighted local linear slope at the newest cycle in O(window * cols).
+
+    Example:
+        >>> slope = StreamingLowessSlope(n_features=13, window=30)
+        >>> for row in rms_rows:
+        ...     s = slope.update(row)   # [13]
+    """
+
+    def __init__(self, n_features: int, window: int = 30):
+        self.window = window
+        self.n_features = n_features
+        self._buffer = np.zeros((window, n_features))
+        self._count = 0
+        # weights for every warm-up length, so update() never allocates them
+        self._weights = {m: causal_slope_weights(m) for m in range(2, window + 1)}
+
+    def reset(self):
+        self._buffer[:] = 0.0
+        self._count = 0
+
+    def update(self, values) -> np.ndarray:
+        """Push one cycle ([n_features]) and return the slope at that cycle."""
+        self._buffer[self._count % self.window] = values
+        self._count += 1
+        m = min(self._count, self.window)
+        if m < 2:
+            return np.full(self.n_features, np.nan)
+        # oldest-first order of the last m cycles in the ring buffer
+        order = (self._count - m + np.arange(m)) % self.window
+        return self._weights[m] @ self._buffer[order]
@@ -0,0 +1,198 @@
+import numpy as np
+from models.anomaly.pipeline.feature_rolling import ROLLING_STATS
+from models.anomaly.pipeline.feature_lowess import StreamingLowessSlope
+
+# Online (one cycle at a time) versions of the batch features.
+#
+# Each unit keeps O(window) state: a ring buffer of its last readings, a sliding
+# Welford mean / M2 over the valid (non-NaN) readings of each column in the window
+# for the rolling stats, a StreamingLowessSlope over the rolling
+# rms and the spectra of its last H sub-windows for the frequency matrix. A new
+# cycle costs O(window * cols) whatever the length of the unit's history.
+#
+# Feature values equal the batch functions at the same row:
+#   {col}_rolling_{stat}              rolling_stats(..., groups=units)[stat]
+#   {col}_autocorr_lag{k}             rolling_autocorr_lags(..., groups=units)
+#   {col}_rolling_rms_causal_slope    causal_lowess_slope(rms, groups=units) over the rows
+#                                     from each unit's first full rms window on
+#   spectrum()                        freq_matrix(x[:, :t+1].T, N, T)[:, -1]
+# (the centred lowess_slope / smooth_lowess need the future of a series, their
+# online counterpart is the causal slope)
+
+
+class _UnitState:
+    __slots__ = ('count', 'buffer', 'valid', 'mean', 'm2', 'slope', 'spectra')
+
+    def __init__(self, capacity: int, n_cols: int, slope_window: int | None, freq: tuple | None):
+        self.count = 0
+        self.buffer = np.zeros((capacity, n_cols))
+        self.valid = np.zeros(n_cols)  # non-NaN readings per column in the window
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.slope = StreamingLowessSlope(n_cols, window=slope_window) if slope_window else None
+        self.spectra = None
+        if freq is not None:
+            N, T = freq
+            self.spectra = np.zeros((N - T + 1, n_cols, T // 2 + 1))
+
+
+def _slide_masked(state: _UnitState, x: np.ndarray, old: np.ndarray | None):
+    # Welford step per column when `x` or the reading leaving the window has NaNs
+    old = np.full_like(x, np.nan) if old is None else old
+    x_ok, old_ok = ~np.isnan(x), ~np.isnan(old)
+    xv, ov = np.where(x_ok, x, 0.0), np.where(old_ok, old, 0.0)
+    n, mean, m2 = state.valid, state.mean, state.m2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        swap_mean = mean + (xv - ov) / n
+        swap_m2 = m2 + (xv - ov) * (xv - swap_mean + ov - mean)
+        add_mean = mean + (xv - mean) / (n + 1)
+        add_m2 = m2 + (xv - mean) * (xv - add_mean)
+        drop_mean = np.where(n > 1, mean - (ov - mean) / (n - 1), 0.0)
+        drop_m2 = np.where(n > 1, m2 - (ov - mean) * (ov - drop_mean), 0.0)
+    cases = [x_ok & old_ok, x_ok & ~old_ok, ~x_ok & old_ok]
+    state.mean = np.select(cases, [swap_mean, add_mean, drop_mean], mean)
+    state.m2 = np.select(cases, [swap_m2, add_m2, drop_m2], m2)
+    state.valid = n + x_ok - old_ok
+
+
+class OnlineFeatureExtractor:
+    """
+    Per-unit streaming feature extraction.
+
+    Parameters:
+        columns: names of the raw sensor columns in every update
+        window: rolling window of the stats and the autocorrelation
+        stats: any of ROLLING_STATS
+        autocorr_lags: lags of `{col}_autocorr_lag{k}` (empty: none)
+        slope_window: window of the causal LOWESS slope over the rolling rms (None: no slope)
+        freq: (N, T) of freq_matrix to keep the newest [C, H, F+1] frame per unit (None: off)
+
+    Example:
+        >>> extractor = OnlineFeatureExtractor(sensor_cols, window=10, slope_window=30)
+        >>> for unit, row in stream:
+        ...     features = extractor.update(unit, row)   # aligned with extractor.feature_names
+    """
+
+    def __init__(self, columns: list, window: int = 10, stats=("rms",), autocorr_lags=(),
+                 slope_window: int | None = None, freq: tuple | None = None):
+        unknown = set(stats) - set(ROLLING_STATS)
+        if unknown:
+            raise ValueError(f"Unknown rolling stats: {sorted(unknown)}")
+        if slope_window and "rms" not in stats:
+            raise ValueError("the causal slope is computed over the rolling rms, add 'rms' to stats")
+        self.columns = list(columns)
+        self.window = window
+        self.stats = tuple(stats)
+        self.autocorr_lags = [int(k) for k in autocorr_lags]
+        self.slope_window = slope_window
+        self.freq = tuple(freq) if freq is not None else None
+        self._capacity = max(window, self.freq[0] if self.freq else 0)
+        self._units = {}
+
+        names = [f"{col}_rolling_{stat}" for stat in self.stats for col in self.columns]
+        names += [f"{col}_autocorr_lag{k}" for col in self.columns for k in self.autocorr_lags]
+        if slope_window:
+            names += [f"{col}_rolling_rms_causal_slope" for col in self.columns]
+        self.feature_names = names
+
+    def reset(self, unit=None):
+        """forget one unit's history (e.g. after maintenance), or every unit's"""
+        if unit is None:
+            self._units.clear()
+        else:
+            self._units.pop(unit, None)
+
+    def _state(self, unit) -> _UnitState:
+        state = self._units.get(unit)
+        if state is None:
+            state = self._units[unit] = _UnitState(self._capacity, len(self.columns), self.slope_window, self.freq)
+        return state
+
+    def _recent(self, state: _UnitState, m: int) -> np.ndarray:
+        # last m readings, oldest first
+        idx = (state.count - m + np.arange(m)) % self._capacity
+        return state.buffer[idx]
+
+    def update(self, unit, values) -> np.ndarray:
+        """Push one cycle of raw readings for `unit` and return its feature vector."""
+        x = np.asarray(values, dtype=np.float64)
+        state = self._state(unit)
+        w = self.window
+
+        # sliding Welford over the valid readings of each column: swap the reading
+        # leaving the window for the new one, or only add / only drop when one is NaN
+        old = state.buffer[(state.count - w) % self._capacity] if state.count >= w else None
+        if np.isnan(x).any() or (old is not None and np.isnan(old).any()):
+            _slide_masked(state, x, old)
+        elif old is None:
+            delta = x - state.mean
+            state.mean += delta / (state.valid + 1)
+            state.m2 += delta * (x - state.mean)
+            state.valid += 1
+        else:
+            new_mean = state.mean + (x - old) / state.valid
+            state.m2 += (x - old) * (x - new_mean + old - state.mean)
+            state.mean = new_mean
+        state.buffer[state.count % self._capacity] = x
+        state.count += 1
+        full = state.count >= w
+        # as rolling_stats with min_periods=window: a column's stats are NaN while its window holds a NaN
+        complete = state.valid == w
+
+        parts = []
+        var = np.maximum(state.m2, 0.0)  # window * population variance
+        window = self._recent(state, w) if full else None
+        if full:
+            # rounding left in M2 by readings that slid out: the window is flat
+            var[var <= 16 * np.finfo(np.float64).eps * np.nansum(window * window, axis=0)] = 0.0
+        rms = None
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(var / (w - 1)) if w > 1 else np.full_like(var, np.nan)
+            for stat in self.stats:
+                if stat == "mean":
+                    value = state.mean.copy()
+                elif stat == "std":
+                    value = std
+                elif stat == "z_score":
+                    value = np.where(std > 0, (x - state.mean) / std, np.nan)
+                else:
+                    value = rms = np.where(complete, np.sqrt(state.mean ** 2 + var / w), np.nan)
+                parts.append(np.where(complete, value, np.nan))
+
+        if self.autocorr_lags:
+            acf = np.full((len(self.columns), len(self.autocorr_lags)), np.nan)
+            if full:
+                dev = window - window.mean(axis=0)
+                denom = np.sum(dev * dev, axis=0)
+                # a flat window leaves only the rounding of its mean in dev
+                flat = 16 * np.finfo(np.float64).eps * np.sum(window * window, axis=0)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    for j, k in enumerate(self.autocorr_lags):
+                        if 0 <= k < w:
+                            numer = np.sum(dev[:w - k] * dev[k:], axis=0)
+                            acf[:, j] = np.where(denom > flat, np.clip(numer / denom, -1.0, 1.0), np.nan)
+            parts.append(acf.ravel())
+
+        if state.slope is not None:
+            # the slope starts at the unit's first full window, like the batch path; a NaN
+            # rms leaves NaN slopes until it slides out of the slope window
+            if full:
+                parts.append(state.slope.update(rms))
+            else:
+                parts.append(np.full(len(self.columns), np.nan))
+
+        if state.spectra is not None:
+            N, T = self.freq
+            if state.count >= T:
+                # only the newest length-T sub-window is new, the older H-1 spectra shift by one
+                state.spectra[:-1] = state.spectra[1:]
+                state.spectra[-1] = np.abs(np.fft.rfft(self._recent(state, T), axis=0)).T
+
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    def spectrum(self, unit) -> np.ndarray | None:
+        """newest freq_matrix frame [C, H, F+1] of `unit`, None until N cycles were seen"""
+        state = self._units.get(unit)
+        if state is None or state.spectra is None or state.count < self.freq[0]:
+            return None
+        return state.spectra.transpose(1, 0, 2).copy()
@@ -0,0 +1,171 @@
+import pandas as pd
+import numpy as np
+
+# Batched rolling statistics.
+# Same features as rolling_rms / rolling_z_score in feature_stats.py, but computed for
+# every column at once from cumulative sums over one float64 array, and with windows
+# that never cross a unit boundary.
+
+ROLLING_STATS = ("mean", "std", "rms", "z_score")
+
+
+def unit_starts(groups: np.ndarray) -> np.ndarray:
+    """
+    For every row, the index of the first row of its unit.
+
+    Units are runs of equal ids in `groups`, so rows must be contiguous per unit
+    (as they are in the CMAPSS files).
+    """
+    groups = np.asarray(groups)
+    n = len(groups)
+    starts = np.zeros(n, dtype=np.int64)
+    if n > 1:
+        boundary = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+        starts[boundary] = boundary
+        np.maximum.accumulate(starts, out=starts)
+    return starts
+
+
+def _window_sum(values: np.ndarray, first: np.ndarray) -> np.ndarray:
+    # sum over rows first[i]..i of every row i, from one cumulative sum
+    csum = np.zeros((values.shape[0] + 1, values.shape[1]))
+    np.cumsum(values, axis=0, out=csum[1:])
+    return csum[1:] - csum[first]
+
+
+def rolling_stats(values: np.ndarray, window: int, groups: np.ndarray | None = None,
+                  stats=ROLLING_STATS, min_periods: int | None = None) -> dict[str, np.ndarray]:
+    """
+    Rolling mean / std / rms / z-score of every column of `values` in one pass.
+
+    Parameters:
+    ----------
+    values : np.ndarray
+        [rows, cols] (or [rows]) array of sensor readings.
+    window : int
+        Number of trailing rows in each window.
+    groups : np.ndarray, optional
+        Unit id of every row. Windows are restricted to their own unit.
+    stats : iterable of str
+        Any of "mean", "std", "rms", "z_score".
+    min_periods : int, optional
+        Non-NaN rows a window needs to give a value (default: window).
+
+    Returns:
+    -------
+    dict[str, np.ndarray]
+        One [rows, cols] array per requested stat, as `Series.rolling(window,
+        min_periods)` per unit: NaNs are skipped, and rows whose window (cut at the
+        unit's first row) holds fewer than min_periods valid values are NaN. With
+        the default that is the first window-1 rows of each unit and every window
+        containing a NaN. std is the sample standard deviation (ddof=1), as in pandas;
+        it is 0 for windows that are flat within the rounding of the running sums,
+        and their z-score is NaN.
+    """
+    unknown = set(stats) - set(ROLLING_STATS)
+    if unknown:
+        raise ValueError(f"Unknown rolling stats: {sorted(unknown)}")
+    min_periods = window if min_periods is None else max(min_periods, 1)
+
+    x = np.asarray(values, dtype=np.float64)
+    squeeze = x.ndim == 1
+    if squeeze:
+        x = x[:, None]
+    n = x.shape[0]
+
+    # shift every column by its mean so the cumulative sums stay small
+    # and E[y^2] - E[y]^2 does not cancel catastrophically
+    with np.errstate(invalid="ignore"):
+        shift = np.nanmean(x, axis=0) if n else np.zeros(x.shape[1])
+    shift = np.nan_to_num(shift)
+    y = x - shift
+    valid = ~np.isnan(y)
+    y0 = np.where(valid, y, 0.0)  # NaNs add nothing to the sums, and are not counted
+
+    starts = unit_starts(groups) if groups is not None else np.zeros(n, dtype=np.int64)
+    first = np.maximum(np.arange(n) - window + 1, starts)
+    count = _window_sum(valid.astype(np.float64), first)
+    sum_y = _window_sum(y0, first)
+    sum_y2 = _window_sum(y0 * y0, first)
+
+    out = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_y = sum_y / count
+        var = np.maximum(sum_y2 - sum_y * mean_y, 0.0)  # count * population variance
+        # below the rounding of the running sums a window is flat: std 0, z-score NaN
+        var[var <= 16 * np.finfo(np.float64).eps * np.cumsum(y0 * y0, axis=0)] = 0.0
+        if "mean" in stats:
+            out["mean"] = mean_y + shift
+        if "std" in stats or "z_score" in stats:
+            std = np.sqrt(var / (count - 1))
+            std[count < 2] = np.nan
+            if "std" in stats:
+                out["std"] = std
+            if "z_score" in stats:
+                out["z_score"] = np.where(std > 0, (y - mean_y) / std, np.nan)
+        if "rms" in stats:
+            # E[x^2] = E[y^2] + 2 k E[y] + k^2
+            out["rms"] = np.sqrt(np.maximum(sum_y2 / count + 2 * shift * mean_y + shift ** 2, 0.0))
+
+    incomplete = count < min_periods
+    for stat, arr in out.items():
+        arr[incomplete] = np.nan
+        if squeeze:
+            out[stat] = arr[:, 0]
+    return out
+
+
+def add_rolling_features(df: pd.DataFrame, cols: list, window: int, stats=("rms",),
+                         group_col: str | None = "number") -> pd.DataFrame:
+    """
+    Append `{col}_rolling_{stat}` columns for every column in `cols`.
+
+    All new columns are built from one array and joined with a single concat.
+    float32 inputs give float32 features (the sums themselves run in float64).
+    """
+    groups = df[group_col].to_numpy() if group_col is not None else None
+    result = rolling_stats(df[cols].to_numpy(), window, groups=groups, stats=stats)
+    out_dtype = np.float32 if all(df[col].dtype == np.float32 for col in cols) else np.float64
+
+    blocks = [
+        pd.DataFrame(result[stat].astype(out_dtype, copy=False), index=df.index,
+                     columns=[f"{col}_rolling_{stat}" for col in cols])
+        for stat in stats
+    ]
+    return pd.concat([df, *blocks], axis=1)
+
+
+class RollingTail:
+    """
+    Last window-1 rows of every unit, so rolling features of a batch continue the
+    unit's earlier batches instead of starting a new window at the seam. Rows
+    before a unit's first full window stay NaN: filling them (process_data's bfill)
+    needs rows of a later batch.
+
+    Example:
+        >>> tail = RollingTail(window=10)
+        >>> for batch in batches:
+        ...     rows, new = tail.extend(batch)             # earlier rows of the batch's units first
+        ...     features = add_rolling_features(rows, cols, window=10)[new]
+    """
+
+    def __init__(self, window: int, group_col: str = "number"):
+        self.window = window
+        self.group_col = group_col
+        self.rows = None
+
+    def extend(self, df: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+        """stored rows of df's units followed by df (rows contiguous per unit), and the mask of df's rows"""
+        if self.rows is not None and len(self.rows):
+            carried = self.rows[self.rows[self.group_col].isin(df[self.group_col].unique())]
+        else:
+            carried = df.iloc[:0]
+        combined = pd.concat([carried, df], ignore_index=True)
+        new = np.arange(len(combined)) >= len(carried)
+        # each unit's carried rows directly before its rows of the batch, units in batch order
+        units = pd.unique(df[self.group_col])
+        rank = pd.Series(np.arange(len(units)), index=units)
+        order = np.lexsort((new, rank[combined[self.group_col]].to_numpy()))
+        self.rows = pd.concat([self.rows, df], ignore_index=True) if self.rows is not None else df.reset_index(drop=True)
+        self.rows = self.rows.groupby(self.group_col, sort=False).tail(self.window - 1).reset_index(drop=True)
+        return combined.iloc[order].reset_index(drop=True), new[order]
@@ -1,7 +1,7 @@
-from statsmodels.nonparametric.smoothers_lowess import lowess
 import pandas as pd
 import numpy as np
 import os
+from models.anomaly.pipeline.feature_lowess import lowess_smooth
 
 # Time domain techniques
 def rolling_z_score(series: pd.Series, window: int) -> pd.Series:
@@ -16,5 +16,5 @@ def rolling_rms(series: pd.Series, window: int) -> pd.Series:
 def smooth_lowess(series: pd.Series, frac=0.05) -> pd.Series:
     x = np.arange(len(series))
     y = series.values
-    smoothed = lowess(y, x, frac=frac, return_sorted=False)
+    smoothed = lowess_smooth(y, x, frac=frac)  # vectorized; NaN rows dropped like statsmodels' lowess
     return pd.Series(smoothed, index=series.index)
\ No newline at end of file
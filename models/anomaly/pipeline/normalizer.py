@@ -0,0 +1,215 @@
+import json
+import numpy as np
+import pandas as pd
+
+# Incremental standardisation and RUL labels for data that keeps arriving.
+#
+#   scaler = IncrementalScaler()                 # or: keys=operating_regime(batch['ops-set-1']) per call
+#   labeler = RULLabeler()
+#   for batch in batches:                        # any split: new units, new cycles of known units
+#       batch[cols] = scaler.partial_fit_transform(batch[cols])
+#       batch['RUL'], shifts = labeler.update(batch['number'], batch['time'])
+#
+# partial_fit() folds a batch into running (count, mean, M2) with Chan's parallel
+# Welford update, so the cost is O(batch) whatever has been seen before; transform()
+# is one gather and one multiply-add per value. Fitting everything in one call gives
+# StandardScaler.fit_transform's result (population std, constant columns scale 1).
+#
+# With keys, every key (e.g. the operating regime of FD002/FD004) gets its own
+# statistics and a row is scaled with the statistics of its key. memory=n caps the
+# weight of the past at n rows, so the statistics follow slow sensor drift.
+
+
+def operating_regime(settings, decimals: int = 0) -> np.ndarray:
+    """
+    Regime key of every row from its operating setting column(s).
+
+    The six FD002/FD004 flight conditions are apart by at least 5 in setting 1
+    (altitude, kft), so rounding it to an integer separates them; in FD001/FD003
+    every row rounds to the same key.
+    """
+    return np.round(np.asarray(settings, dtype=np.float64), decimals) + 0.0  # -0.0 -> 0.0
+
+
+class IncrementalScaler:
+    """
+    Running per-column (and optionally per-key) mean and std, updated batch by batch.
+
+    Parameters:
+        columns: column names, taken from the first DataFrame if not given
+        memory: if set, past data counts as at most this many rows when a batch is merged
+                (exponential forgetting); None keeps the exact statistics of everything seen
+
+    Example:
+        >>> scaler = IncrementalScaler()
+        >>> for chunk in chunks:
+        ...     scaler.partial_fit(chunk[feature_cols], keys=operating_regime(chunk['ops-set-1']))
+        >>> scaled = scaler.transform(frame[feature_cols], keys=operating_regime(frame['ops-set-1']))
+    """
+
+    def __init__(self, columns: list | None = None, memory: int | None = None):
+        self.columns = list(columns) if columns is not None else None
+        self.memory = memory
+        self.keys = []        # key of every row of the state arrays
+        self._index = {}      # key -> row
+        self.count = None     # [keys, cols] non-NaN values seen
+        self.mean = None
+        self.m2 = None
+
+    def _init_state(self, n_cols: int):
+        self.count = np.zeros((0, n_cols))
+        self.mean = np.zeros((0, n_cols))
+        self.m2 = np.zeros((0, n_cols))
+
+    def _values(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            if self.columns is None:
+                self.columns = list(X.columns)
+            elif list(X.columns) != self.columns:
+                raise ValueError("columns differ from the ones the scaler was fitted on")
+        values = np.asarray(X, dtype=np.float64)
+        if values.ndim == 1:
+            values = values.reshape(-1, 1)
+        if self.count is None:
+            self._init_state(values.shape[1])
+        elif values.shape[1] != self.count.shape[1]:
+            raise ValueError(f"got {values.shape[1]} columns, the scaler has {self.count.shape[1]}")
+        return values
+
+    def _codes(self, keys, n_rows: int, add: bool) -> np.ndarray:
+        """state row of every data row; only the distinct keys of the batch go through the dict"""
+        if keys is None:
+            unique, inverse = [None], np.zeros(n_rows, dtype=np.intp)
+        else:
+            keys = np.asarray(keys)
+            if len(keys) != n_rows:
+                raise ValueError(f"{len(keys)} keys for {n_rows} rows")
+            unique, inverse = np.unique(keys, axis=0 if keys.ndim > 1 else None, return_inverse=True)
+            unique = [tuple(k) if keys.ndim > 1 else k for k in unique.tolist()]
+        rows = np.empty(len(unique), dtype=np.intp)
+        for i, key in enumerate(unique):
+            row = self._index.get(key)
+            if row is None:
+                if not add:
+                    raise KeyError(f"no statistics for key {key!r}, partial_fit it first")
+                row = self._index[key] = len(self.keys)
+                self.keys.append(key)
+                self.count = np.vstack([self.count, np.zeros((1, self.count.shape[1]))])
+                self.mean = np.vstack([self.mean, np.zeros((1, self.mean.shape[1]))])
+                self.m2 = np.vstack([self.m2, np.zeros((1, self.m2.shape[1]))])
+            rows[i] = row
+        return rows[inverse.ravel()]
+
+    def partial_fit(self, X, keys=None) -> "IncrementalScaler":
+        """fold a batch into the statistics; NaNs are skipped"""
+        values = self._values(X)
+        codes = self._codes(keys, len(values), add=True)
+        for row in np.unique(codes):
+            part = values[codes == row]
+            valid = ~np.isnan(part)
+            n_b = valid.sum(axis=0).astype(np.float64)
+            has = n_b > 0
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean_b = np.where(has, np.nansum(part, axis=0) / np.maximum(n_b, 1), 0.0)
+                m2_b = np.nansum((part - mean_b) ** 2, axis=0)
+
+            n_a, mean_a, m2_a = self.count[row], self.mean[row], self.m2[row]
+            if self.memory is not None:
+                # forget: shrink the past to at most `memory` rows, M2 in proportion
+                cap = np.minimum(n_a, self.memory)
+                m2_a = np.where(n_a > 0, m2_a * cap / np.maximum(n_a, 1), 0.0)
+                n_a = cap
+            # Chan et al.: combine (n, mean, M2) of two disjoint samples
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            self.mean[row] = np.where(n > 0, mean_a + delta * n_b / np.maximum(n, 1), 0.0)
+            self.m2[row] = m2_a + m2_b + delta ** 2 * n_a * n_b / np.maximum(n, 1)
+            self.count[row] = n
+        return self
+
+    def scale(self) -> np.ndarray:
+        """[keys, cols] population std, 1 where it is 0 or undefined (as StandardScaler)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(self.m2 / self.count)
+        return np.where(np.isfinite(std) & (std > 0), std, 1.0)
+
+    def transform(self, X, keys=None):
+        """scale with the current statistics; float32 stays float32, a DataFrame stays a DataFrame"""
+        if self.count is None:
+            raise ValueError("the scaler has not been fitted")
+        dtype = np.result_type(*X.dtypes) if isinstance(X, pd.DataFrame) else np.asarray(X).dtype
+        values = self._values(X)
+        codes = self._codes(keys, len(values), add=False)
+        scaled = (values - self.mean[codes]) / self.scale()[codes]  # in float64, rounded once
+        if np.issubdtype(dtype, np.floating):
+            scaled = scaled.astype(dtype, copy=False)
+        if isinstance(X, pd.DataFrame):
+            return pd.DataFrame(scaled, index=X.index, columns=X.columns)
+        return scaled
+
+    def partial_fit_transform(self, X, keys=None):
+        """update with the batch, then scale it (the batch is part of its own statistics)"""
+        return self.partial_fit(X, keys).transform(X, keys)
+
+    def save(self, path: str):
+        state = {'columns': self.columns, 'memory': self.memory,
+                 'keys': [list(k) if isinstance(k, tuple) else k for k in self.keys],
+                 'tuple_keys': any(isinstance(k, tuple) for k in self.keys)}
+        for name in ('count', 'mean', 'm2'):
+            state[name] = getattr(self, name).tolist() if self.count is not None else None
+        with open(path, 'w') as f:
+            json.dump(state, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "IncrementalScaler":
+        with open(path) as f:
+            state = json.load(f)
+        scaler = cls(state['columns'], memory=state['memory'])
+        scaler.keys = [tuple(k) for k in state['keys']] if state['tuple_keys'] else state['keys']
+        scaler._index = {key: i for i, key in enumerate(scaler.keys)}
+        if state['count'] is not None:
+            for name in ('count', 'mean', 'm2'):
+                setattr(scaler, name, np.asarray(state[name], dtype=np.float64).reshape(len(scaler.keys), -1))
+        return scaler
+
+
+class RULLabeler:
+    """
+    RUL = last cycle seen for the unit - cycle, kept up to date batch by batch.
+
+    Only the last cycle of every unit is stored. update() labels the new rows and
+    returns, for every unit whose last cycle moved, how much the RUL of its earlier
+    rows has to grow; other units are not touched. Once a unit has run to failure its
+    labels equal `groupby(unit)[cycle].max() - cycle` of the full frame.
+    """
+
+    def __init__(self):
+        self.last_cycle = {}
+
+    def update(self, units, cycles) -> tuple[np.ndarray, dict]:
+        units = np.asarray(units)
+        cycles = np.asarray(cycles)
+        unique, inverse = np.unique(units, return_inverse=True)
+        batch_last = np.full(len(unique), -np.inf)
+        np.maximum.at(batch_last, inverse, cycles)
+        shifts = {}
+        for unit, last in zip(unique.tolist(), batch_last.tolist()):
+            previous = self.last_cycle.get(unit)
+            if previous is None or last > previous:
+                self.last_cycle[unit] = cycles.dtype.type(last)
+                if previous is not None:
+                    shifts[unit] = self.last_cycle[unit] - previous
+        return self.rul(units, cycles, unique=(unique, inverse)), shifts
+
+    def rul(self, units, cycles, unique=None) -> np.ndarray:
+        """labels of any rows of known units with the current last cycles"""
+        unique, inverse = unique if unique is not None else np.unique(np.asarray(units), return_inverse=True)
+        last = np.array([self.last_cycle[unit] for unit in unique.tolist()])
+        return last[inverse] - np.asarray(cycles)
+
+    def reset(self, unit=None):
+        """forget one unit (e.g. a new run under the same id), or all of them"""
+        if unit is None:
+            self.last_cycle.clear()
+        else:
+            self.last_cycle.pop(unit, None)
@@ -0,0 +1,179 @@
+import importlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from models.anomaly.pipeline.apply_utils import apply_and_name, feature_name
+
+# Declarative feature pipeline.
+#
+# Steps are the (func, suffix, params) triples of apply_and_name, read from the
+# `features` section of the YAML config:
+#
+#   features:
+#     group_col: number              # optional, apply every step unit by unit
+#     exclude: [number, time]        # never used as step inputs
+#     steps:
+#       - {func: rolling_rms, suffix: rms10, params: {window: 10}}
+#       - {func: smooth_lowess, suffix: lowess05, params: {frac: 0.05}, inputs: rms10}
+#
+# Every (column, step) pair is one task producing `{col}_{suffix}`. A step with
+# `inputs: <suffix>` runs on the outputs of that step, which makes the tasks a DAG.
+# Tasks are run level by level; tasks in a level are independent and go to a process
+# pool that reads its inputs from one shared-memory block. All new columns are joined
+# to the frame with a single concat at the end.
+
+# short names usable in the config; anything else is a "module:function" path
+FEATURE_FUNCS = {
+    'rolling_rms': 'models.anomaly.pipeline.feature_stats:rolling_rms',
+    'rolling_z_score': 'models.anomaly.pipeline.feature_stats:rolling_z_score',
+    'smooth_lowess': 'models.anomaly.pipeline.feature_stats:smooth_lowess',
+    'rolling_autocorr': 'models.anomaly.pipeline.feature_autocorr:rolling_autocorr',
+}
+
+
+def resolve_func(name: str):
+    module, _, attr = FEATURE_FUNCS.get(name, name).partition(':')
+    if not attr:
+        raise ValueError(f"Unknown feature function '{name}', use one of {sorted(FEATURE_FUNCS)} or 'module:function'")
+    return getattr(importlib.import_module(module), attr)
+
+
+def load_steps(config: dict) -> list[dict]:
+    """step definitions from the `features` section of a config"""
+    steps = (config.get('features') or {}).get('steps') or []
+    for step in steps:
+        if 'func' not in step or 'suffix' not in step:
+            raise ValueError(f"feature step needs 'func' and 'suffix': {step}")
+        step.setdefault('params', {})
+    suffixes = [step['suffix'] for step in steps]
+    if len(set(suffixes)) != len(suffixes):
+        raise ValueError(f"feature step suffixes must be unique: {suffixes}")
+    return steps
+
+
+def plan(columns: list, steps: list[dict], exclude=()) -> list[list[tuple]]:
+    """
+    Expand steps into (input_col, func, suffix, params, output_col) tasks grouped in
+    dependency levels: every task only depends on columns of earlier levels.
+    """
+    base = [col for col in columns if col not in exclude]
+    outputs = {}   # suffix -> output columns of that step
+    level_of = {col: -1 for col in columns}
+    levels = []
+
+    for step in steps:
+        if step.get('inputs'):
+            if step['inputs'] not in outputs:
+                raise ValueError(f"step '{step['suffix']}' depends on unknown or later step '{step['inputs']}'")
+            inputs = outputs[step['inputs']]
+        else:
+            inputs = step.get('columns') or base
+
+        outputs[step['suffix']] = []
+        for col in inputs:
+            if col not in level_of:
+                raise KeyError(f"step '{step['suffix']}' input column '{col}' not found")
+            out_col = feature_name(col, step['suffix'])
+            level = level_of[col] + 1
+            level_of[out_col] = level
+            while len(levels) <= level:
+                levels.append([])
+            levels[level].append((col, step['func'], step['suffix'], step['params'], out_col))
+            outputs[step['suffix']].append(out_col)
+    return levels
+
+
+def _unit_bounds(groups) -> np.ndarray:
+    if groups is None:
+        return None
+    groups = np.asarray(groups)
+    return np.concatenate([[0], np.flatnonzero(groups[1:] != groups[:-1]) + 1, [len(groups)]])
+
+
+def _apply(values: np.ndarray, func_name: str, params: dict, bounds) -> np.ndarray:
+    func = resolve_func(func_name)
+    if bounds is None:
+        parts = [values]
+    else:
+        parts = [values[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    # every unit goes through apply_and_name on a one-column frame
+    out = [
+        apply_and_name(pd.DataFrame({'x': part}), 'x', func, 'out', **params)['x_out'].to_numpy(dtype=np.float64)
+        for part in parts
+    ]
+    return np.concatenate(out)
+
+
+def _run_task(shm_name: str, shape: tuple, row: int, func_name: str, params: dict, bounds) -> np.ndarray:
+    # worker side: read one input column out of the level's shared block
+    # pool workers share the parent's resource tracker, the parent unlinks the block
+    shm = SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        values = block[row].copy()
+        del block
+    finally:
+        shm.close()
+    return _apply(values, func_name, params, bounds)
+
+
+def run_pipeline(df: pd.DataFrame, steps: list[dict], group_col: str | None = None, exclude=(),
+                 n_jobs: int | None = None) -> pd.DataFrame:
+    """
+    Run feature steps over `df` and return it with all new columns appended.
+
+    n_jobs=1 runs in-process; otherwise independent tasks of each level run on a
+    process pool of n_jobs workers (default: all cores).
+    """
+    exclude = set(exclude) | ({group_col} if group_col else set())
+    levels = plan(list(df.columns), steps, exclude=exclude)
+    bounds = _unit_bounds(df[group_col].to_numpy()) if group_col else None
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    new_cols = {}
+
+    def column(col):
+        return new_cols[col] if col in new_cols else df[col].to_numpy(dtype=np.float64)
+
+    if n_jobs == 1:
+        for tasks in levels:
+            for col, func_name, suffix, params, out_col in tasks:
+                new_cols[out_col] = _apply(column(col), func_name, params, bounds)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            for depth, tasks in enumerate(levels):
+                inputs = sorted({task[0] for task in tasks})
+                row_of = {col: i for i, col in enumerate(inputs)}
+                shape = (len(inputs), len(df))
+                shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+                try:
+                    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+                    for col in inputs:
+                        block[row_of[col]] = column(col)
+                    del block
+                    futures = {
+                        out_col: pool.submit(_run_task, shm.name, shape, row_of[col], func_name, params, bounds)
+                        for col, func_name, suffix, params, out_col in tasks
+                    }
+                    for out_col, future in futures.items():
+                        new_cols[out_col] = future.result()
+                finally:
+                    shm.close()
+                    shm.unlink()
+                logging.info(f"feature level {depth}: {len(tasks)} tasks on {len(inputs)} input columns")
+
+    if not new_cols:
+        return df
+    return pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1)
+
+
+def run_configured_pipeline(df: pd.DataFrame, config: dict, n_jobs: int | None = None) -> pd.DataFrame:
+    """run_pipeline with steps, group_col and exclude taken from the config's `features` section"""
+    features = config.get('features') or {}
+    return run_pipeline(df, load_steps(config), group_col=features.get('group_col'),
+                        exclude=features.get('exclude') or (), n_jobs=n_jobs)
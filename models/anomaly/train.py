@@ -0,0 +1,282 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, Dataset, Subset
+
+from models.anomaly.network import FSENetLSTM
+from models.anomaly.pipeline.feature_freq_domain import freq_matrix
+from models.feature_store import is_feature_store, load_feature_frame
+
+# Training of the F-SENet-LSTM-DNN RUL model on CPU.
+#
+# Every sample is one first-stack window of N cycles of a unit, i.e. one
+# [C, H, F+1] frame of freq_matrix(unit.T, N, T), and its target is the RUL at
+# the window's last cycle. All frames are computed once per (data, N, T) and
+# written to a memory-mapped .npy file; the Dataset only slices it, so DataLoader
+# workers share the page cache instead of recomputing FFTs.
+#
+#   python -m models.anomaly.train --data models/data_store --epochs 10 --workers 2 --threads 4
+#   python -m models.anomaly.train --export models/anomaly/fsenet_lstm.ts
+
+MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA = os.path.join(MODELS_DIR, "data_store")
+DEFAULT_CACHE = os.path.join(MODELS_DIR, ".cache", "freq")
+DEFAULT_OUTPUT = os.path.join(MODELS_DIR, "anomaly", "fsenet_lstm.pt")
+NON_FEATURE_COLS = ['number', 'time', 'RUL']
+
+
+def _key(values: np.ndarray, groups: np.ndarray, N: int, T: int) -> str:
+    digest = hashlib.sha256(f"{values.dtype}:{values.shape}:{N}:{T}".encode())
+    digest.update(np.ascontiguousarray(values).tobytes())
+    digest.update(np.ascontiguousarray(groups).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def precompute_frames(values: np.ndarray, groups: np.ndarray, targets: np.ndarray, N: int, T: int,
+                      cache_dir: str = DEFAULT_CACHE, chunk_size: int = 256) -> str:
+    """
+    Write the freq_matrix frame of every N-cycle window of every unit to
+    `<cache_dir>/frames-<key>.npy` ([windows, C, H, F+1] float32) with the window
+    targets and units next to it. Reuses the files if they already exist.
+
+    Returns the path of the frames file.
+    """
+    values = np.asarray(values, dtype=np.float32)
+    key = _key(values, groups, N, T)
+    frames_path = os.path.join(cache_dir, f"frames-{key}.npy")
+    index_path = os.path.join(cache_dir, f"frames-{key}.npz")
+    if os.path.exists(frames_path) and os.path.exists(index_path):
+        return frames_path
+    os.makedirs(cache_dir, exist_ok=True)
+
+    bounds = np.concatenate([[0], np.flatnonzero(groups[1:] != groups[:-1]) + 1, [len(groups)]])
+    lengths = np.diff(bounds)
+    n_windows = int(np.sum(np.maximum(lengths - N + 1, 0)))
+    C, H, F1 = values.shape[1], N - T + 1, T // 2 + 1
+
+    t0 = time.perf_counter()
+    tmp_path = f"{frames_path}.{os.getpid()}.tmp.npy"
+    frames = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(n_windows, C, H, F1))
+    window_targets = np.empty(n_windows, dtype=np.float32)
+    window_units = np.empty(n_windows, dtype=groups.dtype)
+    pos = 0
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        M = stop - start - N + 1
+        if M <= 0:
+            continue  # unit shorter than one window
+        unit = torch.from_numpy(np.ascontiguousarray(values[start:stop].T))  # [C, L]
+        fm = freq_matrix(unit, N, T, chunk_size=chunk_size)                   # [C, M, H, F+1]
+        frames[pos:pos + M] = fm.permute(1, 0, 2, 3).numpy()
+        window_targets[pos:pos + M] = targets[start + N - 1:stop]
+        window_units[pos:pos + M] = groups[start]
+        pos += M
+    frames.flush()
+    del frames
+    np.savez(index_path, targets=window_targets, units=window_units, N=N, T=T)
+    os.replace(tmp_path, frames_path)
+    logging.info(f"precomputed {n_windows} frequency frames in {time.perf_counter() - t0:.1f} s -> {frames_path}")
+    return frames_path
+
+
+class FreqFrameDataset(Dataset):
+    """
+    (frame [C, H, F+1], target) samples sliced lazily from a precompute_frames file.
+
+    The memmap is opened on first access in every process, so the dataset pickles
+    cheaply into DataLoader workers.
+    """
+
+    def __init__(self, frames_path: str):
+        self.frames_path = frames_path
+        index = np.load(os.path.splitext(frames_path)[0] + ".npz")
+        self.targets = index['targets']
+        self.units = index['units']
+        self._frames = None
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    @property
+    def frames(self) -> np.ndarray:
+        if self._frames is None:
+            self._frames = np.load(self.frames_path, mmap_mode='r')
+        return self._frames
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_frames'] = None
+        return state
+
+    def __getitem__(self, i):
+        return torch.from_numpy(np.array(self.frames[i])), torch.tensor(self.targets[i])
+
+    def __getitems__(self, indices):
+        # one sorted fancy-index read per batch instead of one read per sample
+        indices = np.asarray(indices)
+        order = np.argsort(indices)
+        frames = np.empty((len(indices),) + self.frames.shape[1:], dtype=np.float32)
+        frames[order] = self.frames[indices[order]]
+        return torch.from_numpy(frames), torch.from_numpy(self.targets[indices])
+
+
+def _collate(batch):
+    # __getitems__ already returns stacked tensors
+    return batch
+
+
+def _worker_init(worker_id: int):
+    # workers only slice and copy, keep their intra-op pools from oversubscribing the cores
+    torch.set_num_threads(1)
+
+
+def make_loader(dataset, batch_size: int, shuffle: bool, workers: int) -> DataLoader:
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, num_workers=workers,
+                      collate_fn=_collate, worker_init_fn=_worker_init if workers else None,
+                      persistent_workers=workers > 0)
+
+
+def split_units(units: np.ndarray, val_fraction: float, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """window indices of the training and validation units"""
+    unique = np.unique(units)
+    rng = np.random.default_rng(seed)
+    val_units = rng.choice(unique, size=max(1, int(round(len(unique) * val_fraction))), replace=False)
+    is_val = np.isin(units, val_units)
+    return np.flatnonzero(~is_val), np.flatnonzero(is_val)
+
+
+def evaluate(model: nn.Module, loader: DataLoader) -> float:
+    """RMSE over a loader"""
+    model.eval()
+    squared, count = 0.0, 0
+    with torch.inference_mode():
+        for x, y in loader:
+            squared += float(torch.sum((model(x) - y) ** 2))
+            count += len(y)
+    return (squared / max(count, 1)) ** 0.5
+
+
+def export_torchscript(model: nn.Module, example: torch.Tensor, path: str) -> str:
+    """traced + frozen TorchScript module for CPU inference (torch.jit.load, no Python model code needed)"""
+    model.eval()
+    with torch.inference_mode():
+        traced = torch.jit.freeze(torch.jit.trace(model, example))
+    traced.save(path)
+    return path
+
+
+def load_checkpoint(path: str) -> FSENetLSTM:
+    checkpoint = torch.load(path, map_location='cpu')
+    model = FSENetLSTM(**checkpoint['config'])
+    model.load_state_dict(checkpoint['state_dict'])
+    return model.eval()
+
+
+def compile_for_training(model: nn.Module, example: torch.Tensor, backend="inductor") -> nn.Module:
+    """
+    torch.compile(model) once a forward and backward pass on `example` went through,
+    else `model` itself (e.g. no C++ toolchain on the box): the caller trains eagerly.
+    """
+    try:
+        compiled = torch.compile(model, backend=backend)
+        model.train()
+        compiled(example).sum().backward()  # compiles both graphs now, so a failure falls back here
+    except Exception as e:
+        logging.warning(f"torch.compile unavailable ({e}), training eagerly")
+        return model
+    finally:
+        model.zero_grad(set_to_none=True)
+    return compiled
+
+
+def train(data_path: str = DEFAULT_DATA, N: int = 30, T: int = 8, epochs: int = 10, batch_size: int = 256,
+          lr: float = 1e-3, workers: int = 2, threads: int | None = None, val_fraction: float = 0.2,
+          compile: bool = False, output: str = DEFAULT_OUTPUT, export: str | None = None,
+          cache_dir: str = DEFAULT_CACHE, seed: int = 0) -> dict:
+    """
+    Train FSENetLSTM on the feature columns of a feature store (or CSV), one channel
+    per column. Saves a checkpoint (state_dict + config) to `output` and, if
+    `export` is given, a TorchScript module. Returns timings and validation RMSE.
+    """
+    torch.manual_seed(seed)
+    if threads:
+        torch.set_num_threads(threads)
+
+    data = load_feature_frame(data_path) if is_feature_store(data_path) else pd.read_csv(data_path)
+    feature_cols = [col for col in data.columns if col not in NON_FEATURE_COLS]
+    t0 = time.perf_counter()
+    frames_path = precompute_frames(data[feature_cols].to_numpy(), data['number'].to_numpy(),
+                                    data['RUL'].to_numpy(), N, T, cache_dir=cache_dir)
+    report = {'precompute_seconds': time.perf_counter() - t0}
+
+    dataset = FreqFrameDataset(frames_path)
+    train_idx, val_idx = split_units(dataset.units, val_fraction, seed=seed)
+    train_loader = make_loader(Subset(dataset, train_idx), batch_size, shuffle=True, workers=workers)
+    val_loader = make_loader(Subset(dataset, val_idx), batch_size, shuffle=False, workers=workers)
+
+    _, C, H, F1 = dataset.frames.shape
+    # targets are scaled to ~[0, 1] inside the model, the loss is computed on that scale too
+    rul_scale = float(max(dataset.targets.max(), 1.0))
+    config = {'channels': C, 'H': H, 'bins': F1, 'output_scale': rul_scale}
+    model = FSENetLSTM(**config)
+    step_model = compile_for_training(model, torch.from_numpy(np.array(dataset.frames[:2]))) if compile else model
+
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    loss_fn = nn.MSELoss()
+
+    for epoch in range(epochs):
+        model.train()
+        t0, seen, total_loss = time.perf_counter(), 0, 0.0
+        for x, y in train_loader:
+            optimizer.zero_grad(set_to_none=True)
+            loss = loss_fn(step_model(x) / rul_scale, y / rul_scale)
+            loss.backward()
+            optimizer.step()
+            total_loss += float(loss) * len(y)
+            seen += len(y)
+        seconds = time.perf_counter() - t0
+        val_rmse = evaluate(model, val_loader)
+        print(f"epoch {epoch + 1:>3}: train mse {total_loss / max(seen, 1):.4f}  val rmse {val_rmse:7.2f}  "
+              f"{seen / seconds:8.0f} windows/s")
+        report['val_rmse'] = val_rmse
+        report.setdefault('epoch_seconds', []).append(seconds)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    torch.save({'state_dict': model.state_dict(), 'config': config, 'N': N, 'T': T,
+                'feature_cols': feature_cols}, output)
+    if export:
+        export_torchscript(model, torch.from_numpy(np.array(dataset.frames[:1])), export)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the F-SENet-LSTM-DNN RUL model on CPU")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="feature store directory or CSV")
+    parser.add_argument("--N", type=int, default=30, help="first-stack window (cycles per sample)")
+    parser.add_argument("--T", type=int, default=8, help="second-stack window (FFT length)")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--workers", type=int, default=2, help="DataLoader worker processes")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads of the training process")
+    parser.add_argument("--compile", action="store_true", help="torch.compile the model for training")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="checkpoint path")
+    parser.add_argument("--export", default=None, help="also write a TorchScript module here")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    report = train(args.data, N=args.N, T=args.T, epochs=args.epochs, batch_size=args.batch_size, lr=args.lr,
+                   workers=args.workers, threads=args.threads, compile=args.compile, output=args.output,
+                   export=args.export)
+    print(json.dumps({k: v for k, v in report.items() if k != 'epoch_seconds'}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import argparse
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from models.config import TRAIN_PATH
+from models.data import label_rul, rolling_features, slope_features
+from models.anomaly.data_loader import load_config, load_data_chunks
+from models.anomaly.pipeline.normalizer import IncrementalScaler, operating_regime
+from models.feature_store import write_feature_store
+
+# Batch preprocessing of several CMAPSS datasets, split by (dataset, unit).
+#
+# Units are streamed one at a time from each file (at most 4 per worker in
+# flight), their features (rolling rms, lowess slope, RUL label, with the code
+# process_data uses) are computed on a process pool, and the results come back in
+# file order. A single IncrementalScaler is then fitted over all units of
+# all datasets and applied once, so the scaling matches what process_data +
+# add_rolling_slope produce for one file. --by-regime keeps separate statistics per
+# operating regime (FD002/FD004). The scaler is saved as scaler.json so new batches
+# can be scaled with it, or folded into it, later.
+#
+#   python -m models.batch_preprocess --jobs 32
+#   python -m models.batch_preprocess train_FD002.txt train_FD004.txt --by-regime
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+CMAPSS_CONFIG = os.path.join(MODELS_DIR, "anomaly", "configs", "cmapss_config.yaml")
+DEFAULT_OUTPUT = os.path.join(MODELS_DIR, "data_stores")
+
+
+def unit_features(unit: pd.DataFrame, window: int = 10, frac: float = 0.5) -> tuple[pd.DataFrame, dict]:
+    """Unscaled features of one unit (already projected by the loader) and the time spent per stage."""
+    # the feature code of process_data / add_rolling_slope, without their scaling
+    timings = {}
+    t0 = time.perf_counter()
+    data = label_rul(rolling_features(unit, window=window))
+    timings['rolling'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    data = slope_features(data, frac=frac)
+    timings['lowess'] = time.perf_counter() - t0
+    return data, timings
+
+
+def _unit_task(args):
+    dataset, unit, window, frac = args
+    data, timings = unit_features(unit, window=window, frac=frac)
+    return dataset, data, timings
+
+
+def _ordered_results(pool: ProcessPoolExecutor, tasks, in_flight: int):
+    # results in submission order with at most `in_flight` units queued or running,
+    # so the generator is read only as fast as the pool works through it
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(_unit_task, task))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def dataset_name(path: str) -> str:
+    # train_FD001.txt -> FD001
+    return os.path.splitext(os.path.basename(path))[0].split('_')[-1]
+
+
+def preprocess_datasets(paths: list, n_jobs: int | None = None, window: int = 10, frac: float = 0.5,
+                        config_path: str = CMAPSS_CONFIG, regime_col: str | None = None) -> tuple[dict, IncrementalScaler, dict]:
+    """
+    Preprocess every file in `paths` unit-parallel.
+
+    Returns the scaled frame per dataset (keyed by dataset_name), the fitted scaler
+    and per-stage timings in seconds ('rolling'/'lowess' are summed over workers).
+    With regime_col the scaling is per operating regime of that setting column.
+    """
+    timings = defaultdict(float)
+
+    def units():
+        # streamed in file order, one unit at a time
+        for path in paths:
+            config = load_config(config_path)
+            config['data']['input_path'] = path
+            t0 = time.perf_counter()
+            for unit in load_data_chunks(config, stream_by='unit'):
+                timings['load'] += time.perf_counter() - t0
+                yield dataset_name(path), unit, window, frac
+                t0 = time.perf_counter()
+
+    t_start = time.perf_counter()
+    parts = defaultdict(list)
+    workers = n_jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # submission order is kept, so the merge is deterministic
+        for dataset, data, unit_timings in _ordered_results(pool, units(), in_flight=4 * workers):
+            parts[dataset].append(data)
+            for stage, seconds in unit_timings.items():
+                timings[stage] += seconds
+    timings['features_wall'] = time.perf_counter() - t_start
+
+    t0 = time.perf_counter()
+    frames = {dataset: pd.concat(frames, ignore_index=True) for dataset, frames in parts.items()}
+    feature_cols = [col for col in next(iter(frames.values())).columns if col not in ('number', 'time', 'RUL')]
+
+    # one pass over all datasets to fit, one to transform (regimes from the unscaled settings)
+    scaler = IncrementalScaler(feature_cols)
+    keys = {dataset: operating_regime(data[regime_col]) if regime_col else None for dataset, data in frames.items()}
+    for dataset, data in frames.items():
+        scaler.partial_fit(data[feature_cols], keys=keys[dataset])
+    for dataset, data in frames.items():
+        data[feature_cols] = scaler.transform(data[feature_cols], keys=keys[dataset]).astype(data[feature_cols].dtypes.iloc[0], copy=False)
+    timings['scale'] = time.perf_counter() - t0
+    return frames, scaler, dict(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unit-parallel CMAPSS preprocessing")
+    parser.add_argument("paths", nargs="*", default=TRAIN_PATH, help="raw CMAPSS files (default: config.TRAIN_PATH)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--frac", type=float, default=0.5)
+    parser.add_argument("--by-regime", action="store_true", help="scale per operating regime of ops-set-1 (FD002/FD004)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="one feature store per dataset is written below this directory")
+    args = parser.parse_args()
+
+    frames, scaler, timings = preprocess_datasets(args.paths, n_jobs=args.jobs, window=args.window, frac=args.frac,
+                                                  regime_col='ops-set-1' if args.by_regime else None)
+
+    t0 = time.perf_counter()
+    os.makedirs(args.output, exist_ok=True)
+    for dataset, data in frames.items():
+        write_feature_store(data, os.path.join(args.output, dataset))
+    scaler.save(os.path.join(args.output, "scaler.json"))
+    timings['write'] = time.perf_counter() - t0
+
+    for dataset, data in frames.items():
+        print(f"{dataset}: {data['number'].nunique()} units, {len(data)} rows")
+    for stage, seconds in timings.items():
+        print(f"{stage:<14}: {seconds:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
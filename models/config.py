@@ -1,8 +1,10 @@
+import os
+
 TRAIN_PATH = [  
-    "Data\CMAPSSData\train_FD001.txt",
-    "Data\CMAPSSData\train_FD002.txt",
-    "Data\CMAPSSData\train_FD003.txt", 
-    "Data\CMAPSSData\train_FD004.txt"
+    os.path.join("Data", "CMAPSSData", "train_FD001.txt"),
+    os.path.join("Data", "CMAPSSData", "train_FD002.txt"),
+    os.path.join("Data", "CMAPSSData", "train_FD003.txt"), 
+    os.path.join("Data", "CMAPSSData", "train_FD004.txt")
 ]
 
 DROP_COLS_001 = [4, 3, 22, 23, 20, 19, 14, 9, 5, 10] # based on EDA (only done on train_fd001) these columns must be dropped
@@ -1,14 +1,20 @@
+import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import statsmodels.api as sm
-from sklearn.preprocessing import StandardScaler
-from statsmodels.nonparametric.smoothers_lowess import lowess
-
-train_path = "./notebooks/CMAPSSData/train_FD001.txt"
-standard_scaler = StandardScaler()
-train_data = pd.read_csv(train_path, delim_whitespace=True, header=None)
+from models.anomaly.pipeline.feature_rolling import add_rolling_features
+from models.anomaly.pipeline.feature_lowess import grouped_lowess_slope
+from models.anomaly.pipeline.normalizer import IncrementalScaler, RULLabeler, operating_regime
+from models.anomaly.data_loader import load_config, load_data
+from models.feature_store import write_feature_store
+from models.stage_cache import StageCache, hash_file
+from utils.instrumentation import RECORDER, stage
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+train_path = os.path.join(MODELS_DIR, "notebooks", "CMAPSSData", "train_FD001.txt")
+output_path = os.path.join(MODELS_DIR, "data_store") # columnar feature store, see feature_store.py
+cmapss_config_path = os.path.join(MODELS_DIR, "anomaly", "configs", "cmapss_config.yaml")
+cache_dir = os.path.join(MODELS_DIR, ".cache") # stage results, see stage_cache.py
+stages_log_path = os.path.join(MODELS_DIR, "logs", "data_stages.jsonl") # one json record per stage and run
 cols_to_dop = [4, 3, 22, 23, 20, 19, 14, 9, 5, 10]
 train_data_column = ['number', 'time', 'ops-set-1', 'sensor_6',
                      'sensor_7', 'sensor_8', 'sensor_11', 'sensor_12', 
@@ -17,57 +23,97 @@ train_data_column = ['number', 'time', 'ops-set-1', 'sensor_6',
 
 
 
-def process_data(data):
-    data = data.drop(cols_to_dop, axis=1)
-    data.columns = train_data_column
-    sensor_cols = data.columns[3:]
-
-    for sensor in sensor_cols:
-        # rolling rms calc.
-        data[f"{sensor}_rolling_rms"] = data[sensor].rolling(window=10).apply(lambda x: np.sqrt(np.mean(x**2)))
+def label_rul(data, labeler=None):
+    """RUL column from each unit's last cycle; pass the same labeler to label later batches"""
+    labeler = labeler if labeler is not None else RULLabeler()
+    data['RUL'], _ = labeler.update(data['number'].to_numpy(), data['time'].to_numpy())
+    return data
 
-    data = data.fillna(method='bfill') # repalcing NaNs caused due to rolling
+def rolling_features(data, window=10, tail=None):
+    """unscaled rolling rms of every sensor, with the sensor columns dropped (shared with batch_preprocess)"""
+    if 'number' not in data.columns:
+        # raw frame, not yet projected by the loader
+        data = data.drop(cols_to_dop, axis=1)
+        data.columns = train_data_column
+    sensor_cols = list(data.columns[3:])
+
+    # rolling rms calc. for all sensors at once, windows restricted to each unit
+    if tail is not None:
+        # windows at the start of the batch reach back into the unit's earlier batches
+        index = data.index
+        rows, new = tail.extend(data)
+        data = add_rolling_features(rows, sensor_cols, window=window, stats=("rms",), group_col='number')[new]
+        data.index = index
+    else:
+        data = add_rolling_features(data, sensor_cols, window=window, stats=("rms",), group_col='number')
+
+    # repalcing NaNs caused due to rolling (within each unit)
+    rms_cols = [f"{sensor}_rolling_rms" for sensor in sensor_cols]
+    data[rms_cols] = data.groupby('number')[rms_cols].bfill()
 
     original_cols = train_data_column[3:]
-    data = data.drop(original_cols, axis=1)
+    return data.drop(original_cols, axis=1)
+
+def process_data(data, window=10, scaler=None, labeler=None, regime_col=None, tail=None):
+    # scaler / labeler / tail (a RollingTail): continue from the statistics, last cycles and
+    # last window-1 rows of earlier batches, so a unit split across batches gets the rolling
+    # rms, scaling statistics and RUL it would get in one frame (rows of a batch are scaled
+    # with the statistics seen so far)
+    # regime_col: scale per operating regime of this setting column (FD002/FD004)
+    with stage("rolling features", rows=len(data)):
+        data = rolling_features(data, window=window, tail=tail)
 
     # scaling
-    features_to_scale = data.columns[2:]
-    data[features_to_scale] = standard_scaler.fit_transform(data[features_to_scale])
+    with stage("scaling", rows=len(data)):
+        features_to_scale = data.columns[2:]
+        scaler = scaler if scaler is not None else IncrementalScaler()
+        keys = operating_regime(data[regime_col]) if regime_col is not None else None
+        data[features_to_scale] = scaler.partial_fit_transform(data[features_to_scale], keys=keys)
 
     # RUL Labeling
-    max_cycle_per_unit = data.groupby('number')['time'].max()
-    data['max_cycle'] = data['number'].map(max_cycle_per_unit)
-
-    data['RUL'] = data['max_cycle'] - data['time']
-    data = data.drop(columns=['max_cycle'], axis=1)
+    data = label_rul(data, labeler)
 
     return data
 
-def apply_lowess_slope(group, sensor_cols):
-    for col in sensor_cols:
-        # apply lowess smoothing 
-        smoothed = lowess(endog=group[col], exog=group['time'], frac=0.5, return_sorted=False)
-
-        slope = np.gradient(smoothed)
-
-        group[f"{col}_lowess_slope"] = slope
-    return group
-
-def add_rolling_slope(data):
+def slope_features(data, frac=0.5):
+    """unscaled `{col}_lowess_slope` of every rms column appended (shared with batch_preprocess)"""
     sensor_cols = [col for col in data.columns if '_rms' in col]
 
-    data = data.groupby('number', group_keys=False).apply(lambda g: apply_lowess_slope(g, sensor_cols))
-
-    slope_cols = [col for col in data.columns if 'lowess_slope' in col]
-    data[slope_cols] = standard_scaler.fit_transform(data[slope_cols])
+    # one vectorized fit per unit for every rms column (rows are contiguous per unit)
+    slopes = grouped_lowess_slope(data[sensor_cols].to_numpy(), data['number'].to_numpy(),
+                                  x=data['time'].to_numpy(), frac=frac)
+    slope_cols = [f"{col}_lowess_slope" for col in sensor_cols]
+    slopes = pd.DataFrame(slopes.astype(data[sensor_cols[0]].dtype, copy=False), index=data.index, columns=slope_cols)
+    return pd.concat([data, slopes], axis=1)
+
+def add_rolling_slope(data, frac=0.5, scaler=None):
+    # scaler: continue from the statistics of earlier batches. The centred lowess fit
+    # spans each unit's rows in this frame only, so slopes of a unit split across
+    # batches differ near the seam (they need the unit's future cycles)
+    with stage("lowess", rows=len(data)):
+        data = slope_features(data, frac=frac)
+
+    slope_cols = [col for col in data.columns if col.endswith('_lowess_slope')]
+    with stage("scaling", rows=len(data)):
+        scaler = scaler if scaler is not None else IncrementalScaler()
+        data[slope_cols] = scaler.partial_fit_transform(data[slope_cols])
     # test
     return data
 
-print("processing data ...")
-data = process_data(train_data)
-print('adding rolling slope ...')
-data = add_rolling_slope(data)
-print('saving ...')
-data.to_csv('data.csv', index=False)
-
+if __name__ == "__main__":
+    RECORDER.configure(path=stages_log_path)
+    cache = StageCache(cache_dir)
+    config = load_config(cmapss_config_path)
+    config['data']['input_path'] = train_path
+    # typed columns, DROP_COLS_001 skipped while parsing
+    with stage("load", path=train_path) as record:
+        train_data = cache.run(load_data, config, input_key=hash_file(train_path))
+        record['rows'] = len(train_data)
+    with stage("process_data", rows=len(train_data)):
+        data = cache.run(process_data, train_data, window=10)
+    with stage("add_rolling_slope", rows=len(data)):
+        data = cache.run(add_rolling_slope, data, frac=0.5)
+    with stage("write feature store", rows=len(data)):
+        write_feature_store(data, output_path)
+    print(cache.report())
+    print(RECORDER.summary())
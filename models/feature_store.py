@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Columnar on-disk feature store.
+#
+# <store>/meta.json      columns, dtypes, row count and the unit index
+# <store>/<column>.npy   one array per column, rows sorted by (unit, cycle)
+#
+# Columns are opened with np.load(mmap_mode='r'), so reading a unit or a subset of
+# columns only touches those pages and nothing is parsed from text.
+
+META_FILE = "meta.json"
+
+
+def _column_file(path: str, col: str) -> str:
+    return os.path.join(path, f"{col}.npy")
+
+
+def write_feature_store(df: pd.DataFrame, path: str, unit_col: str = 'number', time_col: str = 'time') -> None:
+    """Persist a processed feature frame as one .npy file per column, keyed by unit and cycle."""
+    for col in (unit_col, time_col):
+        if col not in df.columns:
+            raise KeyError(f"feature store needs a '{col}' column")
+    non_numeric = [col for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])]
+    if non_numeric:
+        raise TypeError(f"only numeric columns can be stored, got {non_numeric}")
+
+    df = df.sort_values([unit_col, time_col], kind='stable')
+    units = df[unit_col].to_numpy()
+    bounds = np.concatenate([[0], np.flatnonzero(units[1:] != units[:-1]) + 1, [len(df)]])
+
+    meta = {
+        'n_rows': int(len(df)),
+        'unit_col': unit_col,
+        'time_col': time_col,
+        'columns': [str(col) for col in df.columns],
+        'dtypes': {str(col): str(df[col].dtype) for col in df.columns},
+        'units': [int(u) for u in units[bounds[:-1]]],
+        'offsets': [int(b) for b in bounds[:-1]],
+        'lengths': [int(b) for b in np.diff(bounds)],
+    }
+
+    # write next to the target and swap in at the end, so readers never see half a store
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for col in df.columns:
+        np.save(_column_file(tmp_path, str(col)), np.ascontiguousarray(df[col].to_numpy()))
+    with open(os.path.join(tmp_path, META_FILE), 'w') as f:
+        json.dump(meta, f)
+
+    # move the old store aside rather than deleting it first, so `path` is only
+    # missing between two renames; readers with open memmaps keep their pages
+    old_path = f"{path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def is_feature_store(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+class FeatureStore:
+    """
+    Read side of the feature store.
+
+    Example:
+        >>> store = FeatureStore("models/data_store")
+        >>> df = store.read(columns=['time', 'sensor_6_rolling_rms'])  # zero-copy memmaps
+        >>> unit_3 = store.unit(3)
+    """
+
+    def __init__(self, path: str):
+        if not is_feature_store(path):
+            raise FileNotFoundError(f"no feature store at {path}")
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.columns = self.meta['columns']
+        self.unit_col = self.meta['unit_col']
+        self.time_col = self.meta['time_col']
+        self.units = np.asarray(self.meta['units'])
+        self.offsets = np.asarray(self.meta['offsets'], dtype=np.int64)
+        self.lengths = np.asarray(self.meta['lengths'], dtype=np.int64)
+        self._unit_pos = {int(u): i for i, u in enumerate(self.units)}
+        self._arrays = {}
+
+    def __len__(self) -> int:
+        return self.meta['n_rows']
+
+    def column(self, col: str) -> np.ndarray:
+        """Read-only memory-mapped array of one column (opened lazily)."""
+        if col not in self._arrays:
+            if col not in self.columns:
+                raise KeyError(col)
+            self._arrays[col] = np.load(_column_file(self.path, col), mmap_mode='r')
+        return self._arrays[col]
+
+    def unit_slice(self, unit) -> slice:
+        """Row range of one unit."""
+        pos = self._unit_pos[int(unit)]
+        start = int(self.offsets[pos])
+        return slice(start, start + int(self.lengths[pos]))
+
+    def read(self, columns: list | None = None, units: list | None = None) -> pd.DataFrame:
+        """
+        Frame over the requested columns and units.
+
+        Without `units` (or with a single unit) the columns are memmap views, no data is copied.
+        """
+        columns = list(columns) if columns is not None else self.columns
+        if units is None:
+            rows = slice(0, len(self))
+        elif len(units) == 1:
+            rows = self.unit_slice(units[0])
+        else:
+            rows = np.concatenate([np.arange(s.start, s.stop) for s in map(self.unit_slice, units)])
+        return pd.DataFrame({col: self.column(col)[rows] for col in columns}, copy=False)
+
+    def unit(self, unit, columns: list | None = None) -> pd.DataFrame:
+        return self.read(columns=columns, units=[unit])
+
+
+def load_feature_frame(path: str, columns: list | None = None) -> pd.DataFrame:
+    """Open a feature store, or parse a CSV when `path` is a file (the old data.csv)."""
+    if is_feature_store(path):
+        return FeatureStore(path).read(columns=columns)
+    return pd.read_csv(path, usecols=columns)
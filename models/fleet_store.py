@@ -0,0 +1,268 @@
+import numpy as np
+import pandas as pd
+
+# Compact in-memory store of the fleet's time series.
+#
+# values[c] is one contiguous float32 array per column; the rows of a unit are the
+# range offsets[i] : offsets[i] + lengths[i] of every column (CSR-style index,
+# grouped by unit). A unit's window is therefore a slice, and
+#
+#   store.window(unit, stop, N)          # [C, N] view, the layout freq_matrix expects
+#   store.unit(3).row(k)                 # [C] view of one cycle
+#   store.matrix(feature_cols)           # [rows, F] view for row-by-row predict
+#
+# copy nothing (matrix() only while the columns are adjacent: from_frame() stores the
+# RUL label last for that). append() adds rows in bulk: each unit keeps spare room after its rows
+# and moves to the end of the arrays with 1.5x the room when it runs out (amortised
+# O(1) per row, like a list). The gaps left behind are closed whenever the arrays
+# would otherwise grow; compact() also drops the spare room.
+
+LABEL_COLS = ('RUL',)  # moved behind the features by from_frame()
+
+
+class UnitHandle:
+    """One unit of a FleetStore; stays valid when the unit is moved by append()/compact()."""
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: "FleetStore", index: int):
+        self.store = store
+        self.index = index
+
+    @property
+    def unit(self):
+        return self.store.unit_ids[self.index]
+
+    @property
+    def offset(self) -> int:
+        return int(self.store.offsets[self.index])
+
+    def __len__(self) -> int:
+        return int(self.store.lengths[self.index])
+
+    @property
+    def values(self) -> np.ndarray:
+        """[C, length] view of all columns"""
+        return self.store.values[:, self.offset:self.offset + len(self)]
+
+    def column(self, col: str) -> np.ndarray:
+        return self.store.values[self.store.column_index(col), self.offset:self.offset + len(self)]
+
+    def row(self, k: int) -> np.ndarray:
+        if not -len(self) <= k < len(self):
+            raise IndexError(f"unit {self.unit} has {len(self)} rows")
+        return self.store.values[:, self.offset + k % len(self)]
+
+    def window(self, stop: int, size: int, columns: list | None = None) -> np.ndarray:
+        """[C, size] rows stop-size .. stop-1 of the unit (a view if the columns are adjacent)"""
+        if not 0 < size <= stop <= len(self):
+            raise IndexError(f"window [{stop - size}, {stop}) outside unit {self.unit} with {len(self)} rows")
+        start = self.offset + stop - size
+        return self.store._columns(columns)[:, start:start + size] if columns is not None \
+            else self.store.values[:, start:start + size]
+
+    def __repr__(self) -> str:
+        return f"UnitHandle(unit={self.unit!r}, rows={len(self)})"
+
+
+class FleetStore:
+    """
+    float32 column arrays of every unit with a per-unit offset/length index.
+
+    Parameters:
+        columns: names of the stored columns (the unit id is kept in the index, and
+                 also as a column if it is listed here)
+        capacity: initial rows of the backing arrays
+        dtype: storage dtype of all columns
+
+    Example:
+        >>> store = FleetStore.from_frame(load_feature_frame("models/data_store"))
+        >>> frame = store.window(unit=3, stop=120, size=30, columns=sensor_cols)   # zero-copy [C, 30]
+        >>> store.append(batch['number'], batch[store.columns])                   # new cycles, new units
+    """
+
+    def __init__(self, columns: list, capacity: int = 1024, dtype=np.float32):
+        self.columns = list(columns)
+        self._col = {col: i for i, col in enumerate(self.columns)}
+        self.values = np.zeros((len(self.columns), max(capacity, 1)), dtype=dtype)
+        self.unit_ids = []
+        self._unit_pos = {}
+        self.offsets = np.zeros(16, dtype=np.int64)
+        self.lengths = np.zeros(16, dtype=np.int64)
+        self.capacities = np.zeros(16, dtype=np.int64)
+        self._end = 0  # first unreserved row
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, unit_col: str = 'number', columns: list | None = None,
+                   dtype=np.float32, label_cols=LABEL_COLS) -> "FleetStore":
+        """
+        Exact-size store of a frame; rows keep their order within each unit.
+
+        Label columns (RUL) are stored after all others: process_data writes RUL
+        between the rolling rms and the lowess slope columns, and a feature block
+        with a column in the middle is gathered (copied) by matrix() instead of sliced.
+        """
+        columns = list(columns) if columns is not None else list(df.columns)
+        columns = [col for col in columns if col not in label_cols] + [col for col in columns if col in label_cols]
+        units = df[unit_col].to_numpy()
+        order = None
+        if len(units) > 1 and np.any(units[1:] < units[:-1]):
+            order = np.argsort(units, kind='stable')
+            units = units[order]
+        store = cls(columns, capacity=len(df), dtype=dtype)
+        for i, col in enumerate(columns):
+            column = df[col].to_numpy()
+            store.values[i] = column if order is None else column[order]  # one column at a time, cast on copy
+
+        bounds = np.concatenate([[0], np.flatnonzero(units[1:] != units[:-1]) + 1, [len(units)]]) if len(units) \
+            else np.zeros(1, dtype=np.int64)
+        n = len(bounds) - 1
+        store._reserve_units(n)
+        store.unit_ids = units[bounds[:-1]].tolist()
+        store._unit_pos = {unit: i for i, unit in enumerate(store.unit_ids)}
+        store.offsets[:n] = bounds[:-1]
+        store.lengths[:n] = np.diff(bounds)
+        store.capacities[:n] = np.diff(bounds)
+        store._end = len(units)
+        return store
+
+    def __len__(self) -> int:
+        """rows stored"""
+        return int(self.lengths[:self.n_units].sum())
+
+    @property
+    def n_units(self) -> int:
+        return len(self.unit_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """backing arrays, spare room included"""
+        return self.values.nbytes + self.offsets.nbytes + self.lengths.nbytes + self.capacities.nbytes
+
+    @property
+    def is_compact(self) -> bool:
+        return self._end == len(self)
+
+    def column_index(self, col: str) -> int:
+        return self._col[col]
+
+    def _columns(self, columns: list) -> np.ndarray:
+        # adjacent columns stay a view, anything else is gathered
+        idx = [self._col[col] for col in columns]
+        if idx == list(range(idx[0], idx[0] + len(idx))):
+            return self.values[idx[0]:idx[0] + len(idx)]
+        return self.values[idx]
+
+    def unit(self, unit) -> UnitHandle:
+        return UnitHandle(self, self._unit_pos[unit])
+
+    def __iter__(self):
+        return (UnitHandle(self, i) for i in range(self.n_units))
+
+    def __contains__(self, unit) -> bool:
+        return unit in self._unit_pos
+
+    def window(self, unit, stop: int, size: int, columns: list | None = None) -> np.ndarray:
+        return self.unit(unit).window(stop, size, columns)
+
+    def matrix(self, columns: list | None = None) -> np.ndarray:
+        """
+        [rows, C] view over the stored rows in unit order (row r is column r of the arrays).
+
+        Only valid on a compact store; call compact() after appending to existing units.
+        """
+        if not self.is_compact:
+            raise ValueError("store has spare room between units, compact() it first")
+        values = self._columns(columns) if columns is not None else self.values
+        return values[:, :self._end].T
+
+    def _reserve_units(self, n: int):
+        if n > len(self.offsets):
+            size = max(n, 2 * len(self.offsets))
+            self.offsets = np.resize(self.offsets, size)
+            self.lengths = np.resize(self.lengths, size)
+            self.capacities = np.resize(self.capacities, size)
+
+    def _reserve_rows(self, n: int) -> int:
+        if self._end + n > self.values.shape[1]:
+            reserved = int(self.capacities[:self.n_units].sum())
+            if self._end - reserved > reserved // 2:
+                # a third of the arrays lost to moved units: close the gaps before growing
+                self._repack(keep_room=True)
+        if self._end + n > self.values.shape[1]:
+            grown = np.zeros((len(self.columns), max(self._end + n, self.values.shape[1] * 3 // 2)), dtype=self.values.dtype)
+            grown[:, :self._end] = self.values[:, :self._end]
+            self.values = grown
+        start = self._end
+        self._end += n
+        return start
+
+    def append(self, units, rows) -> "FleetStore":
+        """
+        Add rows of any units, new or known, in one call.
+
+        `rows` is [n, C] (a DataFrame with the store's columns, or an array in that
+        order); within a unit the rows are appended in the given order. Views taken
+        before a call may no longer reflect the unit afterwards.
+        """
+        if isinstance(rows, pd.DataFrame):
+            rows = rows[self.columns]
+        values = np.asarray(rows, dtype=self.values.dtype)
+        units = np.asarray(units)
+        if values.ndim != 2 or values.shape[1] != len(self.columns) or len(values) != len(units):
+            raise ValueError(f"expected {len(units)} rows of {len(self.columns)} columns, got {values.shape}")
+        order = np.argsort(units, kind='stable')
+        unique, starts = np.unique(units[order], return_index=True)
+        bounds = np.append(starts, len(units))
+
+        for unit, begin, end in zip(unique.tolist(), bounds[:-1], bounds[1:]):
+            n = int(end - begin)
+            i = self._unit_pos.get(unit)
+            if i is None:
+                i = self._unit_pos[unit] = self.n_units
+                self._reserve_units(i + 1)
+                self.unit_ids.append(unit)
+                self.offsets[i] = self._reserve_rows(n)
+                self.lengths[i] = 0
+                self.capacities[i] = n
+            elif self.lengths[i] + n > self.capacities[i]:
+                # out of room: move the unit to the end with 1.5x the room
+                capacity = max(int(self.capacities[i]) * 3 // 2, int(self.lengths[i]) + n)
+                start = self._reserve_rows(capacity)
+                old, length = int(self.offsets[i]), int(self.lengths[i])
+                self.values[:, start:start + length] = self.values[:, old:old + length]
+                self.offsets[i] = start
+                self.capacities[i] = capacity
+            tail = int(self.offsets[i] + self.lengths[i])
+            self.values[:, tail:tail + n] = values[order[begin:end]].T
+            self.lengths[i] += n
+        return self
+
+    def _repack(self, keep_room: bool):
+        # units back to back in insertion order, with or without their spare room
+        n = self.n_units
+        lengths = self.lengths[:n].copy()
+        sizes = self.capacities[:n].copy() if keep_room else lengths
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64) if n else np.zeros(0, dtype=np.int64)
+        total = int(sizes.sum())
+        values = np.zeros((len(self.columns), max(total, 1)), dtype=self.values.dtype)
+        for i in range(n):
+            src, dst, length = int(self.offsets[i]), int(offsets[i]), int(lengths[i])
+            values[:, dst:dst + length] = self.values[:, src:src + length]
+        self.values = values
+        self.offsets[:n] = offsets
+        self.capacities[:n] = sizes
+        self._end = total
+
+    def compact(self) -> "FleetStore":
+        """drop spare room: units back to back in insertion order, exact-size arrays"""
+        self._repack(keep_room=False)
+        return self
+
+    def to_frame(self, unit_col: str = 'number') -> pd.DataFrame:
+        """pandas copy, units in insertion order (unit column added if it is not stored)"""
+        rows = np.concatenate([np.arange(h.offset, h.offset + len(h)) for h in self]) if self.n_units \
+            else np.zeros(0, dtype=np.int64)
+        frame = pd.DataFrame({col: self.values[i, rows] for i, col in enumerate(self.columns)})
+        if unit_col not in frame.columns:
+            frame.insert(0, unit_col, np.repeat(self.unit_ids, self.lengths[:self.n_units]))
+        return frame
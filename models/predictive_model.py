@@ -1,8 +1,176 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import joblib
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import GroupKFold
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+
+from models.feature_store import is_feature_store, load_feature_frame
+
+# RUL model training.
+#
+# Reads the processed feature set (feature store written by models/data.py, or a
+# CSV), cross-validates each candidate with GroupKFold over units so cycles of one
+# engine never end up on both sides of a split, refits the chosen model on all units
+# and exports it where the dashboard loads it from.
+#
+#   python -m models.predictive_model --models rf hgb --jobs 8
+#   python -m models.predictive_model --models hgb --compress 3
+#   python -m models.predictive_model --compare   # size and load time of every candidate
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA = os.path.join(MODELS_DIR, "data_store")
+DEFAULT_MODEL_PATH = os.path.join(MODELS_DIR, "model_file_name.joblib")
+NON_FEATURE_COLS = ['number', 'time', 'RUL']
+MODEL_KINDS = ('rf', 'hgb')
+
+
+def load_training_data(path: str = DEFAULT_DATA) -> tuple[pd.DataFrame, pd.Series, np.ndarray]:
+    """float32 features, RUL target and unit ids of the processed data"""
+    data = load_feature_frame(path) if is_feature_store(path) else pd.read_csv(path)
+    feature_cols = [col for col in data.columns if col not in NON_FEATURE_COLS]
+    # float32 up front: the forest casts to float32 internally anyway, this avoids the copy
+    X = data[feature_cols].astype(np.float32)
+    return X, data['RUL'], data['number'].to_numpy()
+
+
+def make_model(kind: str, n_jobs: int | None = None, random_state: int = 42, **params):
+    """
+    Parameters:
+        kind: 'rf' (RandomForestRegressor, trees fitted in parallel on n_jobs cores) or
+            'hgb' (HistGradientBoostingRegressor, multithreaded through OpenMP)
+        params: passed on to the estimator
+    """
+    if kind == 'rf':
+        params = {'n_estimators': 100, 'min_samples_leaf': 2, **params}
+        return RandomForestRegressor(n_jobs=n_jobs, random_state=random_state, **params)
+    if kind == 'hgb':
+        params = {'max_iter': 300, 'learning_rate': 0.1, **params}
+        return HistGradientBoostingRegressor(random_state=random_state, **params)
+    raise ValueError(f"Unknown model kind '{kind}', use one of {MODEL_KINDS}")
+
+
+def cross_validate(kind: str, X: pd.DataFrame, y: pd.Series, groups: np.ndarray, n_splits: int = 5,
+                   n_jobs: int | None = None, **params) -> dict:
+    """RMSE/MAE per fold and mean fit time, with units kept whole in each fold."""
+    rmse, mae, fit_seconds = [], [], []
+    for train_idx, test_idx in GroupKFold(n_splits=n_splits).split(X, y, groups):
+        model = make_model(kind, n_jobs=n_jobs, **params)
+        t0 = time.perf_counter()
+        model.fit(X.iloc[train_idx], y.iloc[train_idx])
+        fit_seconds.append(time.perf_counter() - t0)
+        error = model.predict(X.iloc[test_idx]) - y.iloc[test_idx].to_numpy()
+        rmse.append(float(np.sqrt(np.mean(error ** 2))))
+        mae.append(float(np.mean(np.abs(error))))
+    return {'rmse': float(np.mean(rmse)), 'rmse_folds': rmse, 'mae': float(np.mean(mae)), 'fit_seconds': float(np.mean(fit_seconds))}
+
+
+def export_model(model, path: str, feature_cols: list, compress: int = 0, metadata: dict | None = None) -> dict:
+    """
+    Dump the model with joblib and its feature columns to a json file next to it.
+
+    compress=0 keeps the tree arrays uncompressed so joblib.load(path, mmap_mode='r')
+    maps them instead of reading them; compress>0 (zlib level) is smaller on disk but
+    has to be decompressed into memory on load.
+
+    Returns size on disk and load times.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    joblib.dump(model, path, compress=compress)
+    with open(os.path.splitext(path)[0] + ".json", 'w') as f:
+        json.dump({'feature_cols': list(feature_cols), 'compress': compress, **(metadata or {})}, f, indent=2)
+    return footprint(path, compress)
+
+
+def footprint(path: str, compress: int = 0) -> dict:
+    """size on disk and load times of a dumped model"""
+    report = {'size_mb': os.path.getsize(path) / 2**20}
+    t0 = time.perf_counter()
+    joblib.load(path)
+    report['load_seconds'] = time.perf_counter() - t0
+    if not compress:
+        t0 = time.perf_counter()
+        joblib.load(path, mmap_mode='r')
+        report['load_mmap_seconds'] = time.perf_counter() - t0
+    return report
+
+
+def fit_final(kind: str, X: pd.DataFrame, y: pd.Series, n_jobs: int | None = -1):
+    """model of this kind fitted on all units, and its fit time"""
+    model = make_model(kind, n_jobs=n_jobs)
+    t0 = time.perf_counter()
+    model.fit(X, y)
+    seconds = time.perf_counter() - t0
+    # the forest's worker count is not needed for single-row scoring on the dashboard
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = None
+    return model, seconds
+
+
+def train(data_path: str = DEFAULT_DATA, kinds=MODEL_KINDS, model_path: str = DEFAULT_MODEL_PATH,
+          n_splits: int = 5, n_jobs: int | None = -1, compress: int = 0, select: str = 'best',
+          compare: bool = False) -> dict:
+    """
+    Cross-validate every model kind, refit the selected one ('best' = lowest CV RMSE)
+    on all units and export it. Returns the per-kind report.
+
+    compare: also refit the other kinds on all units and dump them to a temporary
+    directory, so every kind's report has its size on disk and load times.
+    """
+    if select != 'best' and select not in kinds:
+        kinds = list(kinds) + [select]
+    X, y, groups = load_training_data(data_path)
+    report = {}
+    for kind in kinds:
+        report[kind] = cross_validate(kind, X, y, groups, n_splits=n_splits, n_jobs=n_jobs)
+
+    chosen = min(report, key=lambda kind: report[kind]['rmse']) if select == 'best' else select
+    model, report[chosen]['final_fit_seconds'] = fit_final(chosen, X, y, n_jobs=n_jobs)
+    report[chosen].update(export_model(model, model_path, list(X.columns), compress=compress,
+                                       metadata={'kind': chosen, 'cv_rmse': report[chosen]['rmse']}))
+
+    if compare:
+        with tempfile.TemporaryDirectory() as tmp:
+            for kind in kinds:
+                if kind == chosen:
+                    continue
+                other, report[kind]['final_fit_seconds'] = fit_final(kind, X, y, n_jobs=n_jobs)
+                path = os.path.join(tmp, f"{kind}.joblib")
+                joblib.dump(other, path, compress=compress)
+                report[kind].update(footprint(path, compress))
+    report['chosen'] = chosen
+    return report
+
 
+def main():
+    parser = argparse.ArgumentParser(description="Train and export the RUL model")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="feature store directory or CSV")
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--models", nargs="+", default=list(MODEL_KINDS), choices=MODEL_KINDS)
+    parser.add_argument("--select", default='best', choices=('best',) + MODEL_KINDS, help="model to export")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="cores for the random forest (-1: all)")
+    parser.add_argument("--compress", type=int, default=0, help="joblib zlib level, 0 keeps the model mmap-able")
+    parser.add_argument("--compare", action="store_true", help="also refit and dump the other models for their size and load time")
+    args = parser.parse_args()
 
+    report = train(args.data, kinds=args.models, model_path=args.output, n_splits=args.folds,
+                   n_jobs=args.jobs, compress=args.compress, select=args.select, compare=args.compare)
+    chosen = report.pop('chosen')
+    for kind, r in report.items():
+        line = f"{kind:<4} cv rmse {r['rmse']:7.2f}  mae {r['mae']:7.2f}  fit {r['fit_seconds']:6.2f} s/fold"
+        if 'size_mb' in r:
+            line += f"  {r['size_mb']:7.1f} MiB  load {r['load_seconds']:.2f} s"
+            if 'load_mmap_seconds' in r:
+                line += f", mmap load {r['load_mmap_seconds']:.2f} s"
+        print(line)
+    print(f"exported {chosen} to {args.output}")
 
 
+if __name__ == "__main__":
+    main()
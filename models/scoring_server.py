@@ -0,0 +1,381 @@
+import argparse
+import http.client
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Headless RUL scoring service.
+#
+# The model is loaded once and shared by every client over a small JSON API, on
+# TCP or on a Unix socket:
+#
+#   POST /predict   {"rows": [[...], ...], "columns": [...]}  ->  {"rul": [...]}
+#   GET  /stats     request/row/batch counters, latency percentiles, throughput
+#   GET  /health
+#
+# "columns" is optional; when given, the rows are reordered to the model's
+# feature order. Requests that arrive within `max_wait_ms` of each other are
+# concatenated and scored with one predict call.
+#
+#   python main.py --serve --port 8765
+#   python -m models.scoring_server --socket /tmp/rul.sock --mmap
+
+DEFAULT_MODEL_PATH = "./models/model_file_name.joblib"
+DEFAULT_PORT = 8765
+
+
+class ServerStats:
+    """thread-safe counters and a window of recent request latencies"""
+
+    def __init__(self, window: int = 10_000):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=window)
+        self._batch_rows = deque(maxlen=window)
+
+    def record_request(self, n_rows: int, seconds: float):
+        with self._lock:
+            self.requests += 1
+            self.rows += n_rows
+            self._latencies.append(seconds)
+
+    def record_batch(self, n_rows: int):
+        with self._lock:
+            self.batches += 1
+            self._batch_rows.append(n_rows)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            uptime = time.time() - self.started
+            stats = {
+                'uptime_s': uptime,
+                'requests': self.requests,
+                'rows': self.rows,
+                'batches': self.batches,
+                'errors': self.errors,
+                'rows_per_s': self.rows / uptime if uptime > 0 else 0.0,
+                'mean_batch_rows': float(np.mean(self._batch_rows)) if self._batch_rows else 0.0,
+            }
+        for p in (50, 90, 99):
+            stats[f'latency_p{p}_ms'] = float(np.percentile(latencies, p)) if len(latencies) else None
+        return stats
+
+
+class _Job:
+    __slots__ = ('rows', 'result', 'error', 'done')
+
+    def __init__(self, rows: np.ndarray):
+        self.rows = rows
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Collects requests for up to `max_wait_ms` (or `max_rows` rows) and scores them
+    with a single predict call on one background thread.
+    """
+
+    def __init__(self, predict, stats: ServerStats, max_wait_ms: float = 2.0, max_rows: int = 4096):
+        self.predict = predict
+        self.stats = stats
+        self.max_wait = max_wait_ms / 1000
+        self.max_rows = max_rows
+        self._pending = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, rows: np.ndarray) -> np.ndarray:
+        job = _Job(rows)
+        self._pending.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def close(self):
+        self._pending.put(None)
+        self._thread.join()
+
+    def _collect(self, first: _Job) -> list:
+        jobs = [first]
+        n_rows = len(first.rows)
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                job = self._pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                self._pending.put(None)  # finish this batch, stop on the next get
+                break
+            jobs.append(job)
+            n_rows += len(job.rows)
+        return jobs
+
+    def _run(self):
+        while True:
+            job = self._pending.get()
+            if job is None:
+                return
+            jobs = self._collect(job)
+            # one predict per row width: a request with the wrong number of features
+            # fails on its own instead of breaking the concatenation for everyone
+            groups = {}
+            for j in jobs:
+                groups.setdefault(j.rows.shape[1:], []).append(j)
+            for group in groups.values():
+                self._score(group)
+            for j in jobs:
+                j.done.set()
+
+    def _score(self, jobs: list):
+        try:
+            rul = np.asarray(self.predict(np.concatenate([j.rows for j in jobs])), dtype=np.float64)
+            for j, part in zip(jobs, np.split(rul, np.cumsum([len(j.rows) for j in jobs])[:-1])):
+                j.result = part
+            self.stats.record_batch(len(rul))
+        except Exception as e:
+            for j in jobs:
+                j.error = e
+
+
+def load_model(path: str = DEFAULT_MODEL_PATH, mmap: bool = False):
+    """model and its feature column order (None if the model was fitted on plain arrays)"""
+    import joblib  # not needed by the client side (main.py, the dashboard)
+    t0 = time.perf_counter()
+    model = joblib.load(path, mmap_mode='r' if mmap else None)
+    feature_cols = getattr(model, 'feature_names_in_', None)
+    logging.info(f"loaded {path} in {time.perf_counter() - t0:.2f} s")
+    return model, (list(feature_cols) if feature_cols is not None else None)
+
+
+def make_predict(model, feature_cols: list | None):
+    import pandas as pd
+    def predict(rows: np.ndarray) -> np.ndarray:
+        # the forest was fitted on a DataFrame, keep the names to match its input check
+        if feature_cols is not None:
+            return model.predict(pd.DataFrame(rows, columns=feature_cols))
+        return model.predict(rows)
+    return predict
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, clients reuse one connection
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _rows(self, payload: dict) -> np.ndarray:
+        rows = np.asarray(payload['rows'], dtype=np.float64)
+        if rows.ndim == 1:
+            rows = rows[None, :]
+        feature_cols = self.server.feature_cols
+        n_features = len(feature_cols) if feature_cols is not None else self.server.n_features
+        if rows.ndim != 2:
+            raise ValueError(f"expected rows of {n_features or 'n'} features, got shape {rows.shape}")
+        columns = payload.get('columns')
+        if columns is not None and feature_cols is not None:
+            if len(columns) != rows.shape[1]:
+                raise ValueError(f"{len(columns)} column names for rows of {rows.shape[1]} values")
+            missing = [col for col in feature_cols if col not in columns]
+            if missing:
+                raise ValueError(f"missing feature columns: {missing}")
+            rows = rows[:, [columns.index(col) for col in feature_cols]]
+        if n_features is not None and rows.shape[1] != n_features:
+            raise ValueError(f"expected rows of {n_features} features, got shape {rows.shape}")
+        return rows
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.server.stats.snapshot())
+        elif self.path == "/health":
+            self._send_json(200, {'status': 'ok', 'features': self.server.feature_cols})
+        else:
+            self._send_json(404, {'error': f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {'error': f"unknown path {self.path}"})
+            return
+        t0 = time.perf_counter()
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            rows = self._rows(payload)
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            self.server.stats.record_error()
+            self._send_json(400, {'error': str(e)})
+            return
+        try:
+            rul = self.server.batcher.submit(rows)
+        except Exception as e:
+            self.server.stats.record_error()
+            logging.exception("predict failed")
+            self._send_json(500, {'error': str(e)})
+            return
+        self.server.stats.record_request(len(rows), time.perf_counter() - t0)
+        self._send_json(200, {'rul': rul.tolist()})
+
+    def address_string(self):
+        # unix socket clients have no (host, port)
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+class TCPHTTPServer(ThreadingHTTPServer):
+    request_queue_size = 128  # listen backlog, the default of 5 refuses bursts of clients
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def make_server(model, feature_cols: list | None, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                unix_socket: str | None = None, max_wait_ms: float = 2.0, max_rows: int = 4096):
+    """HTTP server on host:port, or on `unix_socket` if given; call serve_forever() on it"""
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = UnixHTTPServer(unix_socket, ScoringHandler)
+    else:
+        server = TCPHTTPServer((host, port), ScoringHandler)
+    server.feature_cols = feature_cols
+    # models fitted on plain arrays still know their width, checked per request
+    server.n_features = getattr(model, 'n_features_in_', None)
+    server.stats = ServerStats()
+    server.batcher = MicroBatcher(make_predict(model, feature_cols), server.stats, max_wait_ms=max_wait_ms, max_rows=max_rows)
+    return server
+
+
+def serve(model_path: str = DEFAULT_MODEL_PATH, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+          unix_socket: str | None = None, mmap: bool = False, max_wait_ms: float = 2.0):
+    model, feature_cols = load_model(model_path, mmap=mmap)
+    server = make_server(model, feature_cols, host=host, port=port, unix_socket=unix_socket, max_wait_ms=max_wait_ms)
+    print(f"scoring server on {unix_socket or f'http://{host}:{port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float = 30):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class ScoringClient:
+    """
+    Client of the scoring server with a model-like predict(), so it can stand in
+    for the joblib model in the dashboard.
+
+    Example:
+        >>> model = ScoringClient("http://127.0.0.1:8765")   # or ScoringClient(unix_socket="/tmp/rul.sock")
+        >>> rul = model.predict(features_df)
+    """
+
+    def __init__(self, url: str | None = None, unix_socket: str | None = None, timeout: float = 30):
+        self.url = url
+        self.unix_socket = unix_socket
+        self.timeout = timeout
+        self._local = threading.local()  # one keep-alive connection per thread
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.unix_socket:
+                conn = _UnixHTTPConnection(self.unix_socket, timeout=self.timeout)
+            else:
+                host = self.url.split("://", 1)[-1].rstrip("/")
+                conn = http.client.HTTPConnection(host, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method: str, path: str, payload: dict | None = None) -> dict:
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        conn = self._connection()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            result = json.loads(response.read())
+        except Exception:
+            # timeouts and socket errors included: a half-read response must never be
+            # read by the next request, it gets a fresh connection instead
+            conn.close()
+            self._local.conn = None
+            raise
+        if response.status != 200:
+            raise RuntimeError(f"scoring server: {response.status} {result.get('error')}")
+        return result
+
+    def predict(self, X) -> np.ndarray:
+        if hasattr(X, 'columns'):  # DataFrame, without importing pandas here
+            payload = {'rows': X.to_numpy(dtype=np.float64).tolist(), 'columns': [str(col) for col in X.columns]}
+        else:
+            payload = {'rows': np.asarray(X, dtype=np.float64).tolist()}
+        return np.asarray(self._request("POST", "/predict", payload)['rul'])
+
+    def stats(self) -> dict:
+        return self._request("GET", "/stats")
+
+
+def add_server_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="joblib model file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", default=None, help="serve on this Unix socket instead of TCP")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the model arrays (joblib mmap_mode='r')")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="micro-batching window")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless RUL scoring server")
+    add_server_args(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    serve(args.model, host=args.host, port=args.port, unix_socket=args.socket, mmap=args.mmap, max_wait_ms=args.max_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
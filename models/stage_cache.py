@@ -0,0 +1,240 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import time
+import weakref
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Content-addressed cache for preprocessing stages.
+#
+# A stage result is stored under sha256(stage name, source of the stage and of the repo
+# modules it uses, input content, params by value).
+# Results that come out of the cache remember their own key, so a downstream stage
+# fed with them is keyed without rehashing the data: changing one stage's parameters
+# only invalidates that stage and the ones after it.
+
+DEFAULT_MAX_BYTES = 1 << 30  # 1 GiB
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """sha256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _repo_module(obj):
+    # the module of a function / class / module defined in this repo, else None
+    module = obj if inspect.ismodule(obj) else inspect.getmodule(obj)
+    path = getattr(module, '__file__', None)
+    if path and os.path.abspath(path).startswith(REPO_ROOT + os.sep):
+        return module
+    return None
+
+
+def _dependencies(func, extra=()) -> list:
+    """repo modules of the stage, of the repo objects it refers to, and of theirs, transitively"""
+    modules, todo = {}, [func, *extra]
+    names = getattr(getattr(func, '__code__', None), 'co_names', ())
+    todo += [func.__globals__[n] for n in names if n in getattr(func, '__globals__', {})]
+    while todo:
+        module = _repo_module(todo.pop())
+        if module is None or module.__name__ in modules:
+            continue
+        modules[module.__name__] = module
+        todo += [v for v in vars(module).values() if inspect.ismodule(v) or inspect.isfunction(v) or inspect.isclass(v)]
+    return [modules[name] for name in sorted(modules)]
+
+
+def _func_fingerprint(func, depends=(), version=None) -> str:
+    # source of the stage and of every repo module it depends on (the helpers it calls),
+    # so editing a stage or a helper invalidates its results; `version` bumps it by hand
+    digest = hashlib.sha256(f"{getattr(func, '__qualname__', repr(func))}:{version}".encode())
+    try:
+        digest.update(inspect.getsource(func).encode())
+    except (OSError, TypeError):
+        pass
+    for module in _dependencies(func, depends):
+        with open(module.__file__, 'rb') as f:
+            digest.update(module.__name__.encode())
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _stateful(value) -> bool:
+    # objects whose attributes a stage may update, e.g. IncrementalScaler / RULLabeler
+    return hasattr(value, '__dict__') and not inspect.isroutine(value) and not inspect.isclass(value) \
+        and not inspect.ismodule(value) and not isinstance(value, (pd.DataFrame, pd.Series, np.ndarray))
+
+
+class StageCache:
+    """
+    On-disk cache of stage results with size-based LRU eviction.
+
+    Example:
+        >>> cache = StageCache("models/.cache")
+        >>> data = cache.run(process_data, raw, window=10)
+        >>> data = cache.run(add_rolling_slope, data, frac=0.5)   # keyed on process_data's key
+        >>> print(cache.report())
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self.stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'seconds_computing': 0.0, 'seconds_loading': 0.0})
+        # id(result) -> (weakref to result, key): results we produced or loaded
+        self._origins = {}
+
+    # ---- hashing
+
+    def content_key(self, obj) -> str:
+        """Content hash of a stage input; results produced by this cache reuse their key."""
+        origin = self._origins.get(id(obj))
+        if origin is not None and origin[0]() is obj:
+            return origin[1]
+
+        digest = hashlib.sha256()
+        if isinstance(obj, pd.DataFrame):
+            digest.update(json.dumps([[str(c), str(t)] for c, t in obj.dtypes.items()]).encode())
+            digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+        elif isinstance(obj, pd.Series):
+            digest.update(f"{obj.name}:{obj.dtype}".encode())
+            digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+        elif isinstance(obj, np.ndarray):
+            digest.update(f"{obj.dtype}:{obj.shape}".encode())
+            digest.update(np.ascontiguousarray(obj).tobytes())
+        else:
+            digest.update(json.dumps(self.state(obj), sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def state(self, obj):
+        """JSON-able identity of a parameter: its content, never its memory address"""
+        if obj is None or isinstance(obj, (bool, int, float, str)):
+            return obj
+        if isinstance(obj, (pd.DataFrame, pd.Series, np.ndarray)):
+            return {'content': self.content_key(obj)}
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, dict):
+            return {'dict': sorted([json.dumps(self.state(k), sort_keys=True), self.state(v)] for k, v in obj.items())}
+        if isinstance(obj, (list, tuple, set, frozenset)):
+            items = [self.state(v) for v in obj]
+            if isinstance(obj, (set, frozenset)):
+                items = sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+            return {type(obj).__name__: items}
+        if inspect.isroutine(obj) or inspect.isclass(obj):
+            return {'callable': f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"}
+        if _stateful(obj):
+            return {'type': f"{type(obj).__module__}.{type(obj).__qualname__}", 'state': self.state(vars(obj))}
+        return {'repr': repr(obj)}
+
+    def key(self, name: str, func, input_keys: list, params: dict, depends=(), version=None) -> str:
+        payload = json.dumps({
+            'stage': name,
+            'source': _func_fingerprint(func, depends, version),
+            'inputs': input_keys,
+            'params': self.state(params),
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    # ---- storage
+
+    def _path(self, name: str, key: str) -> str:
+        return os.path.join(self.root, f"{name}-{key}.pkl")
+
+    def _remember(self, obj, key: str):
+        try:
+            ref = weakref.ref(obj)
+        except TypeError:
+            return  # e.g. tuples: downstream stages will hash the content instead
+        self._origins[id(obj)] = (ref, key)
+
+    def forget(self, obj):
+        """Drop the key remembered for a result that was modified in place; it is hashed by content again."""
+        self._origins.pop(id(obj), None)
+
+    def _evict(self):
+        entries = [e for e in os.scandir(self.root) if e.name.endswith('.pkl')]
+        total = sum(e.stat().st_size for e in entries)
+        # least recently used first (hits refresh the mtime)
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+            logging.info(f"stage cache: evicted {entry.name}")
+
+    def run(self, func, *args, name: str | None = None, input_key: str | None = None, depends=(),
+            version=None, **params):
+        """
+        Call func(*args, **params) through the cache.
+
+        `input_key` is an extra input identity that is not visible in the arguments,
+        e.g. the hash_file() of the raw file a loader stage reads. The key covers the
+        source of func and of the repo modules it uses; `depends` adds functions or
+        modules it reaches in other ways and `version` invalidates by hand. Object
+        params (a scaler, a labeler) are keyed by their state, and the state the stage
+        leaves them in is stored too and restored on a hit. Results are keyed by the
+        content they were stored with: call forget(result) after modifying one in place.
+        """
+        name = name or func.__name__
+        input_keys = [self.content_key(arg) for arg in args]
+        if input_key is not None:
+            input_keys.append(input_key)
+        key = self.key(name, func, input_keys, params, depends, version)
+        path = self._path(name, key)
+        stateful = {k: v for k, v in params.items() if _stateful(v)}
+
+        if os.path.exists(path):
+            t0 = time.perf_counter()
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)
+            result = entry['result']
+            for param, state in entry['params_after'].items():
+                vars(stateful[param]).update(state)
+            self.stats[name]['hits'] += 1
+            self.stats[name]['seconds_loading'] += time.perf_counter() - t0
+        else:
+            t0 = time.perf_counter()
+            result = func(*args, **params)
+            self.stats[name]['misses'] += 1
+            self.stats[name]['seconds_computing'] += time.perf_counter() - t0
+
+            entry = {'result': result, 'params_after': {k: vars(v) for k, v in stateful.items()}}
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._evict()
+
+        self._remember(result, key)
+        return result
+
+    def clear(self):
+        for entry in os.scandir(self.root):
+            if entry.name.endswith('.pkl'):
+                os.remove(entry.path)
+
+    def size(self) -> int:
+        return sum(e.stat().st_size for e in os.scandir(self.root) if e.name.endswith('.pkl'))
+
+    def report(self) -> str:
+        """Hits / misses and time per stage."""
+        lines = [f"{'stage':<24} {'hits':>6} {'misses':>7} {'compute s':>10} {'load s':>8}"]
+        for name, s in self.stats.items():
+            lines.append(f"{name:<24} {s['hits']:>6} {s['misses']:>7} {s['seconds_computing']:>10.2f} {s['seconds_loading']:>8.2f}")
+        lines.append(f"cache size: {self.size() / 2**20:.1f} / {self.max_bytes / 2**20:.0f} MiB")
+        return "\n".join(lines)
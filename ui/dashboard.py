@@ -1,28 +1,146 @@
 import tkinter as tk
 from tkinter import ttk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import random
-import pandas as pd
-import joblib
+import os
+import queue
+import threading
+import time
+import numpy as np
+from ui.series_buffer import MultiResolutionSeries
+from utils.instrumentation import LatencyWindow, stage
+
+# matplotlib, pandas, joblib and the feature store are imported by load_resources(),
+# off the UI thread when the window loads in the background: the window is up before them.
+# python -m benchmarks.bench_startup measures what importing this module costs.
+
+FEATURE_STORE_PATH = os.path.join("models", "data_store")
+LEGACY_CSV_PATH = os.path.join("models", "data.csv")
+MODEL_PATH = os.path.join("models", "model_file_name.joblib")
+
+# status thresholds on the predicted RUL (cycles)
+CRITICAL_RUL = 30
+WARNING_RUL = 70
+STATUS_COLOURS = {"CRITICAL": "red", "WARNING": "orange", "HEALTHY": "green"}
+FLEET_COLUMNS = ("unit", "cycle", "rul", "status")
+
+
+def rul_status(rul: float) -> tuple[str, str]:
+    """status and its colour for a predicted RUL"""
+    if rul < CRITICAL_RUL:
+        status = "CRITICAL"
+    elif rul < WARNING_RUL:
+        status = "WARNING"
+    else:
+        status = "HEALTHY"
+    return status, STATUS_COLOURS[status]
+
 
 class PredictiveMaintenanceDashboard:
-    def __init__(self):
+    def __init__(self, tick_ms: int = 1000, queue_size: int = 8, history: int = 10_000, max_plot_points: int = 2000,
+                 max_history: int = 1_000_000, fleet: bool = False, model=None, show_latency: bool = False, background_load: bool = True):
         self.root = tk.Tk()
         self.root.title("Predictive Maintenance Dashboard")
         self.root.geometry("900x600")
 
         self.streaming = False
         self.time_step = 0
-        self.time_data = []
-        self.vibration_data = []
-        self.health_data = []
-        self.data = pd.read_csv(r"models\data.csv")
-        self.feature_cols = [col for col in self.data.columns if col not in ['number', 'time', 'RUL']]
-        self.sensor_6_data = []
+        # histories of the last max_history steps (older ones are dropped, so memory stays
+        # bounded in long sessions) with min/max/mean zoom levels: a frame draws at most
+        # ~max_plot_points per line whatever the zoom
+        self.health_data = MultiResolutionSeries(maxlen=max_history)
+        self.max_plot_points = max_plot_points
+        # plotted x range: the last view_span steps, ending at view_end (None: follow the newest step)
+        self.view_span = history
+        self.view_end = None
+        # set by finish_loading(); until then monitoring can't start
+        self.data = None
+        self.feature_cols = []
+        # any object with predict(), e.g. a ScoringClient of a shared scoring server
+        self.model = model
+        self.loading = queue.Queue()  # (percent, text) from the loader thread, then ("done" | "error", result)
+        self.sensor_6_data = MultiResolutionSeries(maxlen=max_history)
         self.sensor_6_iterator = 0
+        # predictions run on a background worker, the UI thread only drains its queue and renders
+        self.tick_ms = tick_ms
+        self.results = queue.Queue(maxsize=queue_size)
+        self.worker = None
+        self.stopping = None  # worker told to stop, still finishing its predict
+        # fleet mode: every unit in the data is replayed and scored in one batch per tick
+        self.fleet = fleet
+        self.fleet_offset = 0
+        self.fleet_latest = None
+        self.fleet_sort = ("rul", False)  # column, descending
+        # time spent per UI tick (drain + render), shown as an overlay with show_latency
+        self.show_latency = show_latency
+        self.tick_latency = LatencyWindow()
         self.setup_ui()
-        self.model = joblib.load("./models/model_file_name.joblib")
+        if background_load:
+            # the window shows up right away, data and model follow with a progress bar
+            threading.Thread(target=self.load_in_background, name="dashboard-loader", daemon=True).start()
+            self.root.after(50, self.poll_loading)
+        else:
+            self.finish_loading(*self.load_resources())
+
+    def load_resources(self, progress=None):
+        """import the heavy modules, read the data and load the model; returns (data, model)"""
+        progress = progress or (lambda percent, text: None)
+        progress(5, "Loading plotting library...")
+        # imported here (on the loader thread) so setup_plots() finds them already loaded
+        import matplotlib.figure
+        import matplotlib.backends.backend_tkagg
+        from models.feature_store import is_feature_store, load_feature_frame
+        from models.fleet_store import FleetStore
+
+        progress(35, "Loading sensor data...")
+        # memory-mapped feature store written by models/data.py, old data.csv as a fallback
+        # then held as float32 columns with a per-unit index; the workers score views of it
+        with stage("dashboard load data") as record:
+            frame = load_feature_frame(FEATURE_STORE_PATH if is_feature_store(FEATURE_STORE_PATH) else LEGACY_CSV_PATH)
+            data = FleetStore.from_frame(frame)
+            record['rows'] = len(data)
+
+        model = self.model
+        if model is None:
+            progress(70, "Loading model...")
+            import joblib
+            with stage("dashboard load model"):
+                model = joblib.load(MODEL_PATH)
+        progress(100, "Ready")
+        return data, model
+
+    def load_in_background(self):
+        # runs on the loader thread: no Tk calls here, everything goes through self.loading
+        try:
+            result = self.load_resources(lambda percent, text: self.loading.put((percent, text)))
+        except Exception as e:
+            self.loading.put(("error", e))
+        else:
+            self.loading.put(("done", result))
+
+    def poll_loading(self):
+        while True:
+            try:
+                kind, value = self.loading.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "done":
+                self.finish_loading(*value)
+                return
+            if kind == "error":
+                self.progress.stop()
+                self.load_label.config(text=f"Loading failed: {value}", foreground="red")
+                return
+            self.progress.config(value=kind)
+            self.load_label.config(text=value)
+        self.root.after(50, self.poll_loading)
+
+    def finish_loading(self, data, model):
+        self.data = data
+        self.model = model
+        self.feature_cols = [col for col in data.columns if col not in ['number', 'time', 'RUL']]
+        self.setup_plots()
+        self.progress.pack_forget()
+        self.load_label.pack_forget()
+        self.start_btn.state(['!disabled'])
 
     def setup_ui(self):
         # grid layout
@@ -53,91 +171,282 @@ class PredictiveMaintenanceDashboard:
 
 
         # Bottom block: Plot area
-        plot_frame = ttk.LabelFrame(self.root, text="graph", padding=10)
-        plot_frame.grid(row=1, column=0, columnspan=2, sticky='nsew', padx=10, pady=10)
-        self.fig1, self.ax1 = plt.subplots(figsize=(7, 3))
-        self.ax1.set_title("palceholder")
-        self.ax1.set_xlabel("Time Step")
-        self.ax1.set_ylabel("Vibration")
-        self.canvas1 = FigureCanvasTkAgg(self.fig1, master=plot_frame)
-        self.canvas1.get_tk_widget().pack(fill='both', expand=True)
+        self.plot_frame = ttk.LabelFrame(self.root, text="Fleet" if self.fleet else "graph", padding=10)
+        self.plot_frame.grid(row=1, column=0, columnspan=2, sticky='nsew', padx=10, pady=10)
+        if self.fleet:
+            self.setup_fleet_table(self.plot_frame)
 
 
-        # health block
-        health_frame = ttk.LabelFrame(self.root, text="Health Indicator", padding=10)
-        health_frame.grid(row=1, column=2, sticky='nsew', padx=10, pady=10)
-        self.fig2, self.ax2 = plt.subplots(figsize=(5, 3))
-        self.ax2.set_title("palceholder")
-        self.ax2.set_xlabel("Time Step")
-        self.ax2.set_ylabel("Vibration")
-        self.canvas2 = FigureCanvasTkAgg(self.fig2, master=health_frame)
-        self.canvas2.get_tk_widget().pack(fill='both', expand=True)
+        # health block, the figures are added by setup_plots() once matplotlib is loaded
+        self.health_frame = ttk.LabelFrame(self.root, text="Health Indicator", padding=10)
+        self.health_frame.grid(row=1, column=2, sticky='nsew', padx=10, pady=10)
 
         # Buttons
         button_frame = ttk.Frame(self.root)
         button_frame.grid(row=2, column=0, columnspan=2, pady=10)
         self.start_btn = ttk.Button(button_frame, text="Start Monitoring", command=self.start_monitoring)
+        self.start_btn.state(['disabled'])  # enabled by finish_loading()
         self.start_btn.pack(side='left', padx=10)
         self.stop_btn = ttk.Button(button_frame, text="Stop Monitoring", command=self.stop_monitoring)
         self.stop_btn.pack(side='left', padx=10)
+
+        # zoom / pan over the history (mouse wheel on a plot zooms as well)
+        view_frame = ttk.Frame(self.root)
+        view_frame.grid(row=2, column=2, pady=10)
+        for text, command in (("-", lambda: self.zoom(2.0)), ("+", lambda: self.zoom(0.5)),
+                              ("<", lambda: self.pan(-0.5)), (">", lambda: self.pan(0.5)), ("Live", self.follow_live)):
+            ttk.Button(view_frame, text=text, width=4, command=command).pack(side='left', padx=2)
+        self.view_label = ttk.Label(view_frame, text="", foreground="gray")
+        self.view_label.pack(side='left', padx=5)
+        if self.show_latency:
+            self.latency_label = ttk.Label(button_frame, text="tick: -- | predict: --", foreground="gray")
+            self.latency_label.pack(side='left', padx=10)
+        self.progress = ttk.Progressbar(button_frame, mode='determinate', maximum=100, length=160)
+        self.progress.pack(side='left', padx=10)
+        self.load_label = ttk.Label(button_frame, text="Starting...", foreground="gray")
+        self.load_label.pack(side='left', padx=5)
+
+    def setup_plots(self):
+        # Figure instead of pyplot: no pyplot import and no global figure registry
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.fig1 = Figure(figsize=(7, 3))
+        self.ax1 = self.fig1.subplots()
+        self.ax1.set_title("palceholder")
+        self.ax1.set_xlabel("Time Step")
+        self.ax1.set_ylabel("Vibration")
+        self.line1, = self.ax1.plot([], [], color='blue') # updated in place every frame
+        self.canvas1 = FigureCanvasTkAgg(self.fig1, master=self.plot_frame)
+        if not self.fleet:
+            self.canvas1.get_tk_widget().pack(fill='both', expand=True)
+
+        self.fig2 = Figure(figsize=(5, 3))
+        self.ax2 = self.fig2.subplots()
+        self.ax2.set_title("palceholder")
+        self.ax2.set_xlabel("Time Step")
+        self.ax2.set_ylabel("Vibration")
+        self.line2, = self.ax2.plot([], [], color='green')
+        self.canvas2 = FigureCanvasTkAgg(self.fig2, master=self.health_frame)
+        self.canvas2.get_tk_widget().pack(fill='both', expand=True)
+        for canvas in (self.canvas1, self.canvas2):
+            canvas.mpl_connect('scroll_event', self.on_scroll)
+
+    def setup_fleet_table(self, master):
+        # summary of all active units, click a heading to sort by it (again to reverse)
+        self.fleet_table = ttk.Treeview(master, columns=FLEET_COLUMNS, show='headings', height=12)
+        for col, text in zip(FLEET_COLUMNS, ("Unit", "Cycle", "Predicted RUL", "Status")):
+            self.fleet_table.heading(col, text=text, command=lambda col=col: self.sort_fleet(col))
+            self.fleet_table.column(col, width=90, anchor='center')
+        for status, colour in STATUS_COLOURS.items():
+            self.fleet_table.tag_configure(status, foreground=colour)
+        scrollbar = ttk.Scrollbar(master, orient='vertical', command=self.fleet_table.yview)
+        self.fleet_table.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.fleet_table.pack(fill='both', expand=True)
     
     def update_data(self):
         if self.streaming:
-            new_time = self.time_step
-            new_vibration = random.uniform(0, 1)
-            new_health = random.uniform(0, 1)
-
-            self.time_data.append(new_time)
-            # self.vibration_data.append(new_vibration)
-            # self.health_data.append(new_health)
-            sensor_6_val = self.data.iloc[self.sensor_6_iterator, 6]
-            self.sensor_6_data.append(sensor_6_val)
-            # test
-            # --prediction logic--
-            input_features = self.data.loc[self.sensor_6_iterator, self.feature_cols].values.reshape(1, -1)
-            input_df = pd.DataFrame(input_features, columns=self.feature_cols)
-            predicted_rul = self.model.predict(input_df)[0]
-            self.health_data.append(predicted_rul)
-
-            self.vibration_label.config(text=f"Sensor 6 RMS: {sensor_6_val:.3f}")
-
-            self.device_name_label.config(text="Device Name: TurboFan #3")
-            self.device_id_label.config(text="Device ID: TF3X-991")
-
-            # --- Status Alerts ---
-            if predicted_rul < 30:
-                self.status_label.config(text=f"Status: CRITICAL - RUL {predicted_rul:.1f}", foreground="red")
-            elif predicted_rul < 70:
-                self.status_label.config(text=f"Status: WARNING - RUL {predicted_rul:.1f}", foreground="orange")
-            else:
-                self.status_label.config(text=f"Status: HEALTHY - RUL {predicted_rul:.1f}", foreground="green")
-            
-            self.ax1.clear()
-            self.ax1.plot(self.time_data, self.sensor_6_data, color='blue')
+            tick_start = time.perf_counter()
+            # take everything the worker produced since the last frame; if rendering
+            # fell behind, the intermediate frames are skipped but their points are still plotted
+            results = []
+            while True:
+                try:
+                    results.append(self.results.get_nowait())
+                except queue.Empty:
+                    break
+
+            # one extend per tick keeps the zoom levels up to date for all new points at once
+            steps = np.arange(self.time_step, self.time_step + len(results))
+            self.time_step += len(results)
+            if results and self.fleet:
+                self.health_data.extend(steps, [snapshot.rul.min() for snapshot in results])
+                self.fleet_offset = results[-1].offset + 1
+                self.render_fleet(results[-1])
+            elif results:
+                self.sensor_6_data.extend(steps, [result.sensor_value for result in results])
+                self.health_data.extend(steps, [result.rul for result in results])
+                self.sensor_6_iterator = results[-1].row + 1
+                self.render(results[-1])
+
+            if results:
+                # the canvas itself is redrawn later in Tk's idle loop (draw_idle), not counted here
+                self.tick_latency.add(time.perf_counter() - tick_start)
+                if self.show_latency:
+                    self.update_latency_overlay()
+
+            if self.worker is not None and not self.worker.is_alive() and self.results.empty():
+                self.streaming = False  # end of the data
+                return
+            self.root.after(self.tick_ms, self.update_data)
+
+    def render(self, latest):
+        sensor_6_val = latest.sensor_value
+        predicted_rul = latest.rul
+
+        self.vibration_label.config(text=f"Sensor 6 RMS: {sensor_6_val:.3f}")
+
+        self.device_name_label.config(text="Device Name: TurboFan #3")
+        self.device_id_label.config(text="Device ID: TF3X-991")
+
+        # --- Status Alerts ---
+        status, colour = rul_status(predicted_rul)
+        self.status_label.config(text=f"Status: {status} - RUL {predicted_rul:.1f}", foreground=colour)
+
+
+        if self.ax1.get_title() != "Sensor 6 Rolling rms Over time":
             self.ax1.set_title("Sensor 6 Rolling rms Over time")
             self.ax1.set_xlabel("Time Step")
             self.ax1.set_ylabel("Sensor 6 RMS")
-
-            self.ax2.clear()
-            self.ax2.plot(self.time_data, self.health_data, color='green')
             self.ax2.set_title("Predicted RUL Over time")
             self.ax2.set_xlabel("Time Step")
             self.ax2.set_ylabel("Remaining Useful Life (RUL)")
 
-            self.canvas1.draw()
-            self.canvas2.draw()
+        self.plot_history()
+
+    def render_fleet(self, snapshot):
+        self.fleet_latest = snapshot
+        rul = snapshot.rul
+        n_critical = int((rul < CRITICAL_RUL).sum())
+        n_warning = int(((rul >= CRITICAL_RUL) & (rul < WARNING_RUL)).sum())
 
-            self.time_step += 1
-            self.sensor_6_iterator += 1
-            self.root.after(1000, self.update_data) # 1 second interval
+        self.vibration_label.config(text=f"Active units: {len(snapshot.units)}")
+        self.temp_label.config(text=f"CRITICAL {n_critical} / WARNING {n_warning} / HEALTHY {len(rul) - n_critical - n_warning}")
+        self.device_name_label.config(text="Device Name: Fleet")
+        self.device_id_label.config(text=f"Replay cycle: {snapshot.offset + 1}")
+
+        worst = int(np.argmin(rul))
+        status, colour = rul_status(rul[worst])
+        self.status_label.config(text=f"Status: {status} - unit {snapshot.units[worst]} RUL {rul[worst]:.1f}", foreground=colour)
+        self.fill_fleet_table()
+
+        if self.ax2.get_title() != "Lowest Predicted RUL in Fleet":
+            self.ax2.set_title("Lowest Predicted RUL in Fleet")
+            self.ax2.set_xlabel("Time Step")
+            self.ax2.set_ylabel("Remaining Useful Life (RUL)")
+        self.plot_history()
+
+    def fill_fleet_table(self):
+        snapshot = self.fleet_latest
+        if snapshot is None:
+            return
+        column, descending = self.fleet_sort
+        # status follows the RUL thresholds, so it sorts by RUL as well
+        keys = {"unit": snapshot.units, "cycle": snapshot.cycles, "rul": snapshot.rul, "status": snapshot.rul}[column]
+        order = np.argsort(keys, kind='stable')
+        if descending:
+            order = order[::-1]
+
+        # rows are kept by unit id and only updated/moved, not rebuilt
+        stale = set(self.fleet_table.get_children())
+        for position, i in enumerate(order):
+            iid = str(snapshot.units[i])
+            status, _ = rul_status(snapshot.rul[i])
+            values = (snapshot.units[i], snapshot.cycles[i], f"{snapshot.rul[i]:.1f}", status)
+            if iid in stale:
+                stale.discard(iid)
+                self.fleet_table.item(iid, values=values, tags=(status,))
+                self.fleet_table.move(iid, '', position)
+            else:
+                self.fleet_table.insert('', position, iid=iid, values=values, tags=(status,))
+        if stale:
+            self.fleet_table.delete(*stale)  # units past their last cycle
+
+    def sort_fleet(self, column):
+        current, descending = self.fleet_sort
+        self.fleet_sort = (column, not descending if column == current else False)
+        self.fill_fleet_table()
+
+    def update_latency_overlay(self):
+        tick = self.tick_latency.percentiles()
+        predict = self.worker.predict_latency.percentiles() if self.worker is not None else {}
+        def fmt(p):
+            return " / ".join(f"p{k} {v:.1f}" for k, v in p.items()) if p else "--"
+        self.latency_label.config(text=f"tick ms: {fmt(tick)} | predict ms: {fmt(predict)}")
+
+    def view_range(self) -> tuple[int, int]:
+        """first and last time step of the plotted window"""
+        newest = max(self.time_step - 1, 0)
+        end = newest if self.view_end is None else min(self.view_end, newest)
+        return max(0, end - self.view_span + 1), end
+
+    def plot_history(self):
+        if not len(self.health_data):
+            return
+        x0, x1 = self.view_range()
+        if not self.fleet:
+            self.update_line(self.ax1, self.line1, self.sensor_6_data, x0, x1)
+            self.canvas1.draw_idle()
+        self.update_line(self.ax2, self.line2, self.health_data, x0, x1)
+        self.canvas2.draw_idle()
+        live = "live" if self.view_end is None else "paused view"
+        self.view_label.config(text=f"steps {x0}-{x1} ({live})")
+
+    def zoom(self, factor: float):
+        self.view_span = int(min(max(self.view_span * factor, 10), max(self.time_step, 10)))
+        self.plot_history()
+
+    def pan(self, fraction: float):
+        # panning to or past the newest step follows it again
+        newest = self.time_step - 1
+        end = (newest if self.view_end is None else self.view_end) + int(fraction * self.view_span)
+        self.view_end = None if end >= newest else max(end, self.view_span - 1)
+        self.plot_history()
+
+    def follow_live(self):
+        self.view_end = None
+        self.plot_history()
+
+    def on_scroll(self, event):
+        self.zoom(0.5 if event.button == 'up' else 2.0)
+
+    def update_line(self, ax, line, series, x0, x1):
+        # at most ~max_plot_points from the coarsest zoom level that still has them,
+        # min and max of every bucket so spikes stay visible
+        x, y = series.query(x0, x1, self.max_plot_points)
+        if len(x) == 0:
+            return
+        line.set_data(x.copy(), y.copy())
+
+        # limits straight from the data instead of relim() over every artist
+        ax.set_xlim(x0, max(x1, x0 + 1))
+        low, high = float(np.nanmin(y)), float(np.nanmax(y))
+        pad = (high - low) * 0.05 or 1.0
+        ax.set_ylim(low - pad, high + pad)
 
     def start_monitoring(self):
-        if not self.streaming:
+        if not self.streaming and self.stopping is None and self.data is not None:
+            from ui.inference_worker import FleetWorker, InferenceWorker
             self.streaming = True
-            self.update_data()
+            if self.fleet:
+                self.worker = FleetWorker(self.model, self.data, self.feature_cols, self.results,
+                                          tick_seconds=self.tick_ms / 1000, start_offset=self.fleet_offset)
+            else:
+                self.worker = InferenceWorker(self.model, self.data, self.feature_cols, self.results,
+                                              tick_seconds=self.tick_ms / 1000, start_row=self.sensor_6_iterator)
+            self.worker.start()
+            self.root.after(self.tick_ms, self.update_data)
     
     def stop_monitoring(self):
         self.streaming = False
+        if self.worker is not None:
+            # no join on the Tk thread: a slow or remote predict would freeze the UI.
+            # start stays disabled until the worker is gone, so two never run at once
+            self.worker.stop()
+            self.stopping, self.worker = self.worker, None
+            self.start_btn.state(['disabled'])
+            self.root.after(20, self.finish_stop)
+
+    def finish_stop(self):
+        if self.stopping.is_alive():
+            self.root.after(20, self.finish_stop)
+            return
+        self.stopping = None
+        # unrendered results are scored again on resume
+        while not self.results.empty():
+            self.results.get_nowait()
+        self.start_btn.state(['!disabled'])
 
     def run(self):
         self.root.mainloop()
@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from models.fleet_store import FleetStore
+from utils.instrumentation import LatencyWindow
+
+# one scored cycle: engine cycle ('time'), row of the feature frame, the displayed sensor value, the model input and the prediction
+InferenceResult = namedtuple("InferenceResult", ["cycle", "row", "sensor_value", "features", "rul"])
+
+
+class InferenceWorker(threading.Thread):
+    """
+    Scores one row of the feature frame per tick off the Tk main thread.
+
+    Results go into a bounded queue. When the UI falls behind and the queue is full
+    the oldest result is discarded, so the worker never blocks and the UI always
+    gets the newest cycles.
+    """
+
+    def __init__(self, model, data: pd.DataFrame | FleetStore, feature_cols: list, results: queue.Queue,
+                 tick_seconds: float = 1.0, start_row: int = 0, sensor_col: int = 6):
+        super().__init__(daemon=True)
+        self.model = model
+        self.feature_cols = feature_cols
+        self.results = results
+        self.tick_seconds = tick_seconds
+        self.next_row = start_row
+        self.dropped = 0
+        self.predict_latency = LatencyWindow()
+        if isinstance(data, FleetStore):
+            # views of the store's float32 columns, nothing is copied
+            self._features = data.matrix(feature_cols)
+            self._sensor = data.matrix([data.columns[sensor_col]])[:, 0]
+            self._cycles = data.matrix(['time'])[:, 0] if 'time' in data.columns else np.arange(len(data))
+        else:
+            # contiguous arrays once, instead of .loc/.iloc lookups every tick
+            self._features = np.ascontiguousarray(data[feature_cols].to_numpy())
+            self._sensor = data.iloc[:, sensor_col].to_numpy()
+            self._cycles = data['time'].to_numpy() if 'time' in data.columns else np.arange(len(data))
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _publish(self, result: InferenceResult):
+        while True:
+            try:
+                self.results.put_nowait(result)
+                return
+            except queue.Full:
+                try:
+                    self.results.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while not self._stop_event.is_set() and self.next_row < len(self._features):
+            row = self.next_row
+            features = self._features[row]
+            input_df = pd.DataFrame(features.reshape(1, -1), columns=self.feature_cols)
+            with self.predict_latency.time():
+                rul = float(self.model.predict(input_df)[0])
+            self._publish(InferenceResult(self._cycles[row], row, self._sensor[row], features, rul))
+            self.next_row += 1
+
+            # fixed rate, not fixed sleep: a slow predict does not stretch the tick
+            next_tick += self.tick_seconds
+            self._stop_event.wait(max(0.0, next_tick - time.perf_counter()))
+
+
+# one fleet tick: per active unit its id, engine cycle, row, displayed sensor value and prediction
+FleetSnapshot = namedtuple("FleetSnapshot", ["offset", "units", "cycles", "rows", "sensor_values", "rul"])
+
+
+class FleetWorker(InferenceWorker):
+    """
+    Scores every active unit once per tick with a single batched predict.
+
+    All units are replayed in lockstep: on tick k each unit that has more than k
+    cycles contributes its k-th row. The rows are gathered into one contiguous
+    array, so the cost of a tick is one vectorized inference instead of one per unit.
+    """
+
+    def __init__(self, model, data: pd.DataFrame | FleetStore, feature_cols: list, results: queue.Queue,
+                 tick_seconds: float = 1.0, start_offset: int = 0, sensor_col: int = 6, unit_col: str = 'number'):
+        super().__init__(model, data, feature_cols, results, tick_seconds=tick_seconds, sensor_col=sensor_col)
+        if isinstance(data, FleetStore):
+            # the store's unit index already is the start/length of every unit
+            self.units = np.asarray(data.unit_ids)
+            self._starts = data.offsets[:data.n_units].copy()
+            self._lengths = data.lengths[:data.n_units].copy()
+        else:
+            units = data[unit_col].to_numpy()
+            # rows are contiguous per unit, as in the feature store
+            starts = np.concatenate([[0], np.flatnonzero(units[1:] != units[:-1]) + 1])
+            self.units = units[starts]
+            self._starts = starts
+            self._lengths = np.diff(np.append(starts, len(units)))
+        self.next_offset = start_offset
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while not self._stop_event.is_set():
+            offset = self.next_offset
+            active = offset < self._lengths
+            if not active.any():
+                break
+            rows = self._starts[active] + offset
+            batch = self._features[rows]  # fancy indexing: already one contiguous [n_active, n_features] block
+            input_df = pd.DataFrame(batch, columns=self.feature_cols)
+            with self.predict_latency.time():
+                rul = np.asarray(self.model.predict(input_df), dtype=np.float64)
+            self._publish(FleetSnapshot(offset, self.units[active], self._cycles[rows], rows, self._sensor[rows], rul))
+            self.next_offset += 1
+
+            next_tick += self.tick_seconds
+            self._stop_event.wait(max(0.0, next_tick - time.perf_counter()))
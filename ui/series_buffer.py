@@ -0,0 +1,213 @@
+import numpy as np
+
+
+class _Level:
+    # per-bucket summaries of one zoom level; imin/imax are raw indices of the extremes
+    __slots__ = ('min', 'max', 'sum', 'count', 'imin', 'imax', 'n')
+
+    def __init__(self, capacity: int):
+        self.min = np.empty(capacity)
+        self.max = np.empty(capacity)
+        self.sum = np.empty(capacity)
+        self.count = np.empty(capacity, dtype=np.int64)
+        self.imin = np.empty(capacity, dtype=np.int64)
+        self.imax = np.empty(capacity, dtype=np.int64)
+        self.n = 0
+
+    def reserve(self, n: int):
+        if n > len(self.min):
+            size = max(n, 2 * len(self.min))
+            for name in ('min', 'max', 'sum', 'count', 'imin', 'imax'):
+                old = getattr(self, name)
+                new = np.empty(size, dtype=old.dtype)
+                new[:self.n] = old[:self.n]
+                setattr(self, name, new)
+
+
+class MultiResolutionSeries:
+    """
+    (x, y) history, the newest maxlen points of it when maxlen is set, with
+    min/max/mean summaries at zoom levels of factor, factor**2, ... points per bucket.
+
+    extend() only recomputes the buckets the new points fall into (the last one of
+    every level), so keeping the levels costs O(1) amortised per point. query()
+    picks the finest level with at most max_points points in the requested x range
+    and returns the actual extreme points of every bucket, in x order, so a frame
+    draws a bounded number of points over any length of history and spikes stay
+    visible. x must not decrease; NaN values are left out of the summaries.
+
+    Without maxlen the history grows with every point. With maxlen, memory stays
+    bounded: once more than maxlen points are stored the oldest are dropped down to
+    3/4 of maxlen and the levels are rebuilt from the rest, O(maxlen) every maxlen/4
+    points, so still O(1) amortised per point.
+
+    Example:
+        >>> series = MultiResolutionSeries(maxlen=1_000_000)
+        >>> series.extend(steps, rul)
+        >>> x, y = series.query(x0, x1, max_points=2000)    # whatever x1 - x0 is
+    """
+
+    def __init__(self, factor: int = 4, capacity: int = 1024, maxlen: int | None = None):
+        if factor < 2:
+            raise ValueError("factor must be at least 2")
+        if maxlen is not None and maxlen < 4:
+            raise ValueError("maxlen must be at least 4")
+        self.factor = factor
+        self.maxlen = maxlen
+        self._x = np.empty(capacity)
+        self._y = np.empty(capacity)
+        self._n = 0
+        self.levels = []  # levels[k] has buckets of factor ** (k + 1) raw points
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x[:self._n]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[:self._n]
+
+    def append(self, x, y):
+        self.extend([x], [y])
+
+    def extend(self, xs, ys):
+        xs = np.asarray(xs, dtype=np.float64).ravel()
+        ys = np.asarray(ys, dtype=np.float64).ravel()
+        if len(xs) != len(ys):
+            raise ValueError("x and y differ in length")
+        if len(xs) == 0:
+            return
+        if self.maxlen is not None and self._n + len(xs) > self.maxlen:
+            self._drop_oldest(self._n + len(xs) - self.maxlen * 3 // 4)
+            xs, ys = xs[-self.maxlen:], ys[-self.maxlen:]
+        old = self._n
+        if old + len(xs) > len(self._x):
+            size = max(old + len(xs), 2 * len(self._x))
+            for name in ('_x', '_y'):
+                grown = np.empty(size)
+                grown[:old] = getattr(self, name)[:old]
+                setattr(self, name, grown)
+        self._x[old:old + len(xs)] = xs
+        self._y[old:old + len(ys)] = ys
+        self._n += len(xs)
+        self._update_levels(old)
+
+    def _update_levels(self, changed: int):
+        # a new level as soon as the one below has more than one bucket
+        while self.factor ** (len(self.levels) + 1) < self._n:
+            self.levels.append(_Level(max(16, self._n // self.factor ** (len(self.levels) + 1) + 1)))
+        # changed: first raw index whose buckets are out of date
+        for k, level in enumerate(self.levels):
+            size = self.factor ** (k + 1)
+            first = min(changed // size, level.n)
+            self._rebuild(k, first)
+
+    def _drop_oldest(self, n: int):
+        # keep the newest points at the front of the arrays and rebuild the levels over them
+        keep = max(self._n - n, 0)
+        self._x[:keep] = self._x[self._n - keep:self._n]
+        self._y[:keep] = self._y[self._n - keep:self._n]
+        self._n = keep
+        self.levels = []
+        self._update_levels(0)
+
+    def _rebuild(self, k: int, first: int):
+        # recompute buckets first.. of level k from the level below (or the raw points)
+        f = self.factor
+        last = -(-self._n // f ** (k + 1))  # number of buckets
+        c0 = first * f
+        if k == 0:
+            y = self._y[c0:self._n]
+            cmin = cmax = csum = y
+            ccount = None
+            if np.isnan(y).any():
+                finite = ~np.isnan(y)
+                cmin, cmax, csum = np.where(finite, y, np.inf), np.where(finite, y, -np.inf), np.where(finite, y, 0.0)
+                ccount = finite.astype(np.int64)
+            cimin = cimax = None  # raw index = c0 + position
+        else:
+            below = self.levels[k - 1]
+            c1 = below.n
+            cmin, cmax, csum = below.min[c0:c1], below.max[c0:c1], below.sum[c0:c1]
+            ccount, cimin, cimax = below.count[c0:c1], below.imin[c0:c1], below.imax[c0:c1]
+
+        level = self.levels[k]
+        level.reserve(last)
+        full = len(cmin) // f
+        n_full = full * f
+        stop = first + full
+        if full:
+            blocks_min, blocks_max = cmin[:n_full].reshape(-1, f), cmax[:n_full].reshape(-1, f)
+            at_min, at_max = blocks_min.argmin(axis=1), blocks_max.argmax(axis=1)
+            rows = np.arange(full)
+            level.min[first:stop] = blocks_min[rows, at_min]
+            level.max[first:stop] = blocks_max[rows, at_max]
+            level.sum[first:stop] = csum[:n_full].reshape(-1, f).sum(axis=1)
+            level.count[first:stop] = f if ccount is None else ccount[:n_full].reshape(-1, f).sum(axis=1)
+            if cimin is None:
+                level.imin[first:stop] = c0 + rows * f + at_min
+                level.imax[first:stop] = c0 + rows * f + at_max
+            else:
+                level.imin[first:stop] = cimin[:n_full].reshape(-1, f)[rows, at_min]
+                level.imax[first:stop] = cimax[:n_full].reshape(-1, f)[rows, at_max]
+        if n_full < len(cmin):
+            # the bucket still filling up
+            i, j = n_full + int(cmin[n_full:].argmin()), n_full + int(cmax[n_full:].argmax())
+            level.min[stop] = cmin[i]
+            level.max[stop] = cmax[j]
+            level.sum[stop] = csum[n_full:].sum()
+            level.count[stop] = len(cmin) - n_full if ccount is None else ccount[n_full:].sum()
+            level.imin[stop] = c0 + i if cimin is None else cimin[i]
+            level.imax[stop] = c0 + j if cimax is None else cimax[j]
+        level.n = last
+
+    def _range(self, x0, x1) -> tuple[int, int]:
+        x = self.x
+        i0 = 0 if x0 is None else int(np.searchsorted(x, x0, side='left'))
+        i1 = self._n if x1 is None else int(np.searchsorted(x, x1, side='right'))
+        return i0, max(i0, i1)
+
+    def level_for(self, n_points: int, max_points: int) -> int:
+        """0 for the raw points, k + 1 for levels[k]: the finest one that fits"""
+        for k in range(len(self.levels) + 1):
+            size = self.factor ** k
+            if k == 0 and n_points <= max_points or k > 0 and 2 * -(-n_points // size) <= max_points:
+                return k
+        return len(self.levels)
+
+    def query(self, x0=None, x1=None, max_points: int = 2000) -> tuple[np.ndarray, np.ndarray]:
+        """at most ~max_points (x, y) of the range [x0, x1]: raw points, or every bucket's min and max"""
+        i0, i1 = self._range(x0, x1)
+        k = self.level_for(i1 - i0, max_points)
+        if k == 0:
+            return self._x[i0:i1], self._y[i0:i1]
+        level = self.levels[k - 1]
+        size = self.factor ** k
+        b0, b1 = i0 // size, -(-i1 // size)
+        valid = level.count[b0:b1] > 0
+        imin, imax = level.imin[b0:b1][valid], level.imax[b0:b1][valid]
+        # within a bucket the earlier of the two extremes comes first
+        idx = np.column_stack([np.minimum(imin, imax), np.maximum(imin, imax)]).ravel()
+        return self._x[idx], self._y[idx]
+
+    def buckets(self, level: int, x0=None, x1=None) -> dict:
+        """x (first x), min, max, mean and count of the level's buckets overlapping [x0, x1]"""
+        i0, i1 = self._range(x0, x1)
+        if level == 0:
+            y = self._y[i0:i1]
+            return {'x': self._x[i0:i1], 'min': y, 'max': y, 'mean': y, 'count': (~np.isnan(y)).astype(np.int64)}
+        summary = self.levels[level - 1]
+        size = self.factor ** level
+        b0, b1 = i0 // size, -(-i1 // size)
+        count = summary.count[b0:b1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = summary.sum[b0:b1] / count
+        return {'x': self._x[np.arange(b0, b1) * size], 'min': summary.min[b0:b1], 'max': summary.max[b0:b1],
+                'mean': mean, 'count': count}
+
+    def clear(self):
+        self._n = 0
+        self.levels = []
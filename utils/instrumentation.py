@@ -0,0 +1,173 @@
+import functools
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Stage instrumentation.
+#
+#   from utils.instrumentation import stage, instrument, RECORDER
+#
+#   with stage("rolling features", rows=len(df)):
+#       ...
+#
+#   @instrument("lowess", rows=len)          # rows from the return value
+#   def add_rolling_slope(data): ...
+#
+# Every finished stage becomes one record (wall and CPU seconds, RSS before/after,
+# process peak RSS, optional tracemalloc peak, rows and rows/s). Records are kept in
+# memory for summary(), logged as JSON on the "instrumentation" logger (DEBUG) and,
+# if the recorder has a path, appended to a JSON-lines file.
+
+logger = logging.getLogger("instrumentation")
+
+
+def _rss_mb() -> float:
+    """current resident set size"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return _peak_rss_mb()  # no procfs (macOS): the peak is the best we have
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+class Recorder:
+    """
+    Collects stage records.
+
+    trace_memory=True also records the Python allocation peak of every stage with
+    tracemalloc (noticeably slower; nested stages reset the peak of the outer one).
+    CPU time is process-wide, so it includes other threads working at the same time.
+    """
+
+    def __init__(self, path: str | None = None, trace_memory: bool = False):
+        self.path = path
+        self.trace_memory = trace_memory
+        self.records = []
+        self._lock = threading.Lock()
+
+    def configure(self, path: str | None = None, trace_memory: bool | None = None):
+        if path is not None:
+            self.path = path
+        if trace_memory is not None:
+            self.trace_memory = trace_memory
+
+    @contextmanager
+    def stage(self, name: str, rows: int | None = None, **tags):
+        """Time the block; set record['rows'] inside it if the count is only known there."""
+        record = {'stage': name, 'rows': rows, **tags}
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+        rss_before = _rss_mb()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - wall0
+            record['wall_s'] = wall
+            record['cpu_s'] = time.process_time() - cpu0
+            record['rss_mb'] = _rss_mb()
+            record['rss_delta_mb'] = record['rss_mb'] - rss_before
+            record['peak_rss_mb'] = _peak_rss_mb()
+            if self.trace_memory:
+                record['tracemalloc_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+                if started_tracing:
+                    tracemalloc.stop()
+            if record['rows']:
+                record['rows_per_s'] = record['rows'] / wall if wall > 0 else None
+            record['timestamp'] = time.time()
+            self._add(record)
+
+    def instrument(self, name: str | None = None, rows=None):
+        """decorator version of stage(); `rows` is a function of the return value (e.g. len)"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__) as record:
+                    result = func(*args, **kwargs)
+                    if rows is not None:
+                        record['rows'] = rows(result)
+                return result
+            return wrapper
+        return decorator
+
+    def _add(self, record: dict):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self.records.append(record)
+            if self.path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, 'a') as f:
+                    f.write(line + "\n")
+        logger.debug(line)
+
+    def to_json(self, path: str):
+        with self._lock:
+            records = list(self.records)
+        with open(path, 'w') as f:
+            json.dump(records, f, indent=2, default=str)
+
+    def summary(self) -> str:
+        """one line per record"""
+        lines = [f"{'stage':<24} {'wall s':>8} {'cpu s':>8} {'rows/s':>12} {'rss MiB':>9} {'peak MiB':>9}"]
+        with self._lock:
+            records = list(self.records)
+        for r in records:
+            rate = f"{r['rows_per_s']:12,.0f}" if r.get('rows_per_s') else f"{'-':>12}"
+            lines.append(f"{r['stage']:<24} {r['wall_s']:8.3f} {r['cpu_s']:8.3f} {rate} "
+                         f"{r['rss_mb']:9.1f} {r['peak_rss_mb']:9.1f}")
+        return "\n".join(lines)
+
+
+class LatencyWindow:
+    """Latencies of the last `size` events (ticks, predicts) and their percentiles."""
+
+    def __init__(self, size: int = 1000):
+        self._times = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._times.append(seconds)
+
+    @contextmanager
+    def time(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(time.perf_counter() - t0)
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def percentiles(self, ps=(50, 90, 99)) -> dict:
+        """{p: milliseconds}, empty while nothing was recorded"""
+        with self._lock:
+            times = np.array(self._times)
+        if len(times) == 0:
+            return {}
+        return dict(zip(ps, np.percentile(times, ps) * 1000))
+
+
+# process-wide default recorder
+RECORDER = Recorder()
+stage = RECORDER.stage
+instrument = RECORDER.instrument
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+# rough FD001 operating point of the 21 CMAPSS sensors (raw columns 5..25)
+SENSOR_BASELINE = [
+    518.67, 642.68, 1590.52, 1408.93, 14.62, 21.61, 553.37, 2388.06, 9065.24, 1.30,
+    47.54, 521.41, 2388.10, 8143.75, 8.44, 0.03, 393.21, 2388.0, 100.0, 38.82, 23.29,
+]
+# relative drift at end of life (sign gives direction of degradation)
+SENSOR_DRIFT = [
+    0.0, 1e-3, 7e-3, 1e-2, 0.0, 0.0, -3e-3, 2e-5, 5e-3, 0.0,
+    1e-2, -3e-3, 2e-5, 4e-3, 1e-2, 0.0, 6e-3, 0.0, 0.0, -1e-2, -1e-2,
+]
+
+
+def synthetic_cmapss(n_units: int = 100, min_cycles: int = 128, max_cycles: int = 362, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate run-to-failure data in the raw, header-less CMAPSS layout.
+
+    Columns follow the train_FD00x.txt files: 0 unit number, 1 cycle, 2-4 operating
+    settings, 5-25 the 21 sensors. Each sensor drifts exponentially towards failure
+    on top of gaussian noise, which is enough to exercise the preprocessing and
+    scoring paths when the real dataset is not available.
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(min_cycles, max_cycles + 1, size=n_units)
+    n = int(lengths.sum())
+
+    number = np.repeat(np.arange(1, n_units + 1), lengths)
+    time = np.concatenate([np.arange(1, l + 1) for l in lengths])
+    life = np.repeat(lengths, lengths)
+    wear = np.expm1(3 * time / life) / np.expm1(3)  # 0 -> 1 over the unit's life
+
+    base = np.asarray(SENSOR_BASELINE)
+    drift = np.asarray(SENSOR_DRIFT)
+    sensors = base * (1 + drift * wear[:, None]) + rng.normal(0, 1, (n, 21)) * np.maximum(base * 5e-4, 1e-3)
+
+    ops = np.column_stack([
+        rng.normal(0, 2e-3, n),
+        rng.normal(0, 3e-4, n),
+        np.full(n, 100.0),
+    ])
+
+    raw = np.column_stack([number, time, ops, sensors])
+    df = pd.DataFrame(raw)
+    df[0] = df[0].astype(int)
+    df[1] = df[1].astype(int)
+    return df